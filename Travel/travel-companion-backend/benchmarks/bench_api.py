@@ -0,0 +1,295 @@
+# travel-companion-backend/benchmarks/bench_api.py
+"""
+Load-tests /api/suggest and /api/get-travel-details offline: every upstream
+API is replaced by the local fakes in benchmarks.fake_upstreams, and the app
+is driven in-process at each concurrency level. Reports throughput and
+p50/p95/p99 latency, and saves the results as JSON so a later run can be
+compared against them.
+
+Run from the backend directory:
+    python -m benchmarks.bench_api
+    python -m benchmarks.bench_api --concurrency 1,16,64 --requests 200 --latency-scale 1
+    python -m benchmarks.bench_api --profile gemini:2500:0.05 --error-rate 0.01
+    python -m benchmarks.bench_api --label my-change --compare benchmarks/results/baseline.json
+
+Upstream latencies default to a tenth of the real providers' (see
+--latency-scale) so a run takes seconds; compare runs made with the same
+settings. Caches start empty and every request uses a new location unless
+--distinct-addresses is set.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from benchmarks.fake_upstreams import DEFAULT_PROFILES, FakeUpstreams, UpstreamProfile, fake_coordinates, install
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, "results")
+ENDPOINTS = ("suggest", "travel-details")
+PERCENTILES = (50, 95, 99)
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="comma-separated: suggest,travel-details")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=100, help="requests per endpoint and concurrency level")
+    parser.add_argument("--warmup", type=int, default=5, help="untimed requests before each endpoint")
+    parser.add_argument("--latency-scale", type=float, default=0.1, help="multiplier for all fake upstream latencies")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="failure rate for every fake upstream")
+    parser.add_argument("--profile", action="append", default=[], metavar="PROVIDER:LATENCY_MS[:ERROR_RATE]",
+                        help="override one provider's median latency (before scaling) and error rate")
+    parser.add_argument("--distinct-addresses", type=int, default=0,
+                        help="cycle through this many locations per level (0: every request is new)")
+    parser.add_argument("--mode", default="llm", choices=("fast", "llm", "hybrid"), help="travel details mode")
+    parser.add_argument("--places", type=int, default=6, help="selected places per travel details request")
+    parser.add_argument("--rate-limits", action="store_true", help="keep the per-provider rate limits enabled")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", default=None, help="name of the results file (default: timestamp)")
+    parser.add_argument("--output-dir", default=RESULTS_DIR)
+    parser.add_argument("--no-save", action="store_true", help="don't write a results file")
+    parser.add_argument("--compare", default=None, metavar="RESULTS_JSON", help="earlier results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="relative throughput drop or p95 increase reported as a regression")
+    return parser.parse_args(argv)
+
+
+def _profiles(args) -> dict:
+    profiles = {}
+    for name, profile in DEFAULT_PROFILES.items():
+        profiles[name] = UpstreamProfile(profile.latency_ms, profile.sigma, args.error_rate, profile.error_status)
+    for spec in args.profile:
+        name, latency, *rest = spec.split(":")
+        if name not in profiles:
+            raise SystemExit(f"unknown provider {name!r}; expected one of {', '.join(profiles)}")
+        error_rate = float(rest[0]) if rest else profiles[name].error_rate
+        profiles[name] = UpstreamProfile(float(latency), profiles[name].sigma, error_rate, profiles[name].error_status)
+    return profiles
+
+
+def _prepare_environment(args, work_dir: str):
+    # Must run before the app is imported: settings are read at import time.
+    for key in ("GEMINI_API_KEY", "OPENCAGE_API_KEY", "PIXABAY_API_KEY", "UNSPLASH_ACCESS_KEY"):
+        os.environ[key] = "benchmark"
+    os.environ["SHARED_CACHE_PATH"] = os.path.join(work_dir, "shared.sqlite3")
+    os.environ["PLACE_CATALOG_PATH"] = os.path.join(work_dir, "places.sqlite3")
+    os.environ["CACHE_SNAPSHOT_PATH"] = os.path.join(work_dir, "snapshot.bin")
+    os.environ["PLAN_STORE_PATH"] = os.path.join(work_dir, "plans.sqlite3")
+    os.environ["IMAGE_PROXY_DIR"] = os.path.join(work_dir, "images")
+    os.environ["IMAGE_PROXY_INDEX_PATH"] = os.path.join(work_dir, "images.sqlite3")
+    os.environ.setdefault("LOG_LEVEL", "CRITICAL")
+    if not args.rate_limits:
+        for provider in DEFAULT_PROFILES:
+            os.environ[f"RATE_LIMIT_{provider.upper()}_PER_MIN"] = "0"
+
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    # Nearest-rank percentile.
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def _location(level: int, n: int, distinct: int) -> str:
+    return f"Bench City {level}-{n % distinct if distinct else n}"
+
+
+def _suggest_request(location: str):
+    return "/api/suggest", {"address": location}
+
+
+def _travel_details_request(location: str, places: int, mode: str):
+    selected = []
+    for i in range(places):
+        address = f"{i + 1} Heritage Road, {location}"
+        lat, lng = fake_coordinates(address)
+        selected.append({
+            "title": f"{location} Landmark {i + 1}", "address": address, "latitude": lat, "longitude": lng,
+            "summary": f"A well-known landmark in {location}.", "image": "https://cdn.pixabay.com/photo/bench.jpg",
+            "main_attraction": "Architecture, history and views.", "best_time_to_visit": "October to March",
+            "visiting_hours": "9:00 AM - 6:00 PM",
+        })
+    body = {"selectedPlaces": selected, "startLocation": f"Central Station, {location}", "mode": mode}
+    return "/api/get-travel-details", body
+
+
+def _make_request(endpoint: str, args):
+    if endpoint == "suggest":
+        return _suggest_request
+    return lambda location: _travel_details_request(location, args.places, args.mode)
+
+
+def _is_empty(response) -> bool:
+    # Failed suggestions still answer 200, with no places.
+    body = response.json()
+    return isinstance(body, dict) and not (body.get("places") or body.get("travelOptions"))
+
+
+async def _run_level(client, build, locations: list, concurrency: int) -> dict:
+    latencies, errors, empty = [], 0, 0
+    pending = iter(locations)
+
+    async def _worker():
+        nonlocal errors, empty
+        for location in pending:
+            path, body = build(location)
+            started = time.perf_counter()
+            try:
+                response = await client.post(path, json=body)
+                ok = response.status_code == 200
+                empty += ok and _is_empty(response)
+            except Exception:
+                ok = False
+            latencies.append((time.perf_counter() - started) * 1000)
+            errors += 0 if ok else 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_worker() for _ in range(max(1, concurrency))))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    latency = {f"p{pct}": round(_percentile(latencies, pct), 2) for pct in PERCENTILES}
+    latency["mean"] = round(sum(latencies) / len(latencies), 2) if latencies else 0.0
+    latency["max"] = round(latencies[-1], 2) if latencies else 0.0
+    return {"requests": len(latencies), "errors": errors, "empty": empty, "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0, "latency_ms": latency}
+
+
+def _upstream_delta(before: dict, after: dict) -> dict:
+    delta = {}
+    for name, stats in after.items():
+        prev = before.get(name, {"calls": 0, "errors": 0})
+        if stats["calls"] > prev["calls"]:
+            delta[name] = {"calls": stats["calls"] - prev["calls"], "errors": stats["errors"] - prev["errors"]}
+    return delta
+
+
+async def _run(args, upstreams: FakeUpstreams) -> list:
+    import httpx
+    from main import app
+    from utils.http_client import close_async_client
+
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for endpoint in endpoints:
+                if endpoint not in ENDPOINTS:
+                    raise SystemExit(f"unknown endpoint {endpoint!r}; expected one of {', '.join(ENDPOINTS)}")
+                build = _make_request(endpoint, args)
+                await _run_level(client, build, [f"Warmup {endpoint} {i}" for i in range(args.warmup)], 1)
+                for level, concurrency in enumerate(levels):
+                    # Locations are unique per level and endpoint so earlier levels don't warm the caches.
+                    locations = [f"{endpoint} " + _location(level, n, args.distinct_addresses)
+                                 for n in range(args.requests)]
+                    before = upstreams.get_stats()
+                    result = await _run_level(client, build, locations, concurrency)
+                    result.update(endpoint=endpoint, concurrency=concurrency,
+                                  upstream_calls=_upstream_delta(before, upstreams.get_stats()))
+                    results.append(result)
+                    _print_result(result)
+    finally:
+        await close_async_client()
+    return results
+
+
+def _print_header():
+    print(f"{'endpoint':<15} {'conc':>4} {'reqs':>5} {'errs':>5} {'empty':>5} {'req/s':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+
+
+def _print_result(result: dict):
+    latency = result["latency_ms"]
+    print(f"{result['endpoint']:<15} {result['concurrency']:>4} {result['requests']:>5} {result['errors']:>5} {result['empty']:>5} "
+          f"{result['throughput_rps']:>8.1f} {latency['p50']:>8.1f} {latency['p95']:>8.1f} "
+          f"{latency['p99']:>8.1f} {latency['max']:>8.1f}")
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=BENCHMARKS_DIR, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _save(args, report: dict) -> str:
+    os.makedirs(args.output_dir, exist_ok=True)
+    path = os.path.join(args.output_dir, f"{report['label']}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def _compare(baseline: dict, results: list, tolerance: float) -> int:
+    """
+    Prints throughput and p95/p99 changes against a baseline run and
+    returns how many endpoint/concurrency pairs regressed.
+    """
+    previous = {(r["endpoint"], r["concurrency"]): r for r in baseline.get("results", [])}
+    print(f"\nCompared with {baseline.get('label')} ({baseline.get('git_commit') or 'unknown commit'}):")
+    print(f"{'endpoint':<15} {'conc':>4} {'req/s':>8} {'p95':>8} {'p99':>8}")
+
+    def _change(new, old):
+        return (new - old) / old if old else 0.0
+
+    regressions = 0
+    for result in results:
+        old = previous.get((result["endpoint"], result["concurrency"]))
+        if old is None:
+            continue
+        rps = _change(result["throughput_rps"], old["throughput_rps"])
+        p95 = _change(result["latency_ms"]["p95"], old["latency_ms"]["p95"])
+        p99 = _change(result["latency_ms"]["p99"], old["latency_ms"]["p99"])
+        regressed = rps < -tolerance or p95 > tolerance
+        regressions += regressed
+        print(f"{result['endpoint']:<15} {result['concurrency']:>4} {rps:>+8.1%} {p95:>+8.1%} {p99:>+8.1%}"
+              f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    with tempfile.TemporaryDirectory(prefix="travel-bench-") as work_dir:
+        _prepare_environment(args, work_dir)
+        upstreams = FakeUpstreams(_profiles(args), latency_scale=args.latency_scale, seed=args.seed)
+        install(upstreams)
+        _print_header()
+        results = asyncio.run(_run(args, upstreams))
+
+    created = datetime.now(timezone.utc)
+    report = {
+        "label": args.label or created.strftime("%Y%m%d-%H%M%S"),
+        "created": created.isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {key: value for key, value in vars(args).items()
+                   if key not in ("label", "output_dir", "no_save", "compare")},
+        "results": results,
+    }
+    if not args.no_save:
+        print(f"\nSaved results to {_save(args, report)}")
+    if baseline is not None and _compare(baseline, results, args.tolerance):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
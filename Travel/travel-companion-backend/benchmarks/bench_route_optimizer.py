@@ -0,0 +1,64 @@
+# travel-companion-backend/benchmarks/bench_route_optimizer.py
+"""
+Benchmarks the local route optimizer for 5 to 50 stops.
+
+Run from the backend directory:
+    python -m benchmarks.bench_route_optimizer
+"""
+
+import random
+import statistics
+import time
+from utils.geo import haversine_matrix
+from utils.route_optimizer import nearest_neighbour, optimize_route, path_length
+
+STOP_COUNTS = (5, 10, 20, 30, 40, 50)
+REPEATS = 20
+# Random stops within roughly 25 km of central Mumbai.
+CENTER = (19.0760, 72.8777)
+SPREAD_DEG = 0.22
+
+
+def _random_places(n: int, rng: random.Random) -> list:
+    return [
+        {
+            "title": f"Stop {i}",
+            "latitude": CENTER[0] + rng.uniform(-SPREAD_DEG, SPREAD_DEG),
+            "longitude": CENTER[1] + rng.uniform(-SPREAD_DEG, SPREAD_DEG),
+        }
+        for i in range(n)
+    ]
+
+
+def _time_ms(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    rng = random.Random(42)
+    start = {"lat": CENTER[0], "lng": CENTER[1]}
+    print(f"{'stops':>5} {'matrix ms':>10} {'solve ms':>10} {'input km':>10} {'nn km':>10} {'opt km':>10}")
+    for n in STOP_COUNTS:
+        matrix_ms, solve_ms, input_km, nn_km, opt_km = [], [], [], [], []
+        for _ in range(REPEATS):
+            places = _random_places(n, rng)
+            points = [(start["lat"], start["lng"])] + [(p["latitude"], p["longitude"]) for p in places]
+            matrix_ms.append(_time_ms(lambda: haversine_matrix(points)))
+            dist = haversine_matrix(points).tolist()
+
+            route = {}
+            solve_ms.append(_time_ms(lambda: route.update(optimize_route(places, start))))
+            input_km.append(path_length(list(range(n + 1)), dist))
+            nn_km.append(path_length(nearest_neighbour(dist, 0, range(n + 1)), dist))
+            opt_km.append(route["total_distance_km"])
+
+        print(
+            f"{n:>5} {statistics.median(matrix_ms):>10.3f} {statistics.median(solve_ms):>10.3f} "
+            f"{statistics.mean(input_km):>10.1f} {statistics.mean(nn_km):>10.1f} {statistics.mean(opt_km):>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# travel-companion-backend/benchmarks/bench_startup.py
+"""
+Measures cold-start cost in fresh interpreters: importing main, time until
+/readyz first answers 200, and the first Gemini model creation (the provider
+SDK import that startup no longer pays).
+
+Run from the backend directory:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --repeats 10 --importtime 15
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter and prints one JSON line of timings in ms.
+_CHILD = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def _until_ready():
+    import httpx
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            status = (await client.get("/readyz")).status_code
+    return status
+
+status = asyncio.run(_until_ready())
+ready = time.perf_counter()
+
+from utils.gemini_provider import get_gemini_model
+model_started = time.perf_counter()
+get_gemini_model("bench")
+model_done = time.perf_counter()
+
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "ready_ms": (ready - started) * 1000,
+    "first_gemini_model_ms": (model_done - model_started) * 1000,
+    "readyz_status": status,
+}))
+"""
+
+METRICS = ("import_ms", "ready_ms", "first_gemini_model_ms")
+
+
+def _child_env(work_dir: str) -> dict:
+    env = dict(os.environ)
+    # Keys only need to be present: nothing here calls a provider.
+    for key in ("GEMINI_API_KEY", "OPENCAGE_API_KEY", "PIXABAY_API_KEY", "UNSPLASH_ACCESS_KEY"):
+        env[key] = "benchmark"
+    env["PLACE_CATALOG_PATH"] = os.path.join(work_dir, "places.sqlite3")
+    env["SHARED_CACHE_PATH"] = os.path.join(work_dir, "shared.sqlite3")
+    env["CACHE_SNAPSHOT_PATH"] = os.path.join(work_dir, "snapshot.bin")
+    env["LOG_LEVEL"] = "CRITICAL"
+    env["PYTHONWARNINGS"] = "ignore"
+    return env
+
+
+def _run_once(env: dict) -> dict:
+    result = subprocess.run([sys.executable, "-c", _CHILD], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _slowest_imports(env: dict, top: int) -> list:
+    """
+    Returns (cumulative ms, module) for the slowest imports of `import main`,
+    from python -X importtime.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, module = line.split("|")
+        if cumulative.strip().isdigit():
+            rows.append((int(cumulative) / 1000, module.rstrip()))
+    # Only top-level imports of main and its direct dependencies, to avoid
+    # listing the same cost once per nesting level.
+    rows = [(ms, module) for ms, module in rows if len(module) - len(module.lstrip()) <= 3]
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--importtime", type=int, default=0, metavar="N",
+                        help="also list the N slowest imports of main")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="travel-startup-") as work_dir:
+        env = _child_env(work_dir)
+        runs = [_run_once(env) for _ in range(args.repeats)]
+        slowest = _slowest_imports(env, args.importtime) if args.importtime else []
+
+    statuses = {run["readyz_status"] for run in runs}
+    print(f"{'metric':<24} {'median ms':>10} {'min ms':>10} {'max ms':>10}")
+    for metric in METRICS:
+        values = [run[metric] for run in runs]
+        print(f"{metric:<24} {statistics.median(values):>10.1f} {min(values):>10.1f} {max(values):>10.1f}")
+    print(f"/readyz status: {', '.join(str(s) for s in sorted(statuses))}")
+
+    if slowest:
+        print(f"\n{'cumulative ms':>13}  module")
+        for ms, module in slowest:
+            print(f"{ms:>13.1f}  {module}")
+
+
+if __name__ == "__main__":
+    main()
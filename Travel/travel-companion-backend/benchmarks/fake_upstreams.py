@@ -0,0 +1,295 @@
+# travel-companion-backend/benchmarks/fake_upstreams.py
+"""
+Local stand-ins for every upstream API the backend calls, for offline
+benchmarks: Gemini (suggestions, travel plans and itinerary details,
+streamed or not), Pixabay, Unsplash, OpenCage, Wikipedia and the image
+CDNs behind their URLs.
+
+HTTP providers are served by an httpx transport plugged into the shared
+client (utils.http_client.set_transport); Gemini models come from a fake
+factory (utils.gemini_provider.set_gemini_model_factory). Each provider
+answers in its real response shape after a random latency, and fails at a
+configurable rate.
+
+Only the async code paths used by the API endpoints go through the shared
+client; the legacy synchronous helpers still use `requests` and are not faked.
+"""
+
+import io
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+from dataclasses import dataclass, replace
+from types import SimpleNamespace
+import httpx
+from google.api_core import exceptions as google_exceptions
+
+
+@dataclass(frozen=True)
+class UpstreamProfile:
+    """
+    Latency and error behaviour of one fake provider. Latencies are
+    log-normal around `latency_ms` (the median); `sigma` sets the tail.
+    """
+    latency_ms: float
+    sigma: float = 0.35
+    error_rate: float = 0.0
+    error_status: int = 503
+
+
+# Medians roughly as observed against the real providers from a cloud VM.
+DEFAULT_PROFILES = {
+    "gemini": UpstreamProfile(1800, sigma=0.4),
+    "opencage": UpstreamProfile(120),
+    "pixabay": UpstreamProfile(150),
+    "unsplash": UpstreamProfile(250),
+    "wikipedia": UpstreamProfile(180),
+    "images": UpstreamProfile(200),
+}
+
+PROVIDER_HOSTS = {
+    "pixabay.com": "pixabay",
+    "api.unsplash.com": "unsplash",
+    "api.opencagedata.com": "opencage",
+    "en.wikipedia.org": "wikipedia",
+    "cdn.pixabay.com": "images",
+    "images.unsplash.com": "images",
+    "upload.wikimedia.org": "images",
+}
+# Size of the photo every fake image URL returns (a typical webformatURL).
+FAKE_IMAGE_SIZE = (1280, 853)
+
+# Streamed Gemini responses arrive in chunks of about this many characters;
+# the first chunk takes this share of the total latency.
+STREAM_CHUNK_CHARS = 120
+STREAM_FIRST_CHUNK_SHARE = 0.4
+
+_LOCATION_RE = re.compile(r"^Location: (.+)$", re.MULTILINE)
+_ITEM_COUNT_RE = re.compile(r"^Itinerary \((\d+) items\):$", re.MULTILINE)
+_PLACE_LINE_RE = re.compile(r"^\d+\. (.+?)(?: @[-\d.,]+)?(?: \|.*)?$")
+
+
+def _stable_unit(text: str) -> float:
+    # Deterministic value in [0, 1) for a string, so repeated lookups agree.
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "big") / 2 ** 64
+
+
+def fake_coordinates(address: str) -> tuple:
+    """
+    Places every address within ~5 km of a point derived from its last
+    comma-separated part (the city), so places of one location cluster.
+    """
+    city = address.rsplit(",", 1)[-1].strip().casefold()
+    lat = -50 + 100 * _stable_unit("lat:" + city)
+    lng = -170 + 340 * _stable_unit("lng:" + city)
+    if city != address.strip().casefold():
+        lat += (_stable_unit("dlat:" + address) - 0.5) * 0.09
+        lng += (_stable_unit("dlng:" + address) - 0.5) * 0.09
+    return round(lat, 6), round(lng, 6)
+
+
+def _format_time(minutes: int) -> str:
+    hours, mins = divmod(minutes, 60)
+    return f"{(hours - 1) % 12 + 1}:{mins:02d} {'AM' if hours < 12 else 'PM'}"
+
+
+class FakeUpstreams:
+    """
+    Fake upstream providers with per-provider latency/error profiles and
+    call counters. `handle` is an httpx transport handler; `model_class()`
+    returns a stand-in for genai.GenerativeModel.
+    """
+
+    def __init__(self, profiles: dict | None = None, latency_scale: float = 1.0, seed: int = 0):
+        self.profiles = dict(DEFAULT_PROFILES)
+        self.profiles.update(profiles or {})
+        if latency_scale != 1.0:
+            self.profiles = {name: replace(p, latency_ms=p.latency_ms * latency_scale)
+                             for name, p in self.profiles.items()}
+        self._rng = random.Random(seed)
+        self._image = None
+        self.stats = {name: {"calls": 0, "errors": 0} for name in self.profiles}
+
+    def _latency(self, provider: str) -> float:
+        profile = self.profiles[provider]
+        if profile.latency_ms <= 0:
+            return 0.0
+        return profile.latency_ms / 1000 * math.exp(self._rng.gauss(0, profile.sigma))
+
+    def _should_fail(self, provider: str) -> bool:
+        self.stats[provider]["calls"] += 1
+        if self._rng.random() < self.profiles[provider].error_rate:
+            self.stats[provider]["errors"] += 1
+            return True
+        return False
+
+    # --- HTTP providers ---
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        provider = PROVIDER_HOSTS.get(request.url.host)
+        if provider is None:
+            return httpx.Response(404, json={"error": f"no fake for {request.url.host}"})
+        await asyncio.sleep(self._latency(provider))
+        if self._should_fail(provider):
+            return httpx.Response(self.profiles[provider].error_status, json={"error": "injected failure"})
+        if provider == "images":
+            return httpx.Response(200, content=self._image_bytes(), headers={"content-type": "image/jpeg"})
+        return httpx.Response(200, json=getattr(self, f"_{provider}_data")(request.url.params))
+
+    def _image_bytes(self) -> bytes:
+        if self._image is None:
+            from PIL import Image
+
+            # A gradient, so the encoders have some detail to work on.
+            width, height = FAKE_IMAGE_SIZE
+            image = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+            out = io.BytesIO()
+            image.save(out, "JPEG", quality=90)
+            self._image = out.getvalue()
+        return self._image
+
+    def _pixabay_data(self, params) -> dict:
+        slug = params.get("q", "").replace(" ", "-").casefold()
+        return {"total": 1, "totalHits": 1,
+                "hits": [{"id": 1, "webformatURL": f"https://cdn.pixabay.com/photo/bench/{slug}_640.jpg"}]}
+
+    def _unsplash_data(self, params) -> dict:
+        slug = params.get("query", "").replace(" ", "-").casefold()
+        return {"total": 1, "results": [{"id": slug, "urls": {"regular": f"https://images.unsplash.com/bench-{slug}"}}]}
+
+    def _opencage_data(self, params) -> dict:
+        lat, lng = fake_coordinates(params.get("q", ""))
+        return {"status": {"code": 200, "message": "OK"}, "total_results": 1,
+                "results": [{"confidence": 9, "geometry": {"lat": lat, "lng": lng}}]}
+
+    def _wikipedia_data(self, params) -> dict:
+        lat, lng = (float(v) for v in params.get("ggscoord", "0|0").split("|"))
+        limit = int(params.get("ggslimit", 10))
+        pages = []
+        for i in range(limit):
+            pages.append({
+                "pageid": int(_stable_unit(f"{lat:.3f},{lng:.3f}") * 1e8) + i,
+                "title": f"Bench Heritage Site {i + 1} ({lat:.2f}, {lng:.2f})",
+                "description": "Historic site",
+                "thumbnail": {"source": f"https://upload.wikimedia.org/bench/{i}.jpg"},
+                "coordinates": [{"lat": lat + (i - limit / 2) * 0.004, "lon": lng + (i % 3) * 0.003}],
+            })
+        return {"batchcomplete": True, "query": {"pages": pages}}
+
+    # --- Gemini ---
+
+    def _gemini_text(self, prompt: str) -> str:
+        location = _LOCATION_RE.search(prompt)
+        if location:
+            return "```json\n" + json.dumps(self._suggested_places(location.group(1).strip())) + "\n```"
+        item_count = _ITEM_COUNT_RE.search(prompt)
+        if item_count:
+            return json.dumps({"details": [f"Tip {i + 1}: go early and carry water."
+                                           for i in range(int(item_count.group(1)))]})
+        if "Places:\n" in prompt:
+            return json.dumps({"travelOptions": self._travel_options(prompt)})
+        return "{}"
+
+    def _suggested_places(self, location: str) -> list:
+        places = []
+        for i in range(6):
+            title = f"{location} Landmark {chr(ord('A') + i)}"
+            tool = "search_unsplash_image" if i == 5 else "search_pixabay_image"
+            places.append({
+                "title": title,
+                "summary": f"A well-known landmark in {location}.",
+                "main_attraction": "Architecture, history and views.",
+                "best_time_to_visit": "October to March; mornings.",
+                "visiting_hours": "9:00 AM - 6:00 PM, closed Mondays.",
+                "address": f"{i + 1} Heritage Road, {location}",
+                "image": {"call": {"function": tool, "args": {"query": title}}},
+            })
+        return places
+
+    def _travel_options(self, prompt: str) -> list:
+        section = prompt.split("Places:\n", 1)[1].split("\n\n", 1)[0]
+        titles = [m.group(1) for m in map(_PLACE_LINE_RE.match, section.splitlines()) if m]
+        options, clock, previous = [], 9 * 60, "Starting location"
+        for i, title in enumerate(titles):
+            for kind, activity, location, minutes in (
+                ("travel", f"Travel to {title}", f"{previous} to {title}", 30),
+                ("attraction", f"Visit {title}", title, 90),
+            ):
+                options.append({"time_slot": f"{_format_time(clock)} - {_format_time(clock + minutes)}",
+                                "activity": activity, "location": location,
+                                "details": "Plan ahead.", "type": kind})
+                clock += minutes
+            previous = title
+            if i == (len(titles) - 1) // 2:
+                options.append({"time_slot": f"{_format_time(clock)} - {_format_time(clock + 60)}",
+                                "activity": "Lunch", "location": f"Near {title}",
+                                "details": "Try local food.", "type": "meal"})
+                clock += 60
+        return options
+
+    def _gemini_response(self, prompt: str, text: str):
+        part = SimpleNamespace(text=text)
+        usage = SimpleNamespace(prompt_token_count=len(prompt) // 4, candidates_token_count=len(text) // 4)
+        return SimpleNamespace(parts=[part], text=text, usage_metadata=usage)
+
+    async def _gemini_stream(self, prompt: str, text: str, latency: float):
+        pieces = [text[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(text), STREAM_CHUNK_CHARS)] or [""]
+        rest = latency * (1 - STREAM_FIRST_CHUNK_SHARE) / max(1, len(pieces) - 1)
+        for i, piece in enumerate(pieces):
+            if i:
+                await asyncio.sleep(rest)
+            chunk = SimpleNamespace(parts=[SimpleNamespace(text=piece)], usage_metadata=None)
+            if i == len(pieces) - 1:
+                chunk = self._gemini_response(prompt, piece)
+                chunk.usage_metadata.candidates_token_count = len(text) // 4
+            yield chunk
+
+    async def generate_content_async(self, prompt: str, stream: bool = False):
+        latency = self._latency("gemini")
+        await asyncio.sleep(latency * (STREAM_FIRST_CHUNK_SHARE if stream else 1))
+        if self._should_fail("gemini"):
+            raise google_exceptions.ServiceUnavailable("injected failure")
+        text = self._gemini_text(prompt)
+        if stream:
+            return self._gemini_stream(prompt, text, latency)
+        return self._gemini_response(prompt, text)
+
+    def generate_content(self, prompt: str):
+        time.sleep(self._latency("gemini"))
+        if self._should_fail("gemini"):
+            raise google_exceptions.ServiceUnavailable("injected failure")
+        return self._gemini_response(prompt, self._gemini_text(prompt))
+
+    def model_class(self):
+        upstreams = self
+
+        class FakeGenerativeModel:
+            def __init__(self, model_name: str = "", **kwargs):
+                self.model_name = model_name
+
+            async def generate_content_async(self, prompt, stream: bool = False, **kwargs):
+                return await upstreams.generate_content_async(prompt, stream=stream)
+
+            def generate_content(self, prompt, **kwargs):
+                return upstreams.generate_content(prompt)
+
+        return FakeGenerativeModel
+
+    def get_stats(self) -> dict:
+        return {name: dict(s) for name, s in self.stats.items() if s["calls"]}
+
+
+def install(upstreams: FakeUpstreams):
+    """
+    Routes the backend's upstream calls to `upstreams`. Call before the
+    first request is served.
+    """
+    from utils.gemini_provider import set_gemini_model_factory
+    from utils.http_client import set_transport
+
+    set_transport(httpx.MockTransport(upstreams.handle))
+    set_gemini_model_factory(upstreams.model_class())
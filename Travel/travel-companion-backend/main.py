@@ -1,71 +1,82 @@
 # travel-companion-backend/main.py
 
-from fastapi import FastAPI, HTTPException
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from utils.gemini_client import suggest_tourist_places
-from utils.gemini_travel_planner import get_gemini_travel_details
+from fastapi.middleware.gzip import GZipMiddleware
+from routes import images, ops, suggest, travel
+from routes.guards import EXCEPTION_HANDLERS
+from routes.http_cache import GZIP_LEVEL, GZIP_MIN_BYTES
+from utils.cache_snapshot import load_snapshot
+from utils.deadline import DeadlineMiddleware
+from utils.http_client import close_async_client
+from utils.place_catalog import get_place_catalog
+from utils.log import get_logger
+from utils.request_metrics import RequestMetricsMiddleware
+from utils.settings import Settings, get_settings
 
-app = FastAPI()
+logger = get_logger("api")
 
-# Configure CORS
-origins = [
-    "http://localhost:3000",
-    "http://43.204.171.199:3000",
-]
+# Every router the API serves; registered in create_app.
+ROUTERS = (suggest.router, travel.router, images.router, ops.router)
 
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    get_place_catalog().load()
+    # Popular destinations precomputed by `python -m warm_cache`.
+    snapshot = load_snapshot()
+    app.state.ready = True
+    logger.info("Startup complete", ms=round((time.perf_counter() - started) * 1000, 1),
+                missing_providers=app.state.settings.missing_providers(), snapshot=snapshot)
+    yield
+    app.state.ready = False
+    await close_async_client()
 
-# Pydantic model for the /api/suggest endpoint (existing)
-class SuggestRequest(BaseModel):
-    address: str
 
-# Pydantic model for the new /api/get-travel-details endpoint
-class PlaceCoords(BaseModel):
-    title: str
-    address: str
-    latitude: float | None
-    longitude: float | None
-    summary: str
-    image: str
-    main_attraction: str
-    best_time_to_visit: str
-    visiting_hours: str
-    wiki: str | None = None
+def create_app(settings: Settings | None = None) -> FastAPI:
+    """
+    Builds the API: settings are read once and kept on app.state, and
+    provider clients (Gemini, HTTP pools) are created lazily on first use,
+    so building the app is cheap and never fails on a missing API key.
+    /readyz reports whether the app can serve traffic.
 
-class TravelDetailsRequest(BaseModel):
-    selectedPlaces: list[PlaceCoords]
-    startLocation: str
+    Requests to the planning endpoints carry an end-to-end deadline
+    (DeadlineMiddleware), and those that may call Gemini pass an admission
+    gate that answers 503 with Retry-After when the backlog is full.
 
-@app.post("/api/suggest")
-async def suggest_places(req: SuggestRequest):
-    print(f"Received request for address: {req.address}")
-    places = suggest_tourist_places(req.address)
-    print(f"Sending {len(places)} places to frontend.")
-    return {"places": places}
+    Responses over GZIP_MIN_BYTES are gzip-compressed for clients that accept
+    it, and JSON answers carry content-hash ETags (routes.http_cache).
+    """
+    app = FastAPI(lifespan=lifespan)
+    app.state.settings = settings or get_settings()
+    app.state.ready = False
 
-# --- Endpoint for Travel Details, powered by Gemini ---
-@app.post("/api/get-travel-details")
-async def get_travel_details(req: TravelDetailsRequest):
-    selected_places_data = [p.dict() for p in req.selectedPlaces]
-    print(f"Received request for travel details for {len(selected_places_data)} places from starting point: {req.startLocation}.")
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=list(app.state.settings.cors_origins),
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Request-ID", "ETag"],
+    )
+    # NDJSON streams are compressed chunk by chunk (each one is flushed);
+    # SSE and images are left alone.
+    app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_BYTES, compresslevel=GZIP_LEVEL)
+    app.add_middleware(DeadlineMiddleware)
+    app.add_middleware(RequestMetricsMiddleware)
+    for exc_class, handler in EXCEPTION_HANDLERS.items():
+        app.add_exception_handler(exc_class, handler)
 
-    # Call the new Gemini-based travel planner with the start_location
-    travel_plan = get_gemini_travel_details(selected_places_data, req.startLocation)
+    for router in ROUTERS:
+        app.include_router(router)
+    return app
 
-    if "error" in travel_plan:
-        raise HTTPException(status_code=500, detail=travel_plan["error"])
-    
-    print("Travel plan generated by Gemini:", travel_plan)
-    return travel_plan
+
+app = create_app()
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8086, reload=True)
+    uvicorn.run("main:app", host="0.0.0.0", port=8086, reload=True)
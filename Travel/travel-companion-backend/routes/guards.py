@@ -0,0 +1,58 @@
+# travel-companion-backend/routes/guards.py
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+from utils.admission import AdmissionSlot, Overloaded, get_admission_gate
+from utils.deadline import ClientDisconnected, DeadlineExceeded, run_until_disconnect
+from utils.log import get_logger
+
+logger = get_logger("api")
+
+# Non-standard status (as used by nginx) logged for requests whose client
+# disconnected before the response; nobody receives it.
+CLIENT_CLOSED_REQUEST = 499
+
+
+async def run_admitted(request: Request, gate: str | None, func, *args):
+    """
+    Runs `func(*args)` for a non-streaming endpoint behind admission gate
+    `gate` (None to skip it), cancelling the work if the client disconnects.
+
+    Raises:
+        Overloaded: If the gate turned the request away.
+    """
+    if gate is None:
+        return await run_until_disconnect(request, func(*args))
+    async with get_admission_gate(gate).admit():
+        return await run_until_disconnect(request, func(*args))
+
+
+async def admit_stream(gate: str | None) -> AdmissionSlot | None:
+    """
+    Takes a slot for a streaming endpoint before the response starts, so an
+    overloaded gate can still answer 503. Pass it to event_stream_response.
+    """
+    return await get_admission_gate(gate).acquire() if gate else None
+
+
+async def overloaded_handler(request: Request, exc: Overloaded):
+    logger.warning("Request rejected by admission control", gate=exc.gate, reason=exc.reason,
+                   retry_after=exc.retry_after)
+    return JSONResponse({"detail": "Server is busy, please retry shortly.", "retryAfter": exc.retry_after},
+                        status_code=503, headers={"Retry-After": str(exc.retry_after)})
+
+
+async def deadline_handler(request: Request, exc: DeadlineExceeded):
+    return JSONResponse({"detail": "The request took too long to complete."}, status_code=504)
+
+
+async def disconnected_handler(request: Request, exc: ClientDisconnected):
+    logger.info("Client disconnected; request cancelled", path=request.url.path)
+    return Response(status_code=CLIENT_CLOSED_REQUEST)
+
+
+EXCEPTION_HANDLERS = {
+    Overloaded: overloaded_handler,
+    DeadlineExceeded: deadline_handler,
+    ClientDisconnected: disconnected_handler,
+}
@@ -0,0 +1,60 @@
+# travel-companion-backend/routes/http_cache.py
+
+import os
+import json
+import hashlib
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+from utils.settings import load_env
+
+load_env()
+
+# Responses smaller than this are sent uncompressed: below about a kilobyte
+# gzip saves little and costs a round of CPU per request.
+GZIP_MIN_BYTES = int(os.getenv("GZIP_MIN_BYTES", "1000"))
+# zlib level 1-9; 6 gets most of level 9's ratio on JSON for far less CPU.
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+# How long browsers may reuse a GET /api/suggest response before revalidating
+# it with If-None-Match (answered 304 when the places haven't changed).
+SUGGEST_MAX_AGE_S = int(os.getenv("SUGGEST_MAX_AGE_S", "300"))
+
+_CONDITIONAL_METHODS = ("GET", "HEAD")
+
+
+def content_etag(body: bytes) -> str:
+    """
+    ETag derived from the response body. It is weak because the same tag is
+    sent for the gzip and identity encodings of the body.
+    """
+    return f'W/"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    True if the request's If-None-Match lists `etag` (weak comparison).
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def etag_json_response(request: Request, content, cache_control: str | None = None) -> Response:
+    """
+    Serializes `content` like FastAPI's JSONResponse and tags it with a
+    content hash. GET and HEAD requests whose If-None-Match already has that
+    hash get an empty 304 instead of the body.
+    """
+    body = json.dumps(jsonable_encoder(content), ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":")).encode("utf-8")
+    etag = content_etag(body)
+    headers = {"ETag": etag}
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    if request.method in _CONDITIONAL_METHODS and etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
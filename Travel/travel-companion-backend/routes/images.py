@@ -0,0 +1,48 @@
+# travel-companion-backend/routes/images.py
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, Response
+from routes.http_cache import etag_matches
+from utils.image_proxy import (
+    IMAGE_CACHE_CONTROL,
+    IMAGE_FORMATS,
+    IMAGE_VARIANTS,
+    ImageFetchError,
+    UnknownImage,
+    get_image_proxy,
+)
+
+router = APIRouter()
+
+
+def _negotiate_format(request: Request, ext: str) -> str:
+    if ext:
+        return ext
+    return "webp" if "image/webp" in request.headers.get("accept", "") else "jpg"
+
+
+# Serves a resized copy of a place image: /api/images/<id>/card picks WebP or
+# JPEG from the Accept header, /api/images/<id>/card.jpg asks for one. The
+# files are content-addressed, so they are cached by browsers for a year.
+@router.get("/api/images/{image_id}/{variant}")
+async def get_image(image_id: str, variant: str, request: Request):
+    name, _, ext = variant.partition(".")
+    fmt = _negotiate_format(request, ext)
+    if name not in IMAGE_VARIANTS or fmt not in IMAGE_FORMATS:
+        raise HTTPException(status_code=404, detail="Unknown image variant")
+
+    try:
+        stored = await get_image_proxy().get_variant(image_id, name, fmt)
+    except UnknownImage:
+        raise HTTPException(status_code=404, detail="Unknown image")
+    except ImageFetchError:
+        raise HTTPException(status_code=502, detail="Image could not be fetched")
+
+    etag = f'"{stored.digest}"'
+    headers = {"ETag": etag, "Cache-Control": IMAGE_CACHE_CONTROL}
+    if not ext:
+        headers["Vary"] = "Accept"
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    # FileResponse streams the file from disk in chunks instead of loading it.
+    return FileResponse(stored.path, media_type=stored.content_type, headers=headers)
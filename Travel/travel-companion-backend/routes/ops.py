@@ -0,0 +1,38 @@
+# travel-companion-backend/routes/ops.py
+
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from utils.metrics import render_metrics
+
+router = APIRouter()
+
+
+# Prometheus text exposition of request, upstream, stage, cache and token metrics.
+@router.get("/metrics")
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+# Liveness: the process is up and serving requests.
+@router.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+
+# Readiness: startup has finished and every required provider has an API key.
+# Answers 503 otherwise, so load balancers hold traffic back.
+@router.get("/readyz")
+async def readyz(request: Request):
+    state = request.app.state
+    settings = state.settings
+    missing = settings.missing_providers()
+    started = getattr(state, "ready", False)
+    ready = started and not missing
+    body = {
+        "status": "ready" if ready else "not_ready",
+        "started": started,
+        "providers": settings.configured_providers(),
+    }
+    if missing:
+        body["missingProviders"] = missing
+    return JSONResponse(body, status_code=200 if ready else 503)
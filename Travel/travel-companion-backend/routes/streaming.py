@@ -0,0 +1,28 @@
+# travel-companion-backend/routes/streaming.py
+
+import json
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from utils.admission import AdmissionSlot, hold_during
+
+
+def stream_event(event: str, data: dict, sse: bool) -> str:
+    payload = json.dumps({"event": event, **data})
+    return f"event: {event}\ndata: {payload}\n\n" if sse else payload + "\n"
+
+
+def wants_sse(request: Request, format: str | None) -> bool:
+    return format == "sse" or (format is None and "text/event-stream" in request.headers.get("accept", ""))
+
+
+def event_stream_response(events, sse: bool, slot: AdmissionSlot | None = None) -> StreamingResponse:
+    media_type = "text/event-stream" if sse else "application/x-ndjson"
+    background = None
+    if slot is not None:
+        # The admission slot is held for the whole stream. The background task
+        # also frees it if the stream never started (client gone early).
+        events = hold_during(events, slot)
+        background = BackgroundTask(slot.release)
+    return StreamingResponse(events, media_type=media_type, background=background,
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -1,15 +1,167 @@
-from fastapi import APIRouter
+# travel-companion-backend/routes/suggest.py
+
+import time
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
-from utils.gemini_client import suggest_tourist_places
+from routes.guards import admit_stream, run_admitted
+from routes.http_cache import SUGGEST_MAX_AGE_S, etag_json_response
+from routes.streaming import event_stream_response, stream_event, wants_sse
+from utils.gemini_client import SuggestionError, suggest_tourist_places_async, stream_tourist_places
+from utils.suggestion_cache import get_suggestion_cache
+from utils.image_proxy import get_image_proxy
+from utils.place_catalog import get_place_catalog
+from utils.deadline import REQUEST_DEADLINE_S, reset_deadline, set_deadline
+from utils.suggest_batch import SUGGEST_BATCH_CONCURRENCY, SUGGEST_BATCH_MAX_ADDRESSES, run_suggestion_batch
+from utils.log import get_logger
+from utils.metrics import STAGE_SECONDS
 
 router = APIRouter()
+logger = get_logger("api")
+
 
-class LocationRequest(BaseModel):
+class SuggestRequest(BaseModel):
     address: str
 
+
+class SuggestBatchRequest(BaseModel):
+    addresses: list[str]
+    concurrency: int | None = None
+
+
+async def _suggest_from_catalog_or_gemini(address: str) -> list:
+    # Well-covered areas are answered from the place catalog; otherwise Gemini
+    # is asked and its places are added to the catalog.
+    catalog = get_place_catalog()
+    with STAGE_SECONDS.time(stage="catalog_lookup"):
+        places = await catalog.lookup_location_async(address)
+    if places is not None:
+        logger.info("Answered from the place catalog", address=address, count=len(places))
+        return places
+    with STAGE_SECONDS.time(stage="suggest_gemini"):
+        places = await suggest_tourist_places_async(address, raise_errors=True)
+    catalog.add_places(places)
+    return places
+
+
+def _gemini_gate(address: str) -> str | None:
+    # Cached locations never reach Gemini, so they skip admission control.
+    return None if get_suggestion_cache().has(address) else "gemini"
+
+
+async def _suggest(address: str) -> list:
+    # Served from the suggestion cache; concurrent requests for the same
+    # location share a single upstream computation.
+    try:
+        return await get_suggestion_cache().get_or_compute(address, _suggest_from_catalog_or_gemini)
+    except SuggestionError:
+        return []
+
+
+async def _suggest_response(address: str, request: Request, max_age: int | None = None):
+    logger.info("Suggest request", address=address, method=request.method)
+    places = await run_admitted(request, _gemini_gate(address), _suggest, address)
+    # Images are served through the proxy; caches keep the source URLs.
+    places = get_image_proxy().rewrite_places(places, str(request.base_url))
+    logger.info("Suggest response", address=address, count=len(places))
+    cache_control = None
+    if max_age is not None:
+        # An empty list means the lookup failed; it mustn't be reused.
+        cache_control = f"public, max-age={max_age}" if places else "no-store"
+    return etag_json_response(request, {"places": places}, cache_control)
+
+
 @router.post("/api/suggest")
-async def suggest_places(req: LocationRequest):
-    print("Received address:", req.address)
-    places = suggest_tourist_places(req.address)
-    print("Places returned:", places)
-    return {"places": places}
+async def suggest_places(req: SuggestRequest, request: Request):
+    return await _suggest_response(req.address, request)
+
+
+# Cacheable form of POST /api/suggest: browsers keep the response for
+# SUGGEST_MAX_AGE_S, then revalidate it with If-None-Match and get a 304
+# while the cached places for the address are unchanged.
+@router.get("/api/suggest")
+async def suggest_places_get(address: str, request: Request):
+    if not address.strip():
+        raise HTTPException(status_code=400, detail="address must not be empty")
+    return await _suggest_response(address, request, SUGGEST_MAX_AGE_S)
+
+
+async def _suggestion_events(address: str, sse: bool, base_url: str):
+    cache = get_suggestion_cache()
+    catalog = get_place_catalog()
+    proxy = get_image_proxy()
+    cached = cache.peek(address, _suggest_from_catalog_or_gemini)
+    places = cached or await catalog.lookup_location_async(address) or []
+    persist = not cached
+    if places:
+        for place in proxy.rewrite_places(places, base_url):
+            yield stream_event("place", {"place": place}, sse)
+    else:
+        try:
+            async for place in stream_tourist_places(address):
+                places.append(place)
+                yield stream_event("place", {"place": proxy.rewrite_places([place], base_url)[0]}, sse)
+        except SuggestionError as e:
+            # The client keeps what arrived; caches only keep complete answers.
+            persist = False
+            logger.warning("Suggest stream incomplete; not caching it", address=address, error=str(e))
+        if persist:
+            catalog.add_places(places)
+    if persist:
+        cache.put(address, places)
+    logger.info("Suggest stream finished", address=address, count=len(places))
+    yield stream_event("done", {"count": len(places)}, sse)
+
+
+# Streams places as NDJSON lines (default) or Server-Sent Events, one per
+# enriched place, followed by a final "done" event.
+@router.post("/api/suggest/stream")
+async def suggest_places_stream(req: SuggestRequest, request: Request, format: str | None = None):
+    logger.info("Suggest stream request", address=req.address)
+    sse = wants_sse(request, format)
+    slot = await admit_stream(_gemini_gate(req.address))
+    return event_stream_response(_suggestion_events(req.address, sse, str(request.base_url)), sse, slot)
+
+
+async def _batch_events(req: SuggestBatchRequest, sse: bool, base_url: str):
+    started = time.monotonic()
+    total = len(req.addresses)
+    completed = failed = 0
+    concurrency = min(req.concurrency or SUGGEST_BATCH_CONCURRENCY, SUGGEST_BATCH_CONCURRENCY)
+    cache = get_suggestion_cache()
+
+    async def _compute(address: str) -> list:
+        # Each address gets the deadline of a single suggest request, starting
+        # when its turn comes; the batch as a whole has none.
+        token = set_deadline(REQUEST_DEADLINE_S)
+        try:
+            return await cache.get_or_compute(address, _suggest_from_catalog_or_gemini)
+        finally:
+            reset_deadline(token)
+
+    async for index, address, places, error in run_suggestion_batch(req.addresses, _compute, concurrency):
+        completed += 1
+        progress = {"index": index, "address": address, "completed": completed, "total": total}
+        if error is None:
+            places = get_image_proxy().rewrite_places(places, base_url)
+            yield stream_event("result", {**progress, "count": len(places), "places": places}, sse)
+        else:
+            failed += 1
+            logger.warning("Batch suggestion failed", address=address, error=error)
+            yield stream_event("error", {**progress, "error": error}, sse)
+    yield stream_event("done", {"total": total, "succeeded": total - failed, "failed": failed,
+                                "elapsedMs": round((time.monotonic() - started) * 1000)}, sse)
+
+
+# Suggests places for many addresses, streaming one "result" or "error" event
+# per address as it completes (with completed/total progress), then "done".
+@router.post("/api/suggest/batch")
+async def suggest_places_batch(req: SuggestBatchRequest, request: Request, format: str | None = None):
+    if not req.addresses:
+        raise HTTPException(status_code=400, detail="addresses must not be empty")
+    if len(req.addresses) > SUGGEST_BATCH_MAX_ADDRESSES:
+        raise HTTPException(status_code=400, detail=f"at most {SUGGEST_BATCH_MAX_ADDRESSES} addresses per batch")
+    logger.info("Batch suggest request", addresses=len(req.addresses))
+    sse = wants_sse(request, format)
+    # The whole batch holds one slot; its own concurrency limit bounds its Gemini calls.
+    slot = await admit_stream("gemini")
+    return event_stream_response(_batch_events(req, sse, str(request.base_url)), sse, slot)
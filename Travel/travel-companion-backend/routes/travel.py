@@ -0,0 +1,149 @@
+# travel-companion-backend/routes/travel.py
+
+from typing import Annotated, Literal
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import BaseModel, Field
+from routes.guards import admit_stream, run_admitted
+from routes.http_cache import etag_json_response
+from routes.streaming import event_stream_response, stream_event, wants_sse
+from utils.itinerary_editor import PlanEditError, edit_plan, needs_llm, new_plan_state, plan_response
+from utils.itinerary_planner import TRIP_MAX_DAYS, day_budgets, plan_itinerary_with_routes, stream_itinerary
+from utils.plan_store import get_plan_store
+from utils.log import get_logger
+
+router = APIRouter()
+logger = get_logger("api")
+
+
+class PlaceCoords(BaseModel):
+    title: str
+    address: str
+    latitude: float | None
+    longitude: float | None
+    summary: str
+    image: str
+    main_attraction: str
+    best_time_to_visit: str
+    visiting_hours: str
+    wiki: str | None = None
+
+
+class TravelDetailsRequest(BaseModel):
+    selectedPlaces: list[PlaceCoords]
+    startLocation: str
+    # "fast": local schedule only, "llm": Gemini plans the day (current behaviour),
+    # "hybrid": local schedule with Gemini-written details. All fall back to the
+    # local schedule if Gemini fails or times out.
+    mode: Literal["fast", "llm", "hybrid"] = "llm"
+    # Multi-day trips: places are grouped into `days` nearby clusters balanced
+    # against each day's time budget in minutes (one value for every day, or
+    # one per day), and each day is planned separately.
+    days: int = Field(1, ge=1, le=TRIP_MAX_DAYS)
+    dailyMinutes: list[Annotated[int, Field(ge=60, le=24 * 60)]] | None = None
+
+
+def _gemini_gate(req: TravelDetailsRequest) -> str | None:
+    # "fast" plans are built locally and skip admission control.
+    return None if req.mode == "fast" else "gemini"
+
+
+# --- Endpoint for Travel Details, powered by Gemini ---
+@router.post("/api/get-travel-details")
+async def get_travel_details(req: TravelDetailsRequest, request: Request):
+    selected_places_data = [p.dict() for p in req.selectedPlaces]
+    logger.info("Travel details request", places=len(selected_places_data), start=req.startLocation, mode=req.mode,
+                days=req.days)
+
+    travel_plan, routes = await run_admitted(request, _gemini_gate(req), plan_itinerary_with_routes,
+                                             selected_places_data, req.startLocation, req.mode, req.days,
+                                             req.dailyMinutes)
+
+    if "error" in travel_plan:
+        raise HTTPException(status_code=500, detail=travel_plan["error"])
+
+    # Stored so that edits can be made with PATCH /api/plans/{planId}.
+    state = new_plan_state(travel_plan, routes, req.startLocation, req.mode, day_budgets(req.days, req.dailyMinutes))
+    plan_id, version = get_plan_store().create(state)
+    travel_plan = {**travel_plan, "planId": plan_id, "version": version}
+
+    # Only a summary: the full plan is large and logging it on every request is costly.
+    logger.info("Travel plan generated", source=travel_plan.get("source"),
+                items=len(travel_plan.get("travelOptions") or []), fallback=travel_plan.get("fallbackReason"))
+    return etag_json_response(request, travel_plan)
+
+
+async def _travel_plan_events(req: TravelDetailsRequest, sse: bool):
+    selected_places_data = [p.dict() for p in req.selectedPlaces]
+    async for event, data in stream_itinerary(selected_places_data, req.startLocation, req.mode, req.days,
+                                              req.dailyMinutes):
+        yield stream_event(event, data, sse)
+
+
+# Streams the itinerary as NDJSON lines (default) or Server-Sent Events: one
+# "item" event per travelOptions entry as soon as Gemini has written it, then "done"
+# (multi-day trips also send a "day" event as each day is finished).
+@router.post("/api/get-travel-details/stream")
+async def get_travel_details_stream(req: TravelDetailsRequest, request: Request, format: str | None = None):
+    logger.info("Travel details stream request", places=len(req.selectedPlaces), start=req.startLocation, mode=req.mode,
+                days=req.days)
+    sse = wants_sse(request, format)
+    slot = await admit_stream(_gemini_gate(req))
+    return event_stream_response(_travel_plan_events(req, sse), sse, slot)
+
+
+class PlanOperation(BaseModel):
+    op: Literal["add", "remove", "reorder"]
+    day: int = Field(1, ge=1, le=TRIP_MAX_DAYS)
+    # add: the new place, inserted at `position` (0 = first stop) or, without
+    # one, where it adds the least travel time.
+    place: PlaceCoords | None = None
+    position: int | None = Field(None, ge=0)
+    # remove: the title of the place to drop.
+    title: str | None = None
+    # reorder: every title of the day, in the new order.
+    titles: list[str] | None = None
+
+
+class PlanPatchRequest(BaseModel):
+    ops: list[PlanOperation] = Field(min_length=1, max_length=50)
+    # The version the edits were made against; a newer stored plan answers 409.
+    version: int | None = None
+
+
+def _stored_plan(plan_id: str) -> tuple:
+    stored = get_plan_store().get(plan_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired plan")
+    return stored
+
+
+@router.get("/api/plans/{plan_id}")
+async def get_plan(plan_id: str, request: Request):
+    version, state = _stored_plan(plan_id)
+    return etag_json_response(request, {**plan_response(state), "planId": plan_id, "version": version},
+                              "private, no-cache")
+
+
+# Edits a stored plan in place of re-planning it: only the legs and time
+# slots around the changes are recomputed locally, and Gemini is only asked
+# for the details of added stops. Answers with the whole updated plan.
+@router.patch("/api/plans/{plan_id}")
+async def patch_plan(plan_id: str, req: PlanPatchRequest, request: Request):
+    version, state = _stored_plan(plan_id)
+    if req.version is not None and req.version != version:
+        raise HTTPException(status_code=409, detail=f"Plan is at version {version}")
+    operations = [{key: value for key, value in op.dict().items() if value is not None} for op in req.ops]
+    logger.info("Plan edit request", plan_id=plan_id, ops=[op["op"] for op in operations])
+
+    gate = "gemini" if needs_llm(state, operations) else None
+    try:
+        state, edit = await run_admitted(request, gate, edit_plan, state, operations)
+    except PlanEditError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    new_version = get_plan_store().update(plan_id, version, state)
+    if new_version is None:
+        raise HTTPException(status_code=409, detail="Plan was changed by another request")
+    logger.info("Plan edited", plan_id=plan_id, version=new_version, **edit)
+    return etag_json_response(request, {**plan_response(state), "planId": plan_id, "version": new_version,
+                                        "edit": edit})
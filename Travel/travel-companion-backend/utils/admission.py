@@ -0,0 +1,178 @@
+# travel-companion-backend/utils/admission.py
+
+import os
+import math
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from utils.settings import load_env
+from utils.deadline import remaining
+from utils.metrics import ADMISSION_REJECTED, REGISTRY
+
+load_env()
+
+
+def _gate_from_env(name: str, in_flight: int, queue: int, queue_wait: float):
+    prefix = f"ADMISSION_{name.upper()}"
+    return (int(os.getenv(f"{prefix}_MAX_IN_FLIGHT", str(in_flight))),
+            int(os.getenv(f"{prefix}_MAX_QUEUE", str(queue))),
+            float(os.getenv(f"{prefix}_QUEUE_WAIT_S", str(queue_wait))))
+
+
+# Concurrent requests, queued requests and longest queue wait in seconds for
+# each admission gate, overridable with ADMISSION_<GATE>_MAX_IN_FLIGHT /
+# _MAX_QUEUE / _QUEUE_WAIT_S. The "gemini" gate fronts every endpoint that
+# may call Gemini; past its queue, requests are turned away with a 503 at
+# once instead of waiting longer than the client will.
+ADMISSION_GATES = {
+    "gemini": _gate_from_env("gemini", 16, 32, 5.0),
+}
+
+
+class Overloaded(Exception):
+    """
+    Raised when an admission gate turns a request away. `retry_after` is a
+    hint in whole seconds for the Retry-After header.
+    """
+
+    def __init__(self, gate: str, reason: str, retry_after: int):
+        super().__init__(f"{gate} is overloaded ({reason})")
+        self.gate = gate
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionSlot:
+    """
+    A slot taken from an AdmissionGate. release() is idempotent, so a slot
+    can be handed to several cleanup paths (e.g. a stream's end and the
+    response's background task).
+    """
+
+    def __init__(self, gate: "AdmissionGate"):
+        self._gate = gate
+        self._acquired_at = time.monotonic()
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._gate._release(time.monotonic() - self._acquired_at)
+
+
+class AdmissionGate:
+    """
+    Bounded admission queue: up to `max_in_flight` requests run at once and
+    up to `max_queue` more wait, in arrival order, for at most `queue_wait`
+    seconds (less if their deadline is closer). Anything beyond that is
+    rejected with Overloaded.
+    """
+
+    def __init__(self, name: str, max_in_flight: int, max_queue: int, queue_wait: float):
+        self.name = name
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self.queue_wait = queue_wait
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self._in_flight = 0
+        self._waiting = 0
+        # Moving average of how long an admitted request holds its slot,
+        # used for the Retry-After hint.
+        self._avg_service_s = 1.0
+        self.stats = {"admitted": 0, "queued": 0, "rejected": 0}
+
+    def retry_after(self) -> int:
+        # Time for the current queue to drain through the available slots.
+        backlog = (self._waiting + 1) / self.max_in_flight
+        return max(1, math.ceil(backlog * self._avg_service_s))
+
+    def _reject(self, reason: str):
+        self.stats["rejected"] += 1
+        ADMISSION_REJECTED.inc(gate=self.name, reason=reason)
+        raise Overloaded(self.name, reason, self.retry_after())
+
+    async def acquire(self) -> AdmissionSlot:
+        """
+        Takes a slot, waiting in the queue if needed.
+
+        Raises:
+            Overloaded: If the queue is full or the wait would be too long.
+        """
+        if self._semaphore.locked():
+            if self._waiting >= self.max_queue:
+                self._reject("queue_full")
+            wait = self.queue_wait
+            left = remaining()
+            if left is not None:
+                wait = min(wait, left)
+            if wait <= 0:
+                self._reject("deadline")
+            self._waiting += 1
+            self.stats["queued"] += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), wait)
+            except asyncio.TimeoutError:
+                self._reject("queue_timeout")
+            finally:
+                self._waiting -= 1
+        else:
+            await self._semaphore.acquire()
+        self._in_flight += 1
+        self.stats["admitted"] += 1
+        return AdmissionSlot(self)
+
+    def _release(self, held_s: float):
+        self._in_flight -= 1
+        self._avg_service_s += 0.2 * (held_s - self._avg_service_s)
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def admit(self):
+        slot = await self.acquire()
+        try:
+            yield slot
+        finally:
+            slot.release()
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        stats["in_flight"] = self._in_flight
+        stats["waiting"] = self._waiting
+        return stats
+
+
+_gates = {}
+
+
+def get_admission_gate(name: str) -> AdmissionGate:
+    """
+    Returns the process-wide admission gate `name`, creating it on first use.
+    """
+    gate = _gates.get(name)
+    if gate is None:
+        gate = _gates[name] = AdmissionGate(name, *ADMISSION_GATES[name])
+    return gate
+
+
+def _collect_metrics() -> list:
+    stats = {name: gate.get_stats() for name, gate in _gates.items()}
+    return [
+        ("admission_in_flight", "gauge", "Requests holding an admission slot.",
+         [({"gate": name}, s["in_flight"]) for name, s in stats.items()]),
+        ("admission_queued", "gauge", "Requests waiting for an admission slot.",
+         [({"gate": name}, s["waiting"]) for name, s in stats.items()]),
+    ]
+
+
+REGISTRY.register_collector(_collect_metrics)
+
+
+async def hold_during(events, slot: AdmissionSlot):
+    """
+    Keeps `slot` until the event stream `events` ends or is abandoned.
+    """
+    try:
+        async for event in events:
+            yield event
+    finally:
+        slot.release()
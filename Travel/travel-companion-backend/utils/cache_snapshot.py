@@ -0,0 +1,205 @@
+# travel-companion-backend/utils/cache_snapshot.py
+
+import os
+import json
+import mmap
+import time
+import zlib
+import struct
+from utils.settings import load_env
+from utils.geocode_cache import BACKEND_DIR, get_geocode_cache
+from utils.image_resolver import ImageResult, get_image_resolver
+from utils.llm_json import loads
+from utils.log import get_logger
+from utils.suggestion_cache import get_suggestion_cache
+
+load_env()
+
+# Written by `python -m warm_cache` and loaded by every worker at startup.
+CACHE_SNAPSHOT_PATH = os.getenv("CACHE_SNAPSHOT_PATH", os.path.join(BACKEND_DIR, "cache", "snapshot.bin"))
+# Snapshots older than this are ignored at startup; between the suggestion
+# cache TTLs and this age, their places are served while being refreshed.
+CACHE_SNAPSHOT_MAX_AGE_S = float(os.getenv("CACHE_SNAPSHOT_MAX_AGE_S", str(30 * 3600)))
+
+# Layout: header (magic, index offset, index length, created_at), then one
+# zlib-compressed JSON blob per entry, then the JSON index of
+# {section: {key: [offset, length]}}. Workers map the file and only decode
+# the blobs they are asked for, so startup cost doesn't grow with the
+# number of destinations and the pages are shared between workers.
+SNAPSHOT_MAGIC = b"TCSNAP01"
+_HEADER = struct.Struct("<8sQQd")
+
+SUGGESTIONS = "suggestions"     # normalized location -> [computed_at, places]
+GEOCODES = "geocodes"           # ALL -> [[key, lat, lng, expires_at]]
+IMAGES = "images"               # ALL -> [[key, status, url, provider, expires_at]]
+# Geocodes and image lookups are small and always loaded together, so each
+# is stored as a single entry under this key.
+ALL = "all"
+
+logger = get_logger("cache_snapshot")
+
+
+class SnapshotError(Exception):
+    """
+    Raised when a snapshot file is missing, truncated or of another format.
+    """
+
+
+def _encode(value) -> bytes:
+    return zlib.compress(json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8"), 6)
+
+
+class SnapshotWriter:
+    """
+    Collects cache entries and writes them as one snapshot file. The file is
+    replaced atomically, so running workers never see a half-written one.
+    """
+
+    def __init__(self):
+        self._sections = {SUGGESTIONS: {}, GEOCODES: {}, IMAGES: {}}
+
+    def add(self, section: str, key: str, value):
+        self._sections[section][key] = value
+
+    def counts(self) -> dict:
+        return {section: len(entries) for section, entries in self._sections.items()}
+
+    def write(self, path: str = CACHE_SNAPSHOT_PATH) -> int:
+        """
+        Writes the snapshot to `path` and returns its size in bytes.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        created_at = time.time()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        index = {}
+        with open(tmp_path, "wb") as f:
+            f.write(b"\0" * _HEADER.size)
+            for section, entries in self._sections.items():
+                index[section] = {}
+                for key, value in entries.items():
+                    blob = _encode(value)
+                    index[section][key] = [f.tell(), len(blob)]
+                    f.write(blob)
+            index_offset = f.tell()
+            index_blob = json.dumps(index, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+            f.write(index_blob)
+            f.seek(0)
+            f.write(_HEADER.pack(SNAPSHOT_MAGIC, index_offset, len(index_blob), created_at))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return index_offset + len(index_blob)
+
+
+class CacheSnapshot:
+    """
+    Read-only, memory-mapped view of a snapshot file.
+
+    Raises:
+        SnapshotError: If the file can't be read as a snapshot.
+    """
+
+    def __init__(self, path: str = CACHE_SNAPSHOT_PATH):
+        self.path = path
+        try:
+            with open(path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise SnapshotError(f"can't map {path}: {e}") from e
+        try:
+            magic, index_offset, index_length, self.created_at = _HEADER.unpack_from(self._map, 0)
+            if magic != SNAPSHOT_MAGIC or index_offset + index_length > len(self._map):
+                raise SnapshotError(f"{path} is not a cache snapshot")
+            self._index = loads(self._map[index_offset:index_offset + index_length])
+        except (struct.error, ValueError) as e:
+            self._map.close()
+            raise SnapshotError(f"{path} is corrupt: {e}") from e
+        except SnapshotError:
+            self._map.close()
+            raise
+
+    @property
+    def age(self) -> float:
+        return max(0.0, time.time() - self.created_at)
+
+    def keys(self, section: str) -> list:
+        return list(self._index.get(section, ()))
+
+    def has(self, section: str, key: str) -> bool:
+        return key in self._index.get(section, ())
+
+    def get(self, section: str, key: str):
+        """
+        Decodes one entry, or returns None if the snapshot doesn't have it.
+        """
+        location = self._index.get(section, {}).get(key)
+        if location is None:
+            return None
+        offset, length = location
+        try:
+            return loads(zlib.decompress(self._map[offset:offset + length]))
+        except (zlib.error, ValueError) as e:
+            logger.error("Corrupt snapshot entry", section=section, key=key, error=str(e))
+            return None
+
+    def locations(self) -> list:
+        return self.keys(SUGGESTIONS)
+
+    def has_places(self, key: str) -> bool:
+        return self.has(SUGGESTIONS, key)
+
+    def places(self, key: str):
+        """
+        Returns (places, age in seconds) for a normalized location, or None.
+        """
+        entry = self.get(SUGGESTIONS, key)
+        if not entry:
+            return None
+        computed_at, places = entry
+        return places, max(0.0, time.time() - computed_at)
+
+    def close(self):
+        self._map.close()
+
+
+def load_snapshot(path: str = CACHE_SNAPSHOT_PATH, max_age: float = CACHE_SNAPSHOT_MAX_AGE_S) -> dict:
+    """
+    Loads the warm-up snapshot into this worker's caches: suggestion lists
+    are attached to the suggestion cache and decoded on first lookup;
+    geocodes and image lookups are small and preloaded at once. Entries keep
+    their age, so expired ones aren't served as fresh. A missing or unusable
+    snapshot only means a cold start.
+
+    Returns:
+        dict: How many entries of each section were made available.
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        snapshot = CacheSnapshot(path)
+    except SnapshotError as e:
+        logger.error("Cache snapshot not loaded", error=str(e))
+        return {}
+    if snapshot.age > max_age:
+        logger.warning("Cache snapshot too old, not loaded", path=path, age_s=round(snapshot.age))
+        snapshot.close()
+        return {}
+
+    now = time.time()
+    geocode_cache = get_geocode_cache()
+    geocodes = 0
+    for key, lat, lng, expires_at in snapshot.get(GEOCODES, ALL) or ():
+        if expires_at > now:
+            geocode_cache.preload(key, {"lat": lat, "lng": lng} if lat is not None else None, expires_at)
+            geocodes += 1
+
+    resolver = get_image_resolver()
+    images = 0
+    for key, status, url, provider, expires_at in snapshot.get(IMAGES, ALL) or ():
+        if expires_at > now:
+            resolver.preload(key, ImageResult(status=status, url=url, provider=provider), expires_at - now)
+            images += 1
+
+    suggestions = get_suggestion_cache().attach_snapshot(snapshot)
+    return {SUGGESTIONS: suggestions, GEOCODES: geocodes, IMAGES: images}
+
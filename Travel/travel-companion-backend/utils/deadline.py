@@ -0,0 +1,162 @@
+# travel-companion-backend/utils/deadline.py
+
+import os
+import time
+import asyncio
+from contextvars import ContextVar
+from utils.settings import load_env
+from utils.metrics import REQUESTS_ABANDONED
+
+load_env()
+
+# End-to-end time budget of a request to one of the DEADLINE_PATHS; clients
+# can ask for less with the X-Request-Timeout header (seconds).
+REQUEST_DEADLINE_S = float(os.getenv("REQUEST_DEADLINE_S", "30"))
+# Upstream calls stop this long before the request deadline, leaving time to
+# fall back (e.g. to the local itinerary) and send the response.
+DEADLINE_MARGIN_S = float(os.getenv("DEADLINE_MARGIN_S", "0.5"))
+# How often a running request checks whether its client is still connected.
+DISCONNECT_POLL_S = float(os.getenv("DISCONNECT_POLL_S", "0.25"))
+# Each entry also covers the paths below it (e.g. /api/suggest/batch), so
+# routes added under these prefixes get a deadline too.
+DEADLINE_PATHS = (
+    "/api/suggest",
+    "/api/get-travel-details",
+    "/api/plans",
+)
+# Covered by a prefix above but budgeted per item instead: a batch of
+# hundreds of addresses can't share one request's deadline.
+DEADLINE_EXEMPT_PATHS = ("/api/suggest/batch",)
+REQUEST_TIMEOUT_HEADER = "X-Request-Timeout"
+
+_TIMEOUT_HEADER_KEY = REQUEST_TIMEOUT_HEADER.lower().encode("latin-1")
+_deadline: ContextVar[float | None] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """
+    Raised when the request's deadline leaves no time for an upstream call.
+    """
+
+
+class ClientDisconnected(Exception):
+    """
+    Raised by run_until_disconnect when the client went away mid-request.
+    """
+
+
+def remaining() -> float | None:
+    """
+    Seconds left until the current request's deadline, or None without one.
+    """
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def upstream_timeout(cap: float | None = None) -> float | None:
+    """
+    Timeout for one upstream call: `cap`, shortened to what is left of the
+    request deadline (minus DEADLINE_MARGIN_S). None means no limit.
+
+    Raises:
+        DeadlineExceeded: If the deadline leaves no time for the call.
+    """
+    left = remaining()
+    if left is None:
+        return cap
+    left -= DEADLINE_MARGIN_S
+    if left <= 0:
+        raise DeadlineExceeded("request deadline exceeded")
+    return left if cap is None else min(cap, left)
+
+
+async def with_deadline(awaitable, cap: float | None = None):
+    """
+    Awaits `awaitable` within upstream_timeout(cap), cancelling it on timeout.
+    """
+    try:
+        timeout = upstream_timeout(cap)
+    except DeadlineExceeded:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise
+    if timeout is None:
+        return await awaitable
+    return await asyncio.wait_for(awaitable, timeout)
+
+
+def set_deadline(seconds: float):
+    """
+    Sets the current context's deadline `seconds` from now (never later than
+    an existing one). Returns a token for reset_deadline.
+    """
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        deadline = min(deadline, current)
+    return _deadline.set(deadline)
+
+
+def reset_deadline(token):
+    _deadline.reset(token)
+
+
+async def run_until_disconnect(request, awaitable):
+    """
+    Runs `awaitable` for a non-streaming endpoint, cancelling it if the
+    client disconnects first. Streaming responses are cancelled by Starlette
+    itself.
+
+    Raises:
+        ClientDisconnected: If the client went away before the work finished.
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_S)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                REQUESTS_ABANDONED.inc(reason="client_disconnected")
+                raise ClientDisconnected()
+    finally:
+        task.cancel()
+
+
+def has_deadline(path: str) -> bool:
+    """
+    True if requests to `path` get an end-to-end deadline.
+    """
+    if path in DEADLINE_EXEMPT_PATHS:
+        return False
+    return any(path == prefix or path.startswith(prefix + "/") for prefix in DEADLINE_PATHS)
+
+
+class DeadlineMiddleware:
+    """
+    ASGI middleware that gives requests to DEADLINE_PATHS an end-to-end
+    deadline. Every stage reads it through upstream_timeout(), and tasks
+    started for the request inherit it.
+    """
+
+    def __init__(self, app, default_seconds: float = REQUEST_DEADLINE_S):
+        self.app = app
+        self.default_seconds = default_seconds
+
+    def _budget(self, scope) -> float:
+        requested = dict(scope.get("headers") or ()).get(_TIMEOUT_HEADER_KEY)
+        try:
+            seconds = float(requested) if requested else self.default_seconds
+        except ValueError:
+            seconds = self.default_seconds
+        return max(0.0, min(seconds, self.default_seconds))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not has_deadline(scope["path"]) or self.default_seconds <= 0:
+            await self.app(scope, receive, send)
+            return
+        token = set_deadline(self._budget(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            reset_deadline(token)
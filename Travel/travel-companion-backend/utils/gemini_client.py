@@ -1,278 +1,481 @@
 # travel-companion-backend/utils/gemini_client.py
 
 import os
-import google.generativeai as genai
-from dotenv import load_dotenv
-import json
-import requests
+from utils.settings import load_env
+import asyncio
 import re # Added for cleaning Gemini's JSON response if needed
-from utils.geocode_utils import get_coordinates_from_address # Import geocoding utility
+from utils.gemini_provider import GEMINI_MODEL_NAME, GEMINI_TIMEOUT_S, gemini_configured, get_gemini_model
+from utils.deadline import with_deadline
+from utils.geocode_utils import geocode_many_async, get_coordinates_from_address_async # Import geocoding utility
+from utils.image_resolver import get_image_resolver
+from utils.json_stream import JsonArrayItemParser, chunk_text
+from utils.llm_json import ParsedItems, check_item, parse_items
+from utils import wikipedia_nearby
+from utils.rate_limiter import get_rate_limiter
+from utils.prompt_builder import record_usage
+from utils.log import get_logger
+from utils.metrics import RETRIES, STAGE_SECONDS, UPSTREAM_ERRORS, track_upstream
 
 # Load environment variables from .env file
-load_dotenv()
+load_env()
 
-# Configure Gemini API
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+logger = get_logger("gemini_client")
 
-# --- search_pixabay_image function ---
-def search_pixabay_image(query: str) -> str:
+# Maximum number of image/geocode HTTP lookups in flight at once for a single
+# suggestion request. All six places are enriched concurrently up to this limit.
+ENRICHMENT_CONCURRENCY = int(os.getenv("ENRICHMENT_CONCURRENCY", "8"))
+
+DEFAULT_IMAGE_PLACEHOLDER = "https://placehold.co/300x200?text=Image+Not+Found"
+UNAVAILABLE_IMAGE_PLACEHOLDER = "https://placehold.co/300x200?text=Image+Unavailable"
+
+
+# Places per suggestion response (the prompt asks for this many).
+SUGGESTION_COUNT = 6
+# Rounds of re-asking Gemini for places that failed validation, on top of the
+# first call. Each round only asks for the missing places.
+GEMINI_ITEM_RETRIES = int(os.getenv("GEMINI_ITEM_RETRIES", "1"))
+
+# Gemini's image tool names -> ImageResolver provider names.
+IMAGE_TOOL_PROVIDERS = {
+    "search_pixabay_image": "pixabay",
+    "search_unsplash_image": "unsplash",
+}
+
+# Schema of one suggested place. Gemini is asked for JSON matching it
+# (structured output) and every place is validated against it.
+PLACE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "summary": {"type": "string"},
+        "main_attraction": {"type": "string"},
+        "best_time_to_visit": {"type": "string"},
+        "visiting_hours": {"type": "string"},
+        "address": {"type": "string"},
+        "image": {
+            "type": "object",
+            "properties": {
+                "call": {
+                    "type": "object",
+                    "properties": {
+                        "function": {"type": "string", "format": "enum", "enum": list(IMAGE_TOOL_PROVIDERS)},
+                        "args": {
+                            "type": "object",
+                            "properties": {"query": {"type": "string"}},
+                            "required": ["query"],
+                        },
+                    },
+                    "required": ["function", "args"],
+                },
+            },
+            "required": ["call"],
+        },
+    },
+    "required": ["title", "summary", "main_attraction", "best_time_to_visit", "visiting_hours", "address", "image"],
+}
+SUGGESTION_MODEL_OPTIONS = {
+    "generation_config": {
+        "response_mime_type": "application/json",
+        "response_schema": {"type": "array", "items": PLACE_SCHEMA},
+    },
+}
+# Text fields a place may lack; they're filled in instead of failing the place.
+PLACE_DEFAULTS = {"summary": "N/A", "main_attraction": "N/A", "best_time_to_visit": "N/A",
+                  "visiting_hours": "N/A", "address": ""}
+
+
+def _without_image_call(place):
+    # A broken image tool call costs the place its image, not the place itself.
+    if isinstance(place, dict) and "image" in place:
+        place = dict(place)
+        place["image"] = {"call": {"function": "search_pixabay_image", "args": {"query": str(place.get("title", ""))}}}
+    return place
+
+
+# Static instructions for the suggestion prompt. They come first and never
+# change, so the prefix can be cached upstream; only the location follows.
+SUGGESTION_PROMPT_PREFIX = """Suggest the 6 top and most famous **historical and scenic tourist attractions** in the location given at the end.
+Prioritize well-known landmarks, historically significant places and places of unique natural beauty.
+
+For each place give:
+- title
+- summary: what it is, in one or two sentences
+- main_attraction: why it's famous (main attraction, historical significance or unique specialty)
+- best_time_to_visit: e.g. month range, time of day
+- visiting_hours: e.g. daily schedule, closed days
+- address: as precise as possible, including street, city, state and country
+- image: a tool call object {"call": {"function": "TOOL_NAME", "args": {"query": "Descriptive Query"}}}. Prefer `search_pixabay_image` for every kind of place; use `search_unsplash_image` only if Pixabay is unlikely to have a relevant image.
+
+Return only a JSON array of objects with all keys present and string values (use "N/A" when something is unknown). Example item:
+{"title": "Gateway of India", "summary": "Iconic 20th-century arch monument on Mumbai's waterfront.", "main_attraction": "Indo-Saracenic architecture and views of the Arabian Sea.", "best_time_to_visit": "November to March; early morning.", "visiting_hours": "Open 24 hours.", "address": "Apollo Bunder, Colaba, Mumbai, Maharashtra 400001, India", "image": {"call": {"function": "search_pixabay_image", "args": {"query": "Gateway of India Mumbai"}}}}
+"""
+
+
+def _build_suggestion_prompt(location: str, count: int | None = None, exclude=()) -> str:
+    prompt = f"{SUGGESTION_PROMPT_PREFIX}\nLocation: {location}\n"
+    if count is not None:
+        # Retry for places that failed validation: only the missing ones.
+        prompt += f"Suggest only {count} more place(s), none of: {'; '.join(exclude)}\n"
+    return prompt
+
+
+def _response_text(response) -> str:
+    raw_response_text = ""
+    # Aggregate text from all parts of the response
+    for part in response.parts:
+        if part.text:
+            raw_response_text += part.text
+
+    response_text = raw_response_text.strip()
+    logger.debug("Gemini raw response", model=GEMINI_MODEL_NAME, text=response_text)
+    return response_text
+
+
+def _check_place(place):
+    return check_item(place, PLACE_SCHEMA, PLACE_DEFAULTS, _without_image_call)
+
+
+def _parse_places(response_text: str, operation: str) -> ParsedItems:
     """
-    Searches Pixabay for a high-quality image of a given query and returns its direct URL.
-    Returns a specific error placeholder string if no image is found or an API error occurs.
+    Parses and validates the places in a Gemini response, salvaging valid
+    places from malformed output.
     """
-    pixabay_api_key = os.getenv("PIXABAY_API_KEY")
-    if not pixabay_api_key:
-        print("Error: PIXABAY_API_KEY not found in .env.")
-        return "https://placehold.co/300x200?text=No+Pixabay+API+Key"
-
-    search_url = "https://pixabay.com/api/"
-    params = {
-        "key": pixabay_api_key,
-        "q": query.replace(" ", "+"),   # Pixabay uses '+' for spaces in query
-        "image_type": "photo",
-        "orientation": "horizontal",
-        "per_page": 3,   # Get a few results to pick from
-        "safesearch": True
-    }
-    try:
-        response = requests.get(search_url, params=params, timeout=5)
-        response.raise_for_status()   # Raise an HTTPError for bad responses (4xx or 5xx)
-        data = response.json()
-        
-        if data and data['hits']:
-            # Pixabay returns multiple sizes; 'webformatURL' is usually a good general-purpose size.
-            print(f"Found Pixabay image for '{query}': {data['hits'][0]['webformatURL']}")
-            return data['hits'][0]['webformatURL']
-        else:
-            print(f"No Pixabay image found for query: '{query}'")
-            return "https://placehold.co/300x200?text=No+Pixabay+Found"
-    except requests.exceptions.RequestException as e:
-        print(f"Error searching Pixabay for '{query}': {e}")
-        return "https://placehold.co/300x200?text=Pixabay+Search+Error"
-    except Exception as e:
-        print(f"An unexpected error occurred during Pixabay search for '{query}': {e}")
-        return "https://placehold.co/300x200?text=Error"
+    parsed = parse_items(response_text, PLACE_SCHEMA, defaults=PLACE_DEFAULTS, repair=_without_image_call)
+    if parsed.failed:
+        logger.warning("Invalid places in Gemini response", operation=operation, valid=len(parsed.items),
+                       failed=len(parsed.failed), error=parsed.failed[0][2], repaired=parsed.repaired)
+        reason = "invalid_items" if parsed.items else "invalid_json"
+        UPSTREAM_ERRORS.inc(len(parsed.failed), provider="gemini", operation=operation, reason=reason)
+    return parsed
+
+
+def _image_tool_call(place: dict):
+    """
+    Returns (function_name, query) for the image tool call Gemini wrote into
+    the place, or None if the place has no valid tool call.
+    """
+    if "image" in place and isinstance(place["image"], dict) and "call" in place["image"]:
+        tool_call_dict = place["image"]["call"]
+        return tool_call_dict.get("function"), tool_call_dict.get("args", {}).get("query")
+    return None
 
 
-# --- search_unsplash_image function ---
-def search_unsplash_image(query: str) -> str:
+def _apply_coordinates(place: dict, coords):
+    if coords:
+        place["latitude"] = coords["lat"]
+        place["longitude"] = coords["lng"]
+        logger.debug("Geocoded place", title=place.get('title'), lat=coords['lat'], lng=coords['lng'], sample=True)
+    else:
+        logger.info("Could not geocode place", title=place.get('title'))
+        place["latitude"] = None
+        place["longitude"] = None
+
+
+# --- Async enrichment pipeline ---
+
+async def _retry_missing_places(model, location: str, places: list) -> list:
     """
-    Searches Unsplash for a high-quality image of a given query and returns its direct URL.
-    Returns a specific error placeholder string if no image is found or an API error occurs.
+    Asks Gemini again for the places that failed validation, up to
+    GEMINI_ITEM_RETRIES times, naming the valid ones so they aren't repeated.
+    Returns only the new places; a failed retry keeps what was found so far.
     """
-    unsplash_access_key = os.getenv("UNSPLASH_ACCESS_KEY")
-    if not unsplash_access_key:
-        return "https://placehold.co/300x200?text=No+Unsplash+API+Key"
-
-    search_url = "https://api.unsplash.com/search/photos"
-    params = {
-        "query": query + " tourist attraction", # Added " tourist attraction" for better relevance
-        "orientation": "landscape",
-        "per_page": 1,
-        "client_id": unsplash_access_key
-    }
+    added = []
+    for _ in range(GEMINI_ITEM_RETRIES):
+        missing = SUGGESTION_COUNT - len(places) - len(added)
+        if missing <= 0:
+            break
+        titles = [str(place.get("title", "")) for place in places + added]
+        prompt = _build_suggestion_prompt(location, missing, titles)
+        RETRIES.inc(component="gemini_client", reason="invalid_places")
+        try:
+            await get_rate_limiter("gemini").acquire()
+            with track_upstream("gemini", "suggest_retry"):
+                response = await with_deadline(model.generate_content_async(prompt), GEMINI_TIMEOUT_S)
+        except Exception as e:
+            logger.warning("Gemini retry for missing places failed", location=location, error=str(e) or type(e).__name__)
+            break
+        response_text = _response_text(response)
+        record_usage("suggestions_retry", prompt, response, response_text)
+        for place in _parse_places(response_text, "suggest_retry").items[:missing]:
+            title = str(place.get("title", ""))
+            if not any(wikipedia_nearby.similar_titles(title, known) for known in titles):
+                added.append(place)
+                titles.append(title)
+    return added
+
+
+async def _limited(semaphore: asyncio.Semaphore, coro):
+    async with semaphore:
+        return await coro
+
+
+def _image_request(place: dict):
+    """
+    Returns (query, preferred_provider) for the place's image tool call, or None.
+    """
+    tool_call = _image_tool_call(place)
+    if tool_call is None:
+        logger.info("No image tool call; using placeholder", title=place.get('title'))
+        return None
+    function_name, image_query = tool_call
+    if not image_query or function_name not in IMAGE_TOOL_PROVIDERS:
+        logger.warning("Malformed image tool call; using placeholder", call=place['image']['call'])
+        return None
+    return image_query, IMAGE_TOOL_PROVIDERS[function_name]
+
+
+def _image_url_from_result(request, result) -> str:
+    if request is None:
+        return DEFAULT_IMAGE_PLACEHOLDER
+    if result.found:
+        return result.url
+    logger.info("No image found; using placeholder", query=request[0], status=result.status, error=result.error)
+    return UNAVAILABLE_IMAGE_PLACEHOLDER
+
+
+async def _resolve_image_async(place: dict) -> str:
+    request = _image_request(place)
+    if request is None:
+        return DEFAULT_IMAGE_PLACEHOLDER
+    result = await get_image_resolver().resolve(*request)
+    return _image_url_from_result(request, result)
+
+
+async def _geocode_place_async(place: dict, semaphore: asyncio.Semaphore):
+    place_address = place.get("address")
+    if not place_address:
+        logger.info("No address to geocode", title=place.get('title'))
+        return None
+    return await _limited(semaphore, get_coordinates_from_address_async(place_address))
+
+
+async def enrich_place_async(place: dict, semaphore: asyncio.Semaphore) -> dict:
+    """
+    Resolves the image and coordinates of a single Gemini place concurrently.
+    """
+    image_url, coords = await asyncio.gather(
+        _resolve_image_async(place),
+        _geocode_place_async(place, semaphore),
+    )
+    place["image"] = image_url
+    _apply_coordinates(place, coords)
+    return place
+
+
+async def enrich_places_async(places: list, concurrency: int = ENRICHMENT_CONCURRENCY) -> list:
+    """
+    Enriches all places at once. The image queries of all places are resolved
+    as one batch while the addresses are geocoded as another, with at most
+    `concurrency` geocode calls in flight.
+    """
+    image_requests = [_image_request(place) for place in places]
+    addresses = [place.get("address") for place in places]
+    for place, address in zip(places, addresses):
+        if not address:
+            logger.info("No address to geocode", title=place.get('title'))
+    with STAGE_SECONDS.time(stage="enrich"):
+        image_results, coords_by_address = await asyncio.gather(
+            get_image_resolver().resolve_many([r for r in image_requests if r is not None]),
+            geocode_many_async([address for address in addresses if address], concurrency),
+        )
+
+    results = iter(image_results)
+    for place, request, address in zip(places, image_requests, addresses):
+        place["image"] = _image_url_from_result(request, next(results) if request is not None else None)
+        _apply_coordinates(place, coords_by_address.get(address) if address else None)
+    return places
+
+
+async def _nearby_wikipedia_places(location: str) -> list:
+    coords = await get_coordinates_from_address_async(location)
+    if not coords:
+        return []
+    return await wikipedia_nearby.fetch_nearby_places_async(
+        coords["lat"], coords["lng"],
+        radius=wikipedia_nearby.WIKIPEDIA_RADIUS_M, limit=wikipedia_nearby.WIKIPEDIA_FETCH_LIMIT,
+    )
+
+
+def _start_wikipedia_lookup(location: str):
+    # Runs alongside the Gemini call; it is usually done long before Gemini is.
+    if wikipedia_nearby.WIKIPEDIA_COMPLEMENT_LIMIT <= 0:
+        return None
+    return asyncio.create_task(_nearby_wikipedia_places(location))
+
+
+async def _wikipedia_complements(wiki_task, places: list) -> list:
+    if wiki_task is None:
+        return []
     try:
-        response = requests.get(search_url, params=params, timeout=5)
-        response.raise_for_status()   # Raise an HTTPError for bad responses (4xx or 5xx)
-        data = response.json()
-        
-        if data and data['results']:
-            print(f"Found Unsplash image for '{query}': {data['results'][0]['urls']['regular']}")
-            return data['results'][0]['urls']['regular']
-        else:
-            print(f"No Unsplash image found for query: '{query}'")
-            return "https://placehold.co/300x200?text=No+Unsplash+Found"
-    except requests.exceptions.RequestException as e:
-        print(f"Error searching Unsplash for '{query}': {e}")
-        return "https://placehold.co/300x200?text=Unsplash+Search+Error"
+        wiki_places = await wiki_task
     except Exception as e:
-        print(f"An unexpected error occurred during Unsplash search for '{query}': {e}")
-        return "https://placehold.co/300x200?text=Error"
+        logger.warning("Wikipedia nearby lookup failed", error=str(e))
+        return []
+    return wikipedia_nearby.complement_places(
+        places, wiki_places, wikipedia_nearby.WIKIPEDIA_COMPLEMENT_LIMIT, UNAVAILABLE_IMAGE_PLACEHOLDER,
+    )
 
 
-def suggest_tourist_places(location: str):
+class SuggestionError(Exception):
     """
-    Suggests famous historical and scenic tourist attractions for a given location
-    using the Gemini API and external image search tools (Pixabay and Unsplash),
-    and then fetches coordinates for each place using OpenCage.
+    Raised by suggest_tourist_places_async(raise_errors=True) when no places
+    could be produced for a location.
     """
-    if not os.getenv("GEMINI_API_KEY"):
-        print("Error: GEMINI_API_KEY not found in .env. Please set it.")
-        return []
 
-    model_name = "gemini-1.5-flash"
 
-    # Define tool schemas - ONLY Pixabay and Unsplash are declared
-    unsplash_tool_declaration = {
-        "name": "search_unsplash_image",
-        "description": "Searches Unsplash for a high-quality, general scenic or public domain image and returns its direct URL.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "query": {"type": "string", "description": "The general term to search for on Unsplash (e.g., 'city park', 'mountain view', 'local market')."},
-            },
-            "required": ["query"],
-        },
-    }
+async def suggest_tourist_places_async(location: str, concurrency: int = ENRICHMENT_CONCURRENCY,
+                                       raise_errors: bool = False):
+    """
+    Suggests famous historical and scenic tourist attractions for a location
+    using Gemini, then resolves each place's image (utils.image_resolver) and
+    coordinates. The Gemini call is awaited without blocking the event loop
+    and the image/geocode enrichment runs concurrently, so latency is roughly
+    one Gemini call plus the slowest lookup.
 
-    pixabay_tool_declaration = {
-        "name": "search_pixabay_image",
-        "description": "Searches Pixabay for a high-quality, general scenic or public domain image and returns its direct URL. This is the primary tool for finding images for tourist attractions and scenic spots.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "query": {"type": "string", "description": "The general term to search for on Pixabay (e.g., 'city park', 'mountain view', 'local market')."},
-            },
-            "required": ["query"],
-        },
-    }
-
-    tool_definitions = {
-        "function_declarations": [
-            pixabay_tool_declaration,   # Pixabay is declared first as the primary
-            unsplash_tool_declaration   # Unsplash is declared as the fallback option
-        ]
-    }
-
-    # Prompt for Gemini model to generate tourist place suggestions with tool calls
-    prompt = f"""
-    Suggest 6 top and most famous **historical and scenic tourist attractions** in {location}.
-    Prioritize places that are well-known landmarks, historically significant, or offer unique natural beauty.
-
-    For each of the 6 suggested places, provide the following details in a comprehensive and engaging manner:
-    - title
-    - summary (what it is, a concise description)
-    - main_attraction (why it's famous, its main attraction, historical significance, or unique specialty)
-    - best_time_to_visit (e.g., month range, time of day)
-    - visiting_hours (e.g., daily schedule, closed days)
-    - address (as precise as possible, including street, city, state, country)
-    - **image**: For this field, you MUST use one of the available tools to get a relevant image URL.
-      - **Always prioritize `search_pixabay_image` for finding high-quality images for all types of tourist places (historical landmarks, scenic spots, etc.).** The query should be a descriptive phrase (e.g., "Shaniwar Wada Pune", "Parvati Hill Pune", "Elephanta Caves").
-      - **Only if `search_pixabay_image` is unlikely to find a good relevant image, then use `search_unsplash_image`.** The query should be a descriptive phrase.
-
-      The value for 'image' should be a JSON object representing the tool call, like this:
-      {{ "call": {{ "function": "TOOL_NAME", "args": {{ "query": "Your Query" }} }} }}
-
-    Return the result as a valid JSON array of dictionaries. Ensure all keys are present, and values are strings. If a specific piece of information is genuinely unknown or not applicable, use "N/A" for its value.
-
-    Example of expected JSON format with tool calls:
-    [
-      {{
-        "title": "Gateway of India",
-        "summary": "An iconic arch monument built in the 20th century in Mumbai, India, symbolizing the city's historical gateway.",
-        "main_attraction": "Its grand Indo-Saracenic architecture, historical significance as a former entry point to India, and its prime location offering views of the Arabian Sea and Elephanta Caves ferries.",
-        "best_time_to_visit": "November to March for pleasant weather; early mornings or late afternoons to avoid crowds and enjoy the light.",
-        "visiting_hours": "Open 24 hours (monument exterior); ferry services typically 7:00 AM - 5:30 PM.",
-        "address": "Apollo Bunder, Colaba, Mumbai, Maharashtra 400001, India",
-        "image": {{ "call": {{ "function": "search_pixabay_image", "args": {{ "query": "Gateway of India Mumbai" }} }} }}
-      }},
-      {{
-        "title": "Marine Drive",
-        "summary": "A 3.6-kilometer long C-shaped boulevard along the Arabian Sea, often called the 'Queen's Necklace' due to its streetlights at night.",
-        "main_attraction": "Its stunning panoramic sea views, especially at sunset, the vibrant atmosphere with locals and tourists, and its iconic 'Queen's Necklace' illumination.",
-        "best_time_to_visit": "Evening for sunset views and cooler breeze; during high tide for dramatic waves.",
-        "visiting_hours": "Open 24 hours.",
-        "address": "Netaji Subhash Chandra Bose Road, Mumbai, Maharashtra, India",
-        "image": {{ "call": {{ "function": "search_pixabay_image", "args": {{ "query": "Marine Drive Mumbai" }} }} }}
-      }}
-    ]
+    Failures return an empty list, or raise SuggestionError when
+    `raise_errors` is set (used by the batch endpoint to report per-item errors).
     """
+    def _fail(message: str, cause: Exception | None = None):
+        logger.error(message, location=location)
+        if raise_errors:
+            raise SuggestionError(message) from cause
+        return []
+
+    if not gemini_configured():
+        return _fail("GEMINI_API_KEY not found in .env")
+
+    prompt = _build_suggestion_prompt(location)
+    response_text = ""
+    wiki_task = _start_wikipedia_lookup(location)
 
     try:
-        model = genai.GenerativeModel(model_name, tools=tool_definitions)
-        response = model.generate_content(prompt)
-        
-        raw_response_text = ""
-        # Aggregate text from all parts of the response
-        for part in response.parts:
-            if part.text:
-                raw_response_text += part.text
-
-        response_text = raw_response_text.strip()
-        print(f"Gemini ({model_name}) raw response (with tool call structure):\n", response_text)
-
-        # Clean up Markdown code block if present
-        if response_text.startswith("```json"):
-            response_text = response_text[7:]
-        if response_text.endswith("```"):
-            response_text = response_text[:-3]
-
-        places_with_tool_calls = json.loads(response_text)
-        
-        final_places = []
-        for place in places_with_tool_calls:
-            # 1. Handle Image Fetching
-            actual_image_url = "https://placehold.co/300x200?text=Image+Not+Found" # Default fallback
-            if "image" in place and isinstance(place["image"], dict) and "call" in place["image"]:
-                tool_call_dict = place["image"]["call"]
-                function_name = tool_call_dict.get("function")
-                image_query = tool_call_dict.get("args", {}).get("query")
-
-                if function_name == "search_pixabay_image" and image_query:
-                    print(f"Attempting Pixabay search for '{image_query}'...")
-                    temp_url = search_pixabay_image(image_query)
-                    
-                    # If Pixabay failed, try Unsplash
-                    if "No Pixabay" in temp_url or "Pixabay Search Error" in temp_url or "Pixabay API Key" in temp_url or "Error" in temp_url:
-                        print(f"Pixabay failed for '{image_query}'. Attempting Unsplash fallback...")
-                        temp_url = search_unsplash_image(image_query)
-                    
-                    actual_image_url = temp_url
-                    
-                elif function_name == "search_unsplash_image" and image_query:
-                    print(f"Attempting Unsplash search for '{image_query}' (Gemini chose Unsplash directly)...")
-                    actual_image_url = search_unsplash_image(image_query)
-                else:
-                    print(f"Warning: Unknown or malformed tool call: {tool_call_dict}. Using default placeholder for image.")
-
-                # Final check: if actual_image_url still contains an error message, replace it
-                if "No Pixabay" in actual_image_url or \
-                   "Pixabay Search Error" in actual_image_url or \
-                   "No Unsplash" in actual_image_url or \
-                   "Unsplash Search Error" in actual_image_url or \
-                   "Tool Error" in actual_image_url or \
-                   "No Unsplash API Key" in actual_image_url or \
-                   "No Pixabay API Key" in actual_image_url or \
-                   "Error" in actual_image_url:
-                    print(f"All automated image searches failed for '{image_query}'. Using generic placeholder.")
-                    actual_image_url = "https://placehold.co/300x200?text=Image+Unavailable"
-                
-                place["image"] = actual_image_url
-            else:
-                print(f"No valid image tool call found for {place.get('title')}. Using default placeholder.")
-                place["image"] = actual_image_url # Assign default if no tool call was suggested
-
-            # 2. Handle Coordinate Fetching using geocode_utils
-            place_address = place.get("address")
-            if place_address:
-                print(f"Attempting to geocode address for '{place.get('title')}': '{place_address}'")
-                coords = get_coordinates_from_address(place_address)
-                if coords:
-                    place["latitude"] = coords["lat"]
-                    place["longitude"] = coords["lng"]
-                    print(f"Successfully geocoded '{place.get('title')}': Lat={coords['lat']}, Lng={coords['lng']}")
-                else:
-                    print(f"Could not geocode address for '{place.get('title')}'. Setting latitude/longitude to None.")
-                    place["latitude"] = None
-                    place["longitude"] = None
-            else:
-                print(f"No address provided for '{place.get('title')}', cannot geocode. Setting latitude/longitude to None.")
-                place["latitude"] = None
-                place["longitude"] = None
-
-            # Only add place if it has a title and an image, and ideally coordinates
-            # Although we set to None, the frontend expects float, so we might need a filter later if we strictly need coords
-            # For now, let's include all as the frontend can handle null/missing coords.
-            final_places.append(place)
-        
-        return final_places if isinstance(final_places, list) else []
-
-    except json.JSONDecodeError as e:
-        print(f"JSON decoding error from Gemini response: {e}")
-        print(f"Problematic response text: '{response_text}'")
-        return []
+        model = get_gemini_model("suggestions", SUGGESTION_MODEL_OPTIONS)
+        await get_rate_limiter("gemini").acquire()
+        with track_upstream("gemini", "suggest"):
+            response = await with_deadline(model.generate_content_async(prompt), GEMINI_TIMEOUT_S)
+        response_text = _response_text(response)
+        record_usage("suggestions", prompt, response, response_text)
+
+        parsed = _parse_places(response_text, "suggest")
+        places_with_tool_calls = parsed.items
+        if not parsed.ok:
+            places_with_tool_calls += await _retry_missing_places(model, location, places_with_tool_calls)
+        if not places_with_tool_calls:
+            if not parsed.failed:
+                return _fail("Gemini returned no places")
+            return _fail(f"No valid places in Gemini response: {parsed.failed[0][2]}")
+
+        places = await enrich_places_async(places_with_tool_calls, concurrency)
+        # Nearby Wikipedia pages that Gemini didn't mention complement its picks.
+        return places + await _wikipedia_complements(wiki_task, places)
+
+    except SuggestionError:
+        raise
     except Exception as e:
-        print("Gemini API call or processing error:", e)
-        if 'response' in locals() and hasattr(response, 'text'):
-            print(f"Gemini response text before error: {response.text}")
-        return []
\ No newline at end of file
+        return _fail(f"Gemini API call or processing error: {e}", e)
+    finally:
+        if wiki_task is not None and not wiki_task.done():
+            wiki_task.cancel()
+
+
+async def stream_tourist_places(location: str, concurrency: int = ENRICHMENT_CONCURRENCY):
+    """
+    Streams enriched places for a location as they become ready.
+
+    Gemini is called in streaming mode and its JSON array is parsed
+    incrementally; image and geocode lookups for each place start as soon as
+    that place's object is complete, and each place is yielded as soon as its
+    enrichment finishes.
+
+    Raises:
+        SuggestionError: After the places parsed so far were yielded, if the
+                         Gemini stream failed or timed out, so callers don't
+                         keep the partial list as the full answer.
+    """
+    if not gemini_configured():
+        logger.error("GEMINI_API_KEY not found in .env")
+        return
+
+    prompt = _build_suggestion_prompt(location)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    queue = asyncio.Queue()
+    done_marker = object()
+    enrich_tasks = []
+    enriched = []
+    failures = []
+    wiki_task = _start_wikipedia_lookup(location)
+
+    async def _enrich_into_queue(place):
+        place = await enrich_place_async(place, semaphore)
+        enriched.append(place)
+        await queue.put(place)
+
+    async def _produce():
+        parser = JsonArrayItemParser()
+        valid = []
+        invalid = 0
+        last_chunk = None
+        output = []
+
+        async def _read_stream(model):
+            nonlocal invalid, last_chunk
+            response = await model.generate_content_async(prompt, stream=True)
+            async for chunk in response:
+                last_chunk = chunk
+                text = chunk_text(chunk)
+                output.append(text)
+                for place in parser.feed(text):
+                    place, error = _check_place(place)
+                    if error:
+                        invalid += 1
+                        logger.warning("Skipping invalid place from Gemini stream", location=location, error=error)
+                        continue
+                    valid.append(place)
+                    enrich_tasks.append(asyncio.create_task(_enrich_into_queue(place)))
+
+        try:
+            model = get_gemini_model("suggestions", SUGGESTION_MODEL_OPTIONS)
+            await get_rate_limiter("gemini").acquire()
+            with track_upstream("gemini", "suggest_stream"):
+                # The whole stream shares one timeout, bounded by the request deadline.
+                await with_deadline(_read_stream(model), GEMINI_TIMEOUT_S)
+            record_usage("suggestions_stream", prompt, last_chunk, "".join(output))
+            invalid += parser.items_failed
+            if not parser.done:
+                invalid += 1
+                logger.warning("Gemini stream ended before the JSON array closed",
+                               location=location, places=parser.items_parsed)
+            if invalid:
+                UPSTREAM_ERRORS.inc(invalid, provider="gemini", operation="suggest_stream", reason="invalid_items")
+                for place in await _retry_missing_places(model, location, valid):
+                    enrich_tasks.append(asyncio.create_task(_enrich_into_queue(place)))
+            await asyncio.gather(*enrich_tasks)
+            for place in await _wikipedia_complements(wiki_task, enriched):
+                await queue.put(place)
+        except Exception as e:
+            logger.error("Gemini streaming call or processing error", location=location, error=str(e))
+            failures.append(str(e) or type(e).__name__)
+            # Keep what was parsed before the failure: finish enriching it and
+            # still append the Wikipedia complements.
+            await asyncio.gather(*enrich_tasks, return_exceptions=True)
+            for place in await _wikipedia_complements(wiki_task, enriched):
+                await queue.put(place)
+        finally:
+            await queue.put(done_marker)
+
+    producer = asyncio.create_task(_produce())
+    try:
+        while True:
+            place = await queue.get()
+            if place is done_marker:
+                break
+            yield place
+        if failures:
+            raise SuggestionError(f"Gemini stream failed: {failures[0]}")
+    finally:
+        # The consumer went away (e.g. client disconnected): stop all upstream work.
+        producer.cancel()
+        for task in enrich_tasks:
+            task.cancel()
+        if wiki_task is not None:
+            wiki_task.cancel()
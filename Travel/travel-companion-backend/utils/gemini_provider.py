@@ -0,0 +1,73 @@
+# travel-companion-backend/utils/gemini_provider.py
+
+import os
+import threading
+from utils.settings import load_env
+
+load_env()
+
+GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL_NAME", "gemini-1.5-flash")
+# Longest a single Gemini call may take; request deadlines can shorten it.
+GEMINI_TIMEOUT_S = float(os.getenv("GEMINI_TIMEOUT_S", "30"))
+
+
+class GeminiNotConfigured(RuntimeError):
+    """
+    Raised when a Gemini model is requested but GEMINI_API_KEY is not set.
+    """
+
+
+_lock = threading.Lock()
+_genai = None
+_models = {}             # name -> shared GenerativeModel
+_model_factory = None    # optional override, e.g. the benchmarks' fake Gemini
+
+
+def gemini_configured() -> bool:
+    return _model_factory is not None or bool(os.getenv("GEMINI_API_KEY"))
+
+
+def _get_genai():
+    # google.generativeai takes a large share of the app's import time, so it
+    # is imported and configured on the first Gemini call instead of at startup.
+    global _genai
+    if _genai is None:
+        import google.generativeai as genai
+        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+        _genai = genai
+    return _genai
+
+
+def get_gemini_model(name: str, options=None):
+    """
+    Returns the shared GenerativeModel registered under `name`, creating it
+    on first use with `options`: GenerativeModel keyword arguments such as
+    tools or generation_config, or a callable that returns them.
+
+    Raises:
+        GeminiNotConfigured: If GEMINI_API_KEY is not set.
+    """
+    model = _models.get(name)
+    if model is not None:
+        return model
+    if not gemini_configured():
+        raise GeminiNotConfigured("GEMINI_API_KEY not found in environment variables.")
+    with _lock:
+        model = _models.get(name)
+        if model is None:
+            if callable(options):
+                options = options()
+            factory = _model_factory or _get_genai().GenerativeModel
+            model = _models[name] = factory(GEMINI_MODEL_NAME, **(options or {}))
+    return model
+
+
+def set_gemini_model_factory(factory):
+    """
+    Builds models with `factory(model_name, **kwargs)` instead of
+    google.generativeai (None restores it). Existing models are dropped.
+    """
+    global _model_factory
+    with _lock:
+        _model_factory = factory
+        _models.clear()
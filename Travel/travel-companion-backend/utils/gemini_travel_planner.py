@@ -1,135 +1,324 @@
 # travel-companion-backend/utils/gemini_travel_planner.py
 
-import os
-import google.generativeai as genai
-from dotenv import load_dotenv
 import json
+import asyncio
+from utils.settings import load_env
+from utils.gemini_provider import GEMINI_TIMEOUT_S, get_gemini_model
+from utils.deadline import upstream_timeout, with_deadline
+from utils.json_stream import JsonArrayItemParser, chunk_text
+from utils.llm_json import check_item, parse_items
+from utils.rate_limiter import get_rate_limiter
+from utils.prompt_builder import DETAIL_PLACE_LEVELS, TRAVEL_PLACE_LEVELS, encode_places, record_usage
+from utils.log import get_logger
+from utils.metrics import RETRIES, UPSTREAM_ERRORS, track_upstream
 
 # Load environment variables
-load_dotenv()
+load_env()
 
-# Configure Gemini API
-if os.getenv("GEMINI_API_KEY"):
-    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-else:
-    raise ValueError("GEMINI_API_KEY not found in environment variables.")
+logger = get_logger("gemini_travel_planner")
 
-def get_gemini_travel_details(selected_places: list, start_location: str):
+# Schema of one itinerary item; Gemini is asked for JSON matching it
+# (structured output) and every item is validated against it.
+TRAVEL_OPTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "time_slot": {"type": "string"},
+        "activity": {"type": "string"},
+        "location": {"type": "string"},
+        "details": {"type": "string"},
+        "type": {"type": "string", "format": "enum", "enum": ["travel", "attraction", "meal"]},
+    },
+    "required": ["time_slot", "activity", "location", "details", "type"],
+}
+TRAVEL_OPTION_DEFAULTS = {"details": ""}
+TRAVEL_PLAN_MODEL_OPTIONS = {
+    "generation_config": {
+        "response_mime_type": "application/json",
+        "response_schema": {
+            "type": "object",
+            "properties": {"travelOptions": {"type": "array", "items": TRAVEL_OPTION_SCHEMA}},
+            "required": ["travelOptions"],
+        },
+    },
+}
+DETAILS_MODEL_OPTIONS = {
+    "generation_config": {
+        "response_mime_type": "application/json",
+        "response_schema": {
+            "type": "object",
+            "properties": {"details": {"type": "array", "items": {"type": "string"}}},
+            "required": ["details"],
+        },
+    },
+}
+
+
+def _format_route_legs(route: dict) -> str:
+    legs_info = []
+    for leg in route["legs"]:
+        distance = f"{leg['distance_km']} km" if leg["distance_km"] is not None else "distance unknown"
+        legs_info.append(f"  - {leg['from']} -> {leg['to']}: {distance}, ~{leg['duration_min']} min")
+    return "\n".join(legs_info)
+
+
+# Static instructions shared by every travel plan prompt. They come first and
+# never change, so the prefix can be cached upstream; per-request data follows.
+TRAVEL_PLAN_PROMPT_PREFIX = """You are an expert travel planner. Plan one day visiting the listed tourist attractions, starting from the user's starting location.
+
+Rules:
+- The day starts at 9:00 AM. Give every segment, visits and travel alike, a time slot, activity, location, short details and a type ("travel", "attraction" or "meal").
+- Include a lunch break of about 1 hour around midday.
+- Output only a JSON object with one key, `travelOptions`: an array of objects with the keys `time_slot`, `activity`, `location`, `details` and `type`. No other text and no markdown code fences.
+
+Example item:
+{"time_slot": "9:30 AM - 11:00 AM", "activity": "Visit Gateway of India", "location": "Gateway of India, Mumbai", "details": "Explore the monument; arrive early to beat the crowds.", "type": "attraction"}
+
+Places are listed one per line as: number. title [@lat,lng] | addr | hours | best (time to visit) | about | known for. Missing fields are unknown.
+"""
+
+
+def _build_travel_prompt(selected_places: list, start_location: str, route: dict | None = None) -> str:
+    if route is not None:
+        selected_places = route["places"]
+
+    # Coordinates are only useful to the model when it has to order the
+    # places itself; with a precomputed route the legs carry that information.
+    places_list_str = encode_places(selected_places, TRAVEL_PLACE_LEVELS, with_coordinates=route is None)
+
+    if route is None:
+        route_section = f"Order: arrange the places to minimize travel time, starting from {start_location}."
+    else:
+        route_section = (
+            "Route (already optimized, with estimated travel by road):\n"
+            f"{_format_route_legs(route)}\n"
+            "Order: visit the places exactly in the listed order and use these travel times for the travel segments."
+        )
+
+    return f"""{TRAVEL_PLAN_PROMPT_PREFIX}
+Starting location: {start_location}
+
+Places:
+{places_list_str}
+
+{route_section}
+"""
+
+
+def _clean_response_text(response) -> str:
+    raw_response_text = ""
+    for part in response.parts:
+        if part.text:
+            raw_response_text += part.text
+
+    return raw_response_text.strip()
+
+
+def _parse_travel_plan(cleaned_response_text: str, operation: str = "travel_plan"):
+    """
+    Parses and validates a travel plan response. Returns (plan, parsed): the
+    plan dict holds every valid item (with `partial` set when items were
+    lost) or an error when none was valid; `parsed` is the ParsedItems.
+    """
+    parsed = parse_items(cleaned_response_text, TRAVEL_OPTION_SCHEMA, "travelOptions", TRAVEL_OPTION_DEFAULTS)
+    if parsed.ok:
+        return {"travelOptions": parsed.items}, parsed
+
+    error = parsed.failed[0][2]
+    reason = "invalid_items" if parsed.items else "invalid_json"
+    UPSTREAM_ERRORS.inc(len(parsed.failed), provider="gemini", operation=operation, reason=reason)
+    if parsed.items:
+        # Keep every valid itinerary item instead of throwing the whole plan away.
+        logger.warning("Dropped invalid travel plan items from Gemini output", items=len(parsed.items),
+                       failed=len(parsed.failed), error=error)
+        return {"travelOptions": parsed.items, "partial": True}, parsed
+
+    logger.error("Travel plan is not valid JSON", error=error, text=cleaned_response_text)
+    return {"error": f"Failed to generate valid travel plan: {error}. Raw output: {cleaned_response_text}"}, parsed
+
+
+REPAIR_PROMPT_PREFIX = """These travel plan items do not match the required format. Rewrite each one as an object with the keys `time_slot`, `activity`, `location`, `details` and `type` ("travel", "attraction" or "meal"), keeping its content.
+Output only a JSON object with one key, `travelOptions`, holding the rewritten items in the same order.
+"""
+
+
+async def _repair_travel_plan(model, plan: dict, parsed) -> dict:
+    """
+    Asks Gemini once to rewrite only the itinerary items that failed
+    validation and merges the fixed ones back in their original positions.
+    Returns `plan` unchanged when nothing could be repaired.
+    """
+    broken = {index: item for index, item, _ in parsed.failed if index is not None and item is not None}
+    if not broken or len(broken) != len(parsed.failed):
+        return plan
+
+    prompt = REPAIR_PROMPT_PREFIX + "\n" + "\n".join(json.dumps(item) for item in broken.values())
+    RETRIES.inc(component="gemini_travel_planner", reason="invalid_items")
+    try:
+        await get_rate_limiter("gemini").acquire()
+        with track_upstream("gemini", "travel_plan_repair"):
+            response = await with_deadline(model.generate_content_async(prompt), GEMINI_TIMEOUT_S)
+    except Exception as e:
+        logger.warning("Gemini travel plan repair failed", error=str(e) or type(e).__name__)
+        return plan
+    text = _clean_response_text(response)
+    record_usage("travel_plan_repair", prompt, response, text)
+    fixed = parse_items(text, TRAVEL_OPTION_SCHEMA, "travelOptions", TRAVEL_OPTION_DEFAULTS)
+    if not fixed.ok or len(fixed.items) != len(broken):
+        logger.warning("Gemini could not repair the invalid travel plan items", items=len(broken))
+        return plan
+
+    repaired = dict(zip(broken, fixed.items))
+    valid = iter(parsed.items)
+    items = [repaired[i] if i in repaired else next(valid) for i in range(len(parsed.items) + len(repaired))]
+    return {"travelOptions": items}
+
+
+async def get_gemini_travel_details_async(selected_places: list, start_location: str, route: dict | None = None):
     """
     Generates a detailed travel plan using Gemini, ordering places for optimal travel,
-    and including the user's starting point.
+    and including the user's starting point. The Gemini call is awaited without
+    blocking the event loop.
+
+    Invalid output gets one more Gemini call: a repair of just the invalid
+    items when the rest of the plan is usable, the whole plan otherwise.
 
     Args:
         selected_places (list): A list of dictionaries, each representing a selected
                                  tourist place with details like 'title', 'address',
                                  'latitude', 'longitude', 'summary', 'image', etc.
         start_location (str): The user's starting address for the day.
+        route (dict | None): Output of route_optimizer.optimize_route. When given, the
+                             places are listed in that order with the estimated legs and
+                             Gemini is asked to keep the order instead of optimizing it.
 
     Returns:
         dict: A dictionary containing the structured travel plan or an error message.
     """
-    model_name = "gemini-1.5-flash"
-
-    # Format the selected places into a readable string for the prompt
-    places_info = []
-    for i, place in enumerate(selected_places):
-        # Ensure all required keys exist, providing defaults if missing
-        title = place.get('title', f"Place {i+1}")
-        address = place.get('address', 'N/A')
-        latitude = place.get('latitude', 'N/A')
-        longitude = place.get('longitude', 'N/A')
-        summary = place.get('summary', 'No summary available.')
-        main_attraction = place.get('main_attraction', 'N/A')
-        best_time_to_visit = place.get('best_time_to_visit', 'N/A')
-        visiting_hours = place.get('visiting_hours', 'N/A')
-
-        places_info.append(
-            f"  - Title: {title}\n"
-            f"    Address: {address}\n"
-            f"    Coordinates: ({latitude}, {longitude})\n"
-            f"    Summary: {summary}\n"
-            f"    Main Attraction: {main_attraction}\n"
-            f"    Best Time to Visit: {best_time_to_visit}\n"
-            f"    Visiting Hours: {visiting_hours}"
-        )
-    
-    places_list_str = "\n".join(places_info)
+    prompt = _build_travel_prompt(selected_places, start_location, route)
+
+    try:
+        model = get_gemini_model("travel_planner", TRAVEL_PLAN_MODEL_OPTIONS)
+        for attempt in range(2):
+            await get_rate_limiter("gemini").acquire()
+            with track_upstream("gemini", "travel_plan"):
+                response = await with_deadline(model.generate_content_async(prompt), GEMINI_TIMEOUT_S)
+            text = _clean_response_text(response)
+            record_usage("travel_plan", prompt, response, text)
+            plan, parsed = _parse_travel_plan(text)
+            if parsed.items or attempt:
+                break
+            RETRIES.inc(component="gemini_travel_planner", reason="invalid_plan")
+        if not parsed.ok and parsed.items:
+            plan = await _repair_travel_plan(model, plan, parsed)
+        return plan
+
+    except Exception as e:
+        logger.error("Gemini travel plan call failed", error=str(e))
+        return {"error": f"Failed to generate travel plan: {e}"}
 
-    prompt = f"""
-You are an expert travel planner. Your task is to create a detailed daily itinerary for a user who wants to visit a list of tourist attractions, starting from a specific location.
 
-**User's Starting Location for the day:** {start_location}
+async def stream_gemini_travel_details(selected_places: list, start_location: str, route: dict | None = None,
+                                       timeout: float | None = None):
+    """
+    Streams the `travelOptions` items of a Gemini travel plan as each item's
+    JSON object closes. Items that fail validation are skipped.
 
-**Selected Tourist Attractions:**
-{places_list_str}
+    Raises:
+        asyncio.TimeoutError: If the whole stream takes longer than `timeout` seconds
+                              (or than the request deadline leaves).
+        ValueError: If the stream ended before the plan's JSON was complete. Items
+                    yielded before that are valid.
+    """
+    prompt = _build_travel_prompt(selected_places, start_location, route)
+    parser = JsonArrayItemParser("travelOptions")
+    loop = asyncio.get_running_loop()
+    timeout = upstream_timeout(timeout)
+    deadline = loop.time() + timeout if timeout is not None else None
 
-**Instructions:**
-1. **Optimize the Route:** Arrange all places, starting from the user's '{start_location}', in a logical order to minimize travel time.
-2. **Detailed Plan:** Assume the day starts at 9:00 AM. For each segment of the journey, including visits and travel, suggest a time slot, activity, location, details, and the type of activity.
-3. **Meal Breaks:** Incorporate a lunch break (approx. 1 hour) around midday.
-4. **Output Format:** Provide the plan as a single JSON object. The object must have one key, `travelOptions`, which contains a detailed daily itinerary as a JSON array. Each element in this array must be an object with the following keys: `time_slot`, `activity`, `location`, `details`, and `type`.
-5. **No Extra Text:** Only output the JSON object. Do not include any conversational text or markdown code block delimiters (like ```json).
-
-**Desired JSON Format (Example):**
-```json
-{{
-  "travelOptions": [
-    {{
-      "time_slot": "9:00 AM - 9:30 AM",
-      "activity": "Travel from User's Starting Location to Gateway of India",
-      "location": "{start_location} to Gateway of India",
-      "details": "Estimated travel time: 30 minutes by taxi/ride-share.",
-      "type": "travel"
-    }},
-    {{
-      "time_slot": "9:30 AM - 11:00 AM",
-      "activity": "Visit Gateway of India",
-      "location": "Gateway of India, Mumbai",
-      "details": "Explore the iconic monument and nearby area. Allow time for crowds.",
-      "type": "attraction"
-    }},
-    {{
-      "time_slot": "1:00 PM - 2:00 PM",
-      "activity": "Lunch Break",
-      "location": "Leopold Cafe or nearby restaurant in Colaba",
-      "details": "Savor local and international cuisine.",
-      "type": "meal"
-    }}
-  ]
-}}
-```
-"""
+    def _remaining():
+        return None if deadline is None else max(0.0, deadline - loop.time())
 
+    model = get_gemini_model("travel_planner", TRAVEL_PLAN_MODEL_OPTIONS)
+    await asyncio.wait_for(get_rate_limiter("gemini").acquire(), _remaining())
+    last_chunk = None
+    output = []
     try:
-        model = genai.GenerativeModel(model_name)
-        response = model.generate_content(prompt)
-        
-        raw_response_text = ""
-        for part in response.parts:
-            if part.text:
-                raw_response_text += part.text
-
-        cleaned_response_text = raw_response_text.strip()
-        
-        # In this updated prompt, we explicitly ask Gemini not to include markdown,
-        # so this cleaning step is less necessary but still a good safeguard.
-        if cleaned_response_text.startswith("```json"):
-            cleaned_response_text = cleaned_response_text[7:]
-        if cleaned_response_text.endswith("```"):
-            cleaned_response_text = cleaned_response_text[:-3]
-
-        # Attempt to parse the JSON
-        try:
-            travel_plan = json.loads(cleaned_response_text)
-            
-            # The key change: return the entire JSON object, which should contain 'travelOptions'
-            # as per the updated prompt.
-            return travel_plan
-            
-        except json.JSONDecodeError as e:
-            print(f"JSON decoding error for travel plan: {e}. Raw response: {cleaned_response_text}")
-            return {"error": f"Failed to generate valid travel plan: JSON parsing error - {e}. Raw output: {cleaned_response_text}"}
+        with track_upstream("gemini", "travel_plan_stream"):
+            response = await asyncio.wait_for(model.generate_content_async(prompt, stream=True), _remaining())
+            chunks = response.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), _remaining())
+                except StopAsyncIteration:
+                    break
+                last_chunk = chunk
+                text = chunk_text(chunk)
+                output.append(text)
+                for item in parser.feed(text):
+                    item, error = check_item(item, TRAVEL_OPTION_SCHEMA, TRAVEL_OPTION_DEFAULTS)
+                    if error:
+                        logger.warning("Skipping invalid travel plan item from Gemini stream", error=error)
+                        UPSTREAM_ERRORS.inc(provider="gemini", operation="travel_plan_stream", reason="invalid_items")
+                        continue
+                    yield item
+    finally:
+        # The last chunk carries the usage totals for the whole stream.
+        record_usage("travel_plan_stream", prompt, last_chunk, "".join(output))
+
+    if not parser.done:
+        raise ValueError(f"Gemini stream ended before the travel plan was complete ({parser.items_parsed} items received)")
 
+
+DETAILS_PROMPT_PREFIX = """You are an expert travel planner. The itinerary below is already scheduled; do not change it.
+Write a short, helpful `details` text (1-2 sentences) for every numbered item: tips for visits, transport suggestions for travel and local food ideas for meals.
+Only output a JSON object with one key, `details`, holding a JSON array with one string per numbered item, in order.
+"""
+
+
+def _build_details_prompt(travel_options: list, selected_places: list, start_location: str) -> str:
+    items_info = []
+    for i, item in enumerate(travel_options):
+        items_info.append(f"{i+1}. [{item['type']}] {item['time_slot']} | {item['activity']} | {item['location']}")
+
+    items_list_str = "\n".join(items_info)
+    places_list_str = encode_places(selected_places, DETAIL_PLACE_LEVELS)
+    return f"""{DETAILS_PROMPT_PREFIX}
+Starting location: {start_location}
+
+Itinerary ({len(travel_options)} items):
+{items_list_str}
+
+Places:
+{places_list_str}
+"""
+
+
+async def get_gemini_itinerary_details_async(travel_options: list, selected_places: list, start_location: str):
+    """
+    Asks Gemini only for the descriptive `details` text of an itinerary that was
+    scheduled locally.
+
+    Returns:
+        list | None: One details string per itinerary item, or None if the call
+                     failed or the output did not match the itinerary.
+    """
+    prompt = _build_details_prompt(travel_options, selected_places, start_location)
+
+    try:
+        model = get_gemini_model("itinerary_details", DETAILS_MODEL_OPTIONS)
+        await get_rate_limiter("gemini").acquire()
+        with track_upstream("gemini", "itinerary_details"):
+            response = await with_deadline(model.generate_content_async(prompt), GEMINI_TIMEOUT_S)
+        text = _clean_response_text(response)
+        record_usage("itinerary_details", prompt, response, text)
+        parsed = parse_items(text, {"type": "string"}, "details")
     except Exception as e:
-        print(f"Error calling Gemini API for travel details: {e}")
-        return {"error": f"Failed to generate travel plan: {e}"}
+        logger.error("Gemini itinerary details call failed", error=str(e))
+        return None
+
+    if not parsed.ok or len(parsed.items) != len(travel_options):
+        logger.warning("Gemini itinerary details did not match the scheduled itinerary; keeping local details",
+                       valid=len(parsed.items), failed=len(parsed.failed))
+        UPSTREAM_ERRORS.inc(provider="gemini", operation="itinerary_details", reason="invalid_items")
+        return None
+    return parsed.items
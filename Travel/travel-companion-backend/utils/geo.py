@@ -0,0 +1,122 @@
+# travel-companion-backend/utils/geo.py
+
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """
+    Great-circle distance in kilometres between two points.
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def haversine_matrix(points):
+    """
+    Pairwise great-circle distances in kilometres for a sequence of
+    (lat, lng) points, computed in one vectorized pass. Returns a numpy array.
+    """
+    # numpy is only needed for routing, so it's imported on first use rather
+    # than with every module that uses the geo helpers.
+    import numpy as np
+
+    coords = np.radians(np.asarray(points, dtype=float).reshape(-1, 2))
+    lat = coords[:, 0][:, None]
+    lng = coords[:, 1][:, None]
+    dlat = lat - lat.T
+    dlng = lng - lng.T
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat) * np.cos(lat.T) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def has_coordinates(place: dict) -> bool:
+    lat, lng = place.get("latitude"), place.get("longitude")
+    return isinstance(lat, (int, float)) and isinstance(lng, (int, float)) and not (lat == 0 and lng == 0)
+
+
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(lat: float, lng: float, precision: int = 6) -> str:
+    """
+    Encodes a point as a geohash string of the given length.
+    """
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits, bit_count, even = 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def geohash_decode(geohash: str):
+    """
+    Returns the (lat, lng) centre of a geohash cell.
+    """
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = _GEOHASH_BASE32.index(char)
+        for shift in range(4, -1, -1):
+            rng = lng_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if (value >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return (lat_range[0] + lat_range[1]) / 2, (lng_range[0] + lng_range[1]) / 2
+
+
+def geohash_precision_for_radius(radius_m: float) -> int:
+    """
+    Picks a geohash length whose cells are small compared to a search radius,
+    so snapping the search centre to the cell centre barely changes the results.
+    """
+    # Approximate longest cell side in metres for geohash lengths 4..8.
+    for precision, cell_m in ((4, 39100), (5, 4900), (6, 1220), (7, 153), (8, 38)):
+        if cell_m * 4 <= radius_m:
+            return precision
+    return 9
+
+
+def geohash_cells_in_radius(lat: float, lng: float, radius_km: float, precision: int) -> set:
+    """
+    Returns the geohash cells of the given length that cover the bounding box
+    of a circle, so a spatial lookup only has to visit those buckets.
+    """
+    lat_bits = precision * 5 // 2
+    lng_bits = precision * 5 - lat_bits
+    cell_lat = 180.0 / (1 << lat_bits)
+    cell_lng = 360.0 / (1 << lng_bits)
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    dlng = min(180.0, dlat / max(math.cos(math.radians(lat)), 0.01))
+
+    rows = range(max(0, math.floor((lat - dlat + 90) / cell_lat)),
+                 min((1 << lat_bits) - 1, math.floor((lat + dlat + 90) / cell_lat)) + 1)
+    cols = range(math.floor((lng - dlng + 180) / cell_lng), math.floor((lng + dlng + 180) / cell_lng) + 1)
+    cells = set()
+    for i in rows:
+        cell_centre_lat = -90 + (i + 0.5) * cell_lat
+        for j in cols:
+            # Columns wrap around the antimeridian.
+            cell_centre_lng = -180 + (j % (1 << lng_bits) + 0.5) * cell_lng
+            cells.add(geohash_encode(cell_centre_lat, cell_centre_lng, precision))
+    return cells
@@ -0,0 +1,118 @@
+# travel-companion-backend/utils/geocode_cache.py
+
+import os
+import re
+import unicodedata
+from utils.settings import load_env
+from utils.metrics import REGISTRY, cache_family
+from utils.tiered_cache import BACKEND_DIR, SharedStore, TieredCache
+
+load_env()
+
+# Per-worker memory tier; everything else is served from the shared tier.
+GEOCODE_CACHE_MEMORY_ENTRIES = int(os.getenv("GEOCODE_CACHE_MEMORY_ENTRIES", "512"))
+# Coordinates of landmarks practically never change, so found results are kept
+# for a long time. "Not found" answers expire sooner in case OpenCage improves.
+GEOCODE_POSITIVE_TTL = float(os.getenv("GEOCODE_POSITIVE_TTL", str(90 * 24 * 3600)))
+GEOCODE_NEGATIVE_TTL = float(os.getenv("GEOCODE_NEGATIVE_TTL", str(24 * 3600)))
+# Trailing country names dropped during normalization, so "Gateway of India,
+# Mumbai" and "Gateway of India, Mumbai, India" share one cache entry.
+GEOCODE_COUNTRY_SUFFIXES = tuple(
+    s.strip().lower() for s in os.getenv("GEOCODE_COUNTRY_SUFFIXES", "india,republic of india,bharat").split(",") if s.strip()
+)
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]+", re.UNICODE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _clean(text: str) -> str:
+    text = _PUNCTUATION_RE.sub(" ", text)
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def normalize_address(address: str) -> str:
+    """
+    Normalizes an address into a cache key: case-folded, punctuation removed,
+    whitespace collapsed and a trailing ", <country>" stripped. The country
+    must follow a comma, so "Gateway of India" keeps its last word.
+    """
+    text = unicodedata.normalize("NFKC", address or "").casefold().rstrip(" ,")
+    head, comma, last = text.rpartition(",")
+    if comma and _clean(last) in GEOCODE_COUNTRY_SUFFIXES and _clean(head):
+        text = head
+    return _clean(text)
+
+
+class GeocodeCache:
+    """
+    Geocoding results in a two-tier cache (utils.tiered_cache): a small
+    in-memory LRU per worker in front of the host-wide shared store. Both
+    found coordinates and "not found" answers are stored, each with its own TTL.
+    """
+
+    def __init__(self, max_memory_entries: int = GEOCODE_CACHE_MEMORY_ENTRIES,
+                 positive_ttl: float = GEOCODE_POSITIVE_TTL, negative_ttl: float = GEOCODE_NEGATIVE_TTL,
+                 store: SharedStore | None = None):
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self._cache = TieredCache("geocode", positive_ttl, max_memory_entries, store)
+        self._negative_hits = 0
+
+    def get(self, address: str):
+        """
+        Returns (hit, coords). `hit` is False when the address is unknown or
+        expired; `coords` is None for a cached "not found" answer.
+        """
+        hit, coords = self._cache.get(normalize_address(address))
+        if hit and coords is None:
+            self._negative_hits += 1
+        return hit, coords
+
+    def set(self, address: str, coords):
+        """
+        Stores coordinates ({"lat", "lng"}) or None for a "not found" answer.
+        """
+        self._cache.set(normalize_address(address), coords, self.positive_ttl if coords else self.negative_ttl)
+
+    def preload(self, key: str, coords, expires_at: float):
+        """
+        Seeds the in-memory tier with a known result (e.g. from a snapshot)
+        without writing it to the shared store. `key` is an already
+        normalized address.
+        """
+        self._cache.preload(key, coords, expires_at)
+
+    def memory_items(self) -> list:
+        """
+        Returns (key, coords, expires_at) for every live in-memory entry.
+        """
+        return self._cache.memory_items()
+
+    def get_stats(self) -> dict:
+        stats = self._cache.get_stats()
+        stats["negative_hits"] = self._negative_hits
+        return stats
+
+
+_geocode_cache = None
+
+
+def get_geocode_cache() -> GeocodeCache:
+    """
+    Returns the process-wide geocode cache, creating it on first use.
+    """
+    global _geocode_cache
+    if _geocode_cache is None:
+        _geocode_cache = GeocodeCache()
+    return _geocode_cache
+
+
+def _collect_metrics() -> list:
+    if _geocode_cache is None:
+        return []
+    stats = _geocode_cache.get_stats()
+    # Memory and shared-tier hits are reported separately; negative hits are a subset of both.
+    return cache_family("geocode", stats["memory_hits"], stats["misses"], shared_hit=stats["shared_hits"])
+
+
+REGISTRY.register_collector(_collect_metrics)
@@ -1,32 +1,121 @@
 # travel-companion-backend/utils/geocode_utils.py
 
 import os
-import requests
-from dotenv import load_dotenv
+import asyncio
+import httpx
+from utils.settings import load_env
+from utils.http_client import get_async_client
+from utils.geocode_cache import get_geocode_cache, normalize_address
+from utils.rate_limiter import get_rate_limiter
+from utils.deadline import DeadlineExceeded, upstream_timeout
+from utils.log import get_logger
+from utils.metrics import track_upstream
 
-load_dotenv()
+load_env()
 
 OPENCAGE_API_KEY = os.getenv("OPENCAGE_API_KEY")
+OPENCAGE_URL = "https://api.opencagedata.com/geocode/v1/json"
+
+# Upper bound on concurrent OpenCage calls made by geocode_many_async.
+GEOCODE_MANY_CONCURRENCY = int(os.getenv("GEOCODE_MANY_CONCURRENCY", "4"))
+
+logger = get_logger("geocode")
+
+
+def _coordinates_from_data(data: dict, address: str):
+    if data["results"]:
+        geometry = data["results"][0]["geometry"]
+        return {"lat": geometry["lat"], "lng": geometry["lng"]}
+    logger.info("No coordinates found by OpenCage", address=address)
+    return None
+
 
 def get_coordinates_from_address(address: str):
     """
     Fetches latitude and longitude for a given address using OpenCage Geocoding API.
+    Results, including "not found" answers, are served from the geocode cache when possible.
     """
+    import requests  # only the synchronous path needs it; imported on first use
+
+    cache = get_geocode_cache()
+    hit, coords = cache.get(address)
+    if hit:
+        return coords
+
     if not OPENCAGE_API_KEY:
-        print("Error: OPENCAGE_API_KEY not found in environment variables.")
+        logger.error("OPENCAGE_API_KEY not found in environment variables")
         return None
 
-    url = f"https://api.opencagedata.com/geocode/v1/json?q={requests.utils.quote(address)}&key={OPENCAGE_API_KEY}"
+    url = f"{OPENCAGE_URL}?q={requests.utils.quote(address)}&key={OPENCAGE_API_KEY}"
     try:
-        response = requests.get(url, timeout=5)
+        with track_upstream("opencage", "geocode"):
+            response = requests.get(url, timeout=5)
         response.raise_for_status() # Raise an exception for HTTP errors
-        data = response.json()
+        coords = _coordinates_from_data(response.json(), address)
+    except requests.exceptions.RequestException as e:
+        # Transient failures are not cached so the next request retries.
+        logger.warning("OpenCage request failed", address=address, error=str(e))
+        return None
+
+    cache.set(address, coords)
+    return coords
+
+
+async def get_coordinates_from_address_async(address: str):
+    """
+    Async variant of get_coordinates_from_address that uses the shared pooled
+    HTTP client, so it can run concurrently with other lookups without blocking
+    the event loop.
+    """
+    cache = get_geocode_cache()
+    hit, coords = cache.get(address)
+    if hit:
+        return coords
 
-        if data["results"]:
-            geometry = data["results"][0]["geometry"]
-            return {"lat": geometry["lat"], "lng": geometry["lng"]}
-        print(f"No coordinates found by OpenCage for address: {address}")
+    if not OPENCAGE_API_KEY:
+        logger.error("OPENCAGE_API_KEY not found in environment variables")
         return None
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching coordinates for '{address}' from OpenCage: {e}")
-        return None
\ No newline at end of file
+
+    params = {"q": address, "key": OPENCAGE_API_KEY}
+    try:
+        await get_rate_limiter("opencage").acquire()
+        with track_upstream("opencage", "geocode"):
+            response = await get_async_client().get(OPENCAGE_URL, params=params, timeout=upstream_timeout(5))
+        response.raise_for_status()
+        coords = _coordinates_from_data(response.json(), address)
+    except (httpx.HTTPError, DeadlineExceeded) as e:
+        logger.warning("OpenCage request failed", address=address, error=str(e))
+        return None
+
+    cache.set(address, coords)
+    return coords
+
+
+async def geocode_many_async(addresses: list, concurrency: int = GEOCODE_MANY_CONCURRENCY) -> dict:
+    """
+    Geocodes a batch of addresses. Addresses that normalize to the same key are
+    looked up once, and cache misses are fetched concurrently with at most
+    `concurrency` OpenCage calls in flight. Returns a dict mapping each input
+    address to its coordinates (or None).
+    """
+    by_key = {}
+    for address in addresses:
+        by_key.setdefault(normalize_address(address), address)
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def _lookup(address):
+        async with semaphore:
+            return await get_coordinates_from_address_async(address)
+
+    keys = list(by_key)
+    results = await asyncio.gather(*(_lookup(by_key[key]) for key in keys))
+    resolved = dict(zip(keys, results))
+    return {address: resolved[normalize_address(address)] for address in addresses}
+
+
+def get_geocode_stats() -> dict:
+    """
+    Returns hit/miss counters of the geocode cache.
+    """
+    return get_geocode_cache().get_stats()
@@ -0,0 +1,57 @@
+# travel-companion-backend/utils/http_client.py
+
+import os
+import httpx
+from utils.settings import load_env
+
+load_env()
+
+# Connection pool sizing for the shared client. Every upstream lookup (Pixabay,
+# Unsplash, OpenCage, ...) goes through the same pool so TCP/TLS connections are
+# kept alive and reused across places and across requests.
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+
+_async_client: httpx.AsyncClient | None = None
+# Optional transport override, e.g. the benchmarks' fake upstream servers.
+_transport: httpx.AsyncBaseTransport | None = None
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Returns the process-wide pooled httpx.AsyncClient, creating it on first use.
+    """
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(10.0),
+            transport=_transport,
+        )
+    return _async_client
+
+
+async def close_async_client():
+    """
+    Closes the shared client. Called on application shutdown.
+    """
+    global _async_client
+    if _async_client is not None and not _async_client.is_closed:
+        await _async_client.aclose()
+    _async_client = None
+
+
+def set_transport(transport: httpx.AsyncBaseTransport | None):
+    """
+    Routes every upstream call made through the shared client over
+    `transport` (None restores real network access). The current client is
+    dropped, so call this before serving requests.
+    """
+    global _async_client, _transport
+    _transport = transport
+    _async_client = None
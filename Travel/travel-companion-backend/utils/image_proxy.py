@@ -0,0 +1,350 @@
+# travel-companion-backend/utils/image_proxy.py
+
+import os
+import io
+import time
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+import httpx
+from utils.settings import load_env
+from utils.http_client import get_async_client
+from utils.deadline import upstream_timeout
+from utils.log import get_logger
+from utils.metrics import REGISTRY, cache_family, track_upstream
+
+load_env()
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Resized images live in IMAGE_PROXY_DIR under the hash of their bytes; the
+# index maps image IDs to their source URL and variant files.
+IMAGE_PROXY_DIR = os.getenv("IMAGE_PROXY_DIR", os.path.join(BACKEND_DIR, "cache", "images"))
+IMAGE_PROXY_INDEX_PATH = os.getenv("IMAGE_PROXY_INDEX_PATH", os.path.join(BACKEND_DIR, "cache", "images.sqlite3"))
+# Set to 0 to return the providers' image URLs unchanged.
+IMAGE_PROXY_ENABLED = os.getenv("IMAGE_PROXY_ENABLED", "1") == "1"
+# Public origin of this API for the proxied URLs (e.g. behind a reverse
+# proxy). Empty means the origin the request came in on.
+IMAGE_PROXY_BASE_URL = os.getenv("IMAGE_PROXY_BASE_URL", "").rstrip("/")
+# Only images from these hosts are proxied, so the endpoint can't be used to
+# fetch arbitrary URLs.
+IMAGE_PROXY_HOSTS = tuple(
+    h.strip().lower() for h in os.getenv(
+        "IMAGE_PROXY_HOSTS", "pixabay.com,cdn.pixabay.com,images.unsplash.com,upload.wikimedia.org"
+    ).split(",") if h.strip()
+)
+# Redirects are followed by hand, and only to allowed hosts.
+IMAGE_PROXY_MAX_REDIRECTS = int(os.getenv("IMAGE_PROXY_MAX_REDIRECTS", "3"))
+IMAGE_PROXY_MAX_BYTES = int(os.getenv("IMAGE_PROXY_MAX_BYTES", str(8 * 1024 * 1024)))
+IMAGE_PROXY_TIMEOUT = float(os.getenv("IMAGE_PROXY_TIMEOUT", "10"))
+IMAGE_PROXY_WEBP_QUALITY = int(os.getenv("IMAGE_PROXY_WEBP_QUALITY", "78"))
+IMAGE_PROXY_JPEG_QUALITY = int(os.getenv("IMAGE_PROXY_JPEG_QUALITY", "82"))
+# Registered IDs remembered in memory, to skip re-inserting known sources.
+IMAGE_PROXY_MEMORY_IDS = int(os.getenv("IMAGE_PROXY_MEMORY_IDS", "10000"))
+
+# Variant name -> longest side in pixels. Place cards are about 400 px wide,
+# so "card" covers them on 1.5x screens; "thumb" is for lists and maps.
+IMAGE_VARIANTS = {"card": 640, "thumb": 320}
+# URL extension -> (Pillow format, content type).
+IMAGE_FORMATS = {"webp": ("WEBP", "image/webp"), "jpg": ("JPEG", "image/jpeg")}
+DEFAULT_VARIANT = "card"
+# Variant files never change (their name is their content hash).
+IMAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+logger = get_logger("image_proxy")
+
+
+class UnknownImage(LookupError):
+    """
+    Raised for an image ID that was never handed out.
+    """
+
+
+class ImageFetchError(Exception):
+    """
+    Raised when the source image can't be fetched or decoded.
+    """
+
+
+@dataclass(frozen=True)
+class StoredVariant:
+    path: str
+    digest: str
+    content_type: str
+
+
+def image_id(url: str) -> str:
+    return hashlib.blake2b(url.encode("utf-8"), digest_size=10).hexdigest()
+
+
+def is_proxiable(url) -> bool:
+    if not isinstance(url, str):
+        return False
+    parts = urlsplit(url)
+    return parts.scheme == "https" and (parts.hostname or "").lower() in IMAGE_PROXY_HOSTS
+
+
+def _render_variants(data: bytes) -> dict:
+    """
+    Decodes an image once and encodes every variant/format pair. Runs in a
+    worker thread. Returns {(variant, fmt): bytes}.
+    """
+    # Pillow is only needed once an image is actually requested.
+    from PIL import Image, ImageOps
+
+    try:
+        with Image.open(io.BytesIO(data)) as source:
+            largest = max(IMAGE_VARIANTS.values())
+            # Lets JPEG decoding downscale by a power of two right away.
+            source.draft("RGB", (largest, largest))
+            image = ImageOps.exif_transpose(source)
+            if image.mode in ("RGBA", "LA", "P"):
+                # Transparent areas become white, as on the page behind the card.
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+            elif image.mode != "RGB":
+                image = image.convert("RGB")
+            rendered = {}
+            # Largest first, each variant resized from the previous one.
+            for variant, size in sorted(IMAGE_VARIANTS.items(), key=lambda item: -item[1]):
+                image = image.copy()
+                image.thumbnail((size, size), Image.LANCZOS)
+                for fmt, (pil_format, _) in IMAGE_FORMATS.items():
+                    out = io.BytesIO()
+                    if pil_format == "WEBP":
+                        image.save(out, pil_format, quality=IMAGE_PROXY_WEBP_QUALITY, method=4)
+                    else:
+                        image.save(out, pil_format, quality=IMAGE_PROXY_JPEG_QUALITY, optimize=True, progressive=True)
+                    rendered[(variant, fmt)] = out.getvalue()
+            return rendered
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        raise ImageFetchError(f"cannot decode image: {e}") from e
+
+
+class ImageProxy:
+    """
+    Fetches provider images once, stores card-sized WebP/JPEG variants in a
+    content-addressed disk cache and serves them from there. Concurrent
+    requests for an image that isn't cached yet share one fetch.
+    """
+
+    def __init__(self, cache_dir: str = IMAGE_PROXY_DIR, index_path: str = IMAGE_PROXY_INDEX_PATH):
+        self.cache_dir = cache_dir
+        self.index_path = index_path
+        self._conn = None
+        self._lock = threading.Lock()
+        self._known_ids = OrderedDict()
+        self._inflight = {}
+        self.stats = {"hits": 0, "misses": 0, "fetches": 0, "fetch_errors": 0, "bytes_in": 0, "bytes_stored": 0}
+
+    def _connection(self):
+        if self._conn is None:
+            if self.index_path != ":memory:":
+                os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.index_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sources (id TEXT PRIMARY KEY, url TEXT NOT NULL, registered_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS variants ("
+                "id TEXT NOT NULL, variant TEXT NOT NULL, fmt TEXT NOT NULL, digest TEXT NOT NULL, size INTEGER NOT NULL, "
+                "PRIMARY KEY (id, variant, fmt))"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def register(self, url: str) -> str | None:
+        """
+        Returns the stable ID for a proxiable image URL (None otherwise),
+        recording the URL so the image can be fetched on first request.
+        """
+        if not is_proxiable(url):
+            return None
+        key = image_id(url)
+        with self._lock:
+            if key in self._known_ids:
+                self._known_ids.move_to_end(key)
+                return key
+            try:
+                conn = self._connection()
+                conn.execute("INSERT OR IGNORE INTO sources (id, url, registered_at) VALUES (?, ?, ?)",
+                             (key, url, time.time()))
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.error("Image index write error", error=str(e))
+                return None
+            self._known_ids[key] = True
+            while len(self._known_ids) > IMAGE_PROXY_MEMORY_IDS:
+                self._known_ids.popitem(last=False)
+        return key
+
+    def proxy_url(self, url, base_url: str):
+        """
+        Returns the proxied URL of an image (default variant, format chosen
+        by the browser's Accept header), or `url` unchanged if it can't be
+        proxied.
+        """
+        key = self.register(url) if IMAGE_PROXY_ENABLED else None
+        if key is None:
+            return url
+        return f"{IMAGE_PROXY_BASE_URL or base_url.rstrip('/')}/api/images/{key}/{DEFAULT_VARIANT}"
+
+    def rewrite_places(self, places: list, base_url: str) -> list:
+        """
+        Returns copies of `places` whose `image` points at the proxy.
+        """
+        return [{**place, "image": self.proxy_url(place.get("image"), base_url)} if isinstance(place, dict) else place
+                for place in places]
+
+    def _path(self, digest: str, fmt: str) -> str:
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.{fmt}")
+
+    def _lookup(self, key: str, variant: str, fmt: str) -> StoredVariant | None:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT digest FROM variants WHERE id = ? AND variant = ? AND fmt = ?", (key, variant, fmt)
+            ).fetchone()
+        if row is None:
+            return None
+        path = self._path(row[0], fmt)
+        if not os.path.exists(path):
+            return None
+        return StoredVariant(path, row[0], IMAGE_FORMATS[fmt][1])
+
+    def _source_url(self, key: str) -> str | None:
+        with self._lock:
+            row = self._connection().execute("SELECT url FROM sources WHERE id = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    async def _read(self, response: httpx.Response) -> bytes:
+        response.raise_for_status()
+        if not response.headers.get("content-type", "image/").startswith("image/"):
+            raise ImageFetchError(f"not an image: {response.headers.get('content-type')}")
+        chunks, size = [], 0
+        async for chunk in response.aiter_bytes():
+            size += len(chunk)
+            if size > IMAGE_PROXY_MAX_BYTES:
+                raise ImageFetchError(f"image larger than {IMAGE_PROXY_MAX_BYTES} bytes")
+            chunks.append(chunk)
+        self.stats["bytes_in"] += size
+        return b"".join(chunks)
+
+    async def _fetch(self, url: str) -> bytes:
+        # Every hop must stay on IMAGE_PROXY_HOSTS; a redirect elsewhere would
+        # turn the proxy into a fetcher of arbitrary URLs.
+        try:
+            for _ in range(IMAGE_PROXY_MAX_REDIRECTS + 1):
+                host = (urlsplit(url).hostname or "").lower()
+                with track_upstream(host, "image_fetch"):
+                    async with get_async_client().stream("GET", url, timeout=upstream_timeout(IMAGE_PROXY_TIMEOUT),
+                                                         follow_redirects=False) as response:
+                        if not response.is_redirect:
+                            return await self._read(response)
+                        url = str(response.next_request.url) if response.next_request else ""
+                if not is_proxiable(url):
+                    raise ImageFetchError(f"redirected off the allowed hosts: {url or 'no location'}")
+        except (httpx.HTTPError, asyncio.TimeoutError) as e:
+            raise ImageFetchError(f"fetch failed: {e or type(e).__name__}") from e
+        raise ImageFetchError(f"more than {IMAGE_PROXY_MAX_REDIRECTS} redirects")
+
+    def _store(self, key: str, rendered: dict):
+        # Content-addressed: identical variants (e.g. the same photo behind two
+        # URLs) share one file, and a file never changes once written.
+        rows = []
+        for (variant, fmt), data in rendered.items():
+            digest = hashlib.sha256(data).hexdigest()[:32]
+            path = self._path(digest, fmt)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+                self.stats["bytes_stored"] += len(data)
+            rows.append((key, variant, fmt, digest, len(data)))
+        with self._lock:
+            conn = self._connection()
+            conn.executemany("INSERT OR REPLACE INTO variants (id, variant, fmt, digest, size) VALUES (?, ?, ?, ?, ?)", rows)
+            conn.commit()
+
+    async def _materialize(self, key: str, url: str):
+        self.stats["fetches"] += 1
+        try:
+            data = await self._fetch(url)
+            rendered = await asyncio.to_thread(_render_variants, data)
+            await asyncio.to_thread(self._store, key, rendered)
+        except ImageFetchError as e:
+            self.stats["fetch_errors"] += 1
+            logger.warning("Image proxy fetch failed", url=url, error=str(e))
+            raise
+
+    def _fetch_done(self, key: str, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        # Retrieve the error even when every waiter has gone away.
+        if not task.cancelled():
+            task.exception()
+
+    async def get_variant(self, key: str, variant: str, fmt: str) -> StoredVariant:
+        """
+        Returns the stored file for an image variant, fetching and resizing
+        the source image first if needed.
+
+        Raises:
+            UnknownImage: If the ID was never registered.
+            ImageFetchError: If the source image couldn't be fetched or decoded.
+        """
+        stored = self._lookup(key, variant, fmt)
+        if stored is not None:
+            self.stats["hits"] += 1
+            return stored
+        self.stats["misses"] += 1
+        url = self._source_url(key)
+        if url is None:
+            raise UnknownImage(key)
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.create_task(self._materialize(key, url))
+            task.add_done_callback(lambda t: self._fetch_done(key, t))
+        # Shielded: one client going away doesn't cancel the shared fetch.
+        await asyncio.shield(task)
+        stored = self._lookup(key, variant, fmt)
+        if stored is None:
+            raise ImageFetchError("variant missing after fetch")
+        return stored
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        stats["inflight"] = len(self._inflight)
+        return stats
+
+
+_image_proxy: ImageProxy | None = None
+
+
+def get_image_proxy() -> ImageProxy:
+    global _image_proxy
+    if _image_proxy is None:
+        _image_proxy = ImageProxy()
+    return _image_proxy
+
+
+def _collect_metrics() -> list:
+    if _image_proxy is None:
+        return []
+    stats = _image_proxy.get_stats()
+    return cache_family("image_proxy", stats["hits"], stats["misses"]) + [
+        ("image_proxy_fetches_total", "counter", "Source images fetched by the image proxy.",
+         [({"result": "ok"}, stats["fetches"] - stats["fetch_errors"]), ({"result": "error"}, stats["fetch_errors"])]),
+        ("image_proxy_bytes_total", "counter", "Bytes downloaded from sources and written as variants.",
+         [({"direction": "in"}, stats["bytes_in"]), ({"direction": "stored"}, stats["bytes_stored"])]),
+    ]
+
+
+REGISTRY.register_collector(_collect_metrics)
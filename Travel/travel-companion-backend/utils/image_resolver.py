@@ -0,0 +1,415 @@
+# travel-companion-backend/utils/image_resolver.py
+
+import os
+import re
+import time
+import asyncio
+import httpx
+from dataclasses import dataclass
+from utils.settings import load_env
+from utils.http_client import get_async_client
+from utils.rate_limiter import get_rate_limiter
+from utils.deadline import DeadlineExceeded, upstream_timeout
+from utils.tiered_cache import SharedStore, TieredCache
+from utils.log import get_logger
+from utils.metrics import REGISTRY, RETRIES, cache_family, track_upstream
+
+load_env()
+
+PIXABAY_SEARCH_URL = "https://pixabay.com/api/"
+UNSPLASH_SEARCH_URL = "https://api.unsplash.com/search/photos"
+
+logger = get_logger("image_resolver")
+
+# After IMAGE_HEDGE_DELAY seconds without an answer from the preferred provider,
+# the next provider is raced against it. A provider that fails (or returns
+# nothing) starts the next one immediately.
+IMAGE_HEDGE_DELAY = float(os.getenv("IMAGE_HEDGE_DELAY", "0.6"))
+IMAGE_PROVIDER_TIMEOUT = float(os.getenv("IMAGE_PROVIDER_TIMEOUT", "5"))
+IMAGE_RESOLVER_CONCURRENCY = int(os.getenv("IMAGE_RESOLVER_CONCURRENCY", "8"))
+# Per-worker memory tier; everything else is served from the shared tier.
+IMAGE_CACHE_MAX_ENTRIES = int(os.getenv("IMAGE_CACHE_MAX_ENTRIES", "1024"))
+IMAGE_FOUND_TTL = float(os.getenv("IMAGE_FOUND_TTL", str(24 * 3600)))
+IMAGE_NOT_FOUND_TTL = float(os.getenv("IMAGE_NOT_FOUND_TTL", str(6 * 3600)))
+# A provider is skipped for IMAGE_BREAKER_RESET seconds after
+# IMAGE_BREAKER_THRESHOLD consecutive failures, or straight away when it
+# answers 429 (for at least the Retry-After it sends).
+IMAGE_BREAKER_THRESHOLD = int(os.getenv("IMAGE_BREAKER_THRESHOLD", "3"))
+IMAGE_BREAKER_RESET = float(os.getenv("IMAGE_BREAKER_RESET", "30"))
+
+FOUND = "found"
+NOT_FOUND = "not_found"
+ERROR = "error"
+UNAVAILABLE = "unavailable"
+
+
+@dataclass(frozen=True)
+class ImageResult:
+    """
+    Outcome of an image lookup. `url` is only set when `status` is FOUND.
+    """
+    status: str
+    url: str | None = None
+    provider: str | None = None
+    error: str | None = None
+    cached: bool = False
+
+    @property
+    def found(self) -> bool:
+        return self.status == FOUND
+
+
+def pixabay_params(query: str, api_key: str) -> dict:
+    return {
+        "key": api_key,
+        "q": query.replace(" ", "+"),   # Pixabay uses '+' for spaces in query
+        "image_type": "photo",
+        "orientation": "horizontal",
+        "per_page": 3,   # Get a few results to pick from
+        "safesearch": True
+    }
+
+
+def unsplash_params(query: str, access_key: str) -> dict:
+    return {
+        "query": query + " tourist attraction", # Added " tourist attraction" for better relevance
+        "orientation": "landscape",
+        "per_page": 1,
+        "client_id": access_key
+    }
+
+
+class ProviderRateLimited(Exception):
+    def __init__(self, retry_after: float | None):
+        super().__init__(f"rate limited (retry after {retry_after}s)")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker. Opens after `threshold` consecutive failures
+    and lets a single trial call through once `reset_timeout` has passed.
+    """
+
+    def __init__(self, threshold: int = IMAGE_BREAKER_THRESHOLD, reset_timeout: float = IMAGE_BREAKER_RESET):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_until = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.failures < self.threshold and self.opened_until == 0.0:
+            return "closed"
+        return "open" if time.monotonic() < self.opened_until else "half_open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def release(self):
+        """
+        Gives back a half-open trial slot that ended up not being used.
+        """
+        self._trial_in_flight = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_until = 0.0
+        self._trial_in_flight = False
+
+    def record_failure(self, open_for: float | None = None):
+        self.failures += 1
+        self._trial_in_flight = False
+        if open_for is not None or self.failures >= self.threshold:
+            self.opened_until = time.monotonic() + max(self.reset_timeout, open_for or 0.0)
+
+
+async def _pixabay_lookup(query: str) -> ImageResult | None:
+    api_key = os.getenv("PIXABAY_API_KEY")
+    if not api_key:
+        return None
+    response = await get_async_client().get(PIXABAY_SEARCH_URL, params=pixabay_params(query, api_key),
+                                             timeout=upstream_timeout(IMAGE_PROVIDER_TIMEOUT))
+    if response.status_code == 429:
+        raise ProviderRateLimited(_retry_after(response))
+    response.raise_for_status()
+    hits = response.json().get("hits") or []
+    if hits:
+        # Pixabay returns multiple sizes; 'webformatURL' is usually a good general-purpose size.
+        return ImageResult(FOUND, url=hits[0]["webformatURL"], provider="pixabay")
+    return ImageResult(NOT_FOUND, provider="pixabay")
+
+
+async def _unsplash_lookup(query: str) -> ImageResult | None:
+    access_key = os.getenv("UNSPLASH_ACCESS_KEY")
+    if not access_key:
+        return None
+    response = await get_async_client().get(UNSPLASH_SEARCH_URL, params=unsplash_params(query, access_key),
+                                             timeout=upstream_timeout(IMAGE_PROVIDER_TIMEOUT))
+    # Unsplash reports an exhausted hourly quota as 403 with no remaining requests.
+    if response.status_code == 429 or (response.status_code == 403 and response.headers.get("X-Ratelimit-Remaining") == "0"):
+        raise ProviderRateLimited(_retry_after(response))
+    response.raise_for_status()
+    results = response.json().get("results") or []
+    if results:
+        return ImageResult(FOUND, url=results[0]["urls"]["regular"], provider="unsplash")
+    return ImageResult(NOT_FOUND, provider="unsplash")
+
+
+def _retry_after(response) -> float | None:
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+# Provider name -> async lookup. A lookup returns None when the provider is not
+# configured (no API key), an ImageResult otherwise, and raises on failure.
+PROVIDERS = {
+    "pixabay": _pixabay_lookup,
+    "unsplash": _unsplash_lookup,
+}
+DEFAULT_PROVIDER_ORDER = ("pixabay", "unsplash")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _cache_key(query: str) -> str:
+    return _WHITESPACE_RE.sub(" ", (query or "").casefold()).strip()
+
+
+class ImageResolver:
+    """
+    Resolves image search queries to image URLs across providers, with hedged
+    requests, per-provider circuit breakers and a TTL cache of both found and
+    not-found results.
+    """
+
+    def __init__(self, providers: dict | None = None, hedge_delay: float = IMAGE_HEDGE_DELAY,
+                 concurrency: int = IMAGE_RESOLVER_CONCURRENCY, max_entries: int = IMAGE_CACHE_MAX_ENTRIES,
+                 found_ttl: float = IMAGE_FOUND_TTL, not_found_ttl: float = IMAGE_NOT_FOUND_TTL,
+                 store: SharedStore | None = None):
+        self.providers = dict(providers or PROVIDERS)
+        self.hedge_delay = hedge_delay
+        self.max_entries = max_entries
+        self.found_ttl = found_ttl
+        self.not_found_ttl = not_found_ttl
+        self.breakers = {name: CircuitBreaker() for name in self.providers}
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        # Values are [status, url, provider], shared with the other workers.
+        self._cache = TieredCache("images", found_ttl, max_entries, store)
+        self._inflight = {}           # key -> asyncio.Task
+        self.stats = {"provider_calls": 0, "provider_errors": 0, "hedges": 0, "breaker_skips": 0}
+
+    def _cache_get(self, key: str):
+        hit, value = self._cache.get(key)
+        return ImageResult(*value) if hit else None
+
+    def _cache_put(self, key: str, result: ImageResult, ttl: float | None = None):
+        if result.status not in (FOUND, NOT_FOUND):
+            return
+        if ttl is None:
+            ttl = self.found_ttl if result.found else self.not_found_ttl
+        if ttl <= 0:
+            return
+        self._cache.set(key, [result.status, result.url, result.provider], ttl)
+
+    def cache_items(self) -> list:
+        """
+        Returns (query_key, ImageResult, seconds_left) for every live in-memory cache entry.
+        """
+        now = time.time()
+        return [(key, ImageResult(*value), expires_at - now) for key, value, expires_at in self._cache.memory_items()]
+
+    def preload(self, query: str, result: ImageResult, ttl: float | None = None):
+        """
+        Seeds the in-memory cache with a known result (e.g. from a snapshot).
+        """
+        if result.status not in (FOUND, NOT_FOUND):
+            return
+        if ttl is None:
+            ttl = self.found_ttl if result.found else self.not_found_ttl
+        self._cache.preload(_cache_key(query), [result.status, result.url, result.provider], time.time() + ttl)
+
+    async def _call_provider(self, name: str, query: str) -> ImageResult:
+        breaker = self.breakers[name]
+        self.stats["provider_calls"] += 1
+        try:
+            await get_rate_limiter(name).acquire()
+            async with self._semaphore:
+                with track_upstream(name, "image_search"):
+                    result = await self.providers[name](query)
+        except asyncio.CancelledError:
+            # Lost the race; says nothing about the provider's health.
+            breaker.release()
+            raise
+        except DeadlineExceeded as e:
+            # Out of request time; not the provider's fault either.
+            breaker.release()
+            return ImageResult(ERROR, provider=name, error=str(e))
+        except ProviderRateLimited as e:
+            self.stats["provider_errors"] += 1
+            breaker.record_failure(open_for=e.retry_after or breaker.reset_timeout)
+            logger.warning("Image provider is rate limited; skipping it for a while", provider=name)
+            return ImageResult(ERROR, provider=name, error=str(e))
+        except (httpx.HTTPError, ValueError, KeyError) as e:
+            self.stats["provider_errors"] += 1
+            breaker.record_failure()
+            logger.warning("Image provider call failed", provider=name, query=query, error=str(e))
+            return ImageResult(ERROR, provider=name, error=str(e))
+
+        if result is None:
+            breaker.release()
+            return ImageResult(UNAVAILABLE, provider=name, error="provider not configured")
+        breaker.record_success()
+        return result
+
+    def _provider_order(self, preferred: str | None) -> list:
+        order = [name for name in DEFAULT_PROVIDER_ORDER if name in self.providers]
+        order += [name for name in self.providers if name not in order]
+        if preferred in order:
+            order.remove(preferred)
+            order.insert(0, preferred)
+        return order
+
+    async def _race(self, query: str, preferred: str | None):
+        """
+        Returns (result, cacheable). A "not found" is only cacheable when every
+        provider was asked and answered, so an outage isn't remembered as a miss.
+        """
+        candidates = []
+        skipped = False
+        for name in self._provider_order(preferred):
+            if self.breakers[name].allow():
+                candidates.append(name)
+            else:
+                skipped = True
+                self.stats["breaker_skips"] += 1
+        if not candidates:
+            return ImageResult(UNAVAILABLE, error="all image providers are unavailable"), False
+
+        pending = set()
+        results = []
+        next_index = 0
+
+        def _launch():
+            nonlocal next_index
+            name = candidates[next_index]
+            next_index += 1
+            pending.add(asyncio.create_task(self._call_provider(name, query)))
+
+        _launch()
+        try:
+            while pending:
+                can_hedge = next_index < len(candidates)
+                done, _ = await asyncio.wait(pending, timeout=self.hedge_delay if can_hedge else None,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    self.stats["hedges"] += 1
+                    RETRIES.inc(component="image_resolver", reason="hedge")
+                    _launch()
+                    continue
+                for task in done:
+                    pending.discard(task)
+                    result = task.result()
+                    if result.found:
+                        return result, True
+                    results.append(result)
+                if next_index < len(candidates):
+                    _launch()
+        finally:
+            for task in pending:
+                task.cancel()
+            for name in candidates[next_index:]:
+                self.breakers[name].release()
+
+        errors = [r for r in results if r.status == ERROR]
+        if any(r.status == NOT_FOUND for r in results):
+            result = ImageResult(NOT_FOUND, provider=", ".join(r.provider for r in results if r.status == NOT_FOUND))
+            return result, not errors and not skipped
+        if errors:
+            return ImageResult(ERROR, error="; ".join(f"{r.provider}: {r.error}" for r in errors)), False
+        return ImageResult(UNAVAILABLE, error="no image provider is configured"), False
+
+    async def resolve(self, query: str, preferred: str | None = None) -> ImageResult:
+        """
+        Resolves one image search query. Identical concurrent queries share one lookup.
+        """
+        key = _cache_key(query)
+        if not key:
+            return ImageResult(NOT_FOUND, error="empty query")
+        cached = self._cache_get(key)
+        if cached is not None:
+            return ImageResult(cached.status, cached.url, cached.provider, cached.error, cached=True)
+
+        task = self._inflight.get(key)
+        if task is None:
+            async def _run():
+                try:
+                    result, cacheable = await self._race(query, preferred)
+                    if cacheable:
+                        self._cache_put(key, result)
+                    return result
+                finally:
+                    self._inflight.pop(key, None)
+
+            task = asyncio.create_task(_run())
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def resolve_many(self, requests: list) -> list:
+        """
+        Resolves a batch of (query, preferred_provider) pairs at once and returns
+        the results in the same order. Duplicate queries are looked up once.
+        """
+        unique = {}
+        for query, preferred in requests:
+            unique.setdefault(_cache_key(query), (query, preferred))
+        keys = list(unique)
+        results = await asyncio.gather(*(self.resolve(*unique[key]) for key in keys))
+        by_key = dict(zip(keys, results))
+        return [by_key[_cache_key(query)] for query, _ in requests]
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        stats["cache"] = self._cache.get_stats()
+        stats["breakers"] = {name: breaker.state for name, breaker in self.breakers.items()}
+        return stats
+
+
+_image_resolver = None
+
+
+def get_image_resolver() -> ImageResolver:
+    """
+    Returns the process-wide image resolver, creating it on first use.
+    """
+    global _image_resolver
+    if _image_resolver is None:
+        _image_resolver = ImageResolver()
+    return _image_resolver
+
+
+_BREAKER_STATES = ("closed", "half_open", "open")
+
+
+def _collect_metrics() -> list:
+    if _image_resolver is None:
+        return []
+    stats = _image_resolver.get_stats()
+    cache = stats["cache"]
+    return cache_family("image", cache["memory_hits"], cache["misses"], shared_hit=cache["shared_hits"]) + [
+        ("image_breaker_state", "gauge", "Image provider circuit breaker state (1 for the current state).",
+         [({"provider": name, "state": s}, 1 if state == s else 0)
+          for name, state in stats["breakers"].items() for s in _BREAKER_STATES]),
+    ]
+
+
+REGISTRY.register_collector(_collect_metrics)
@@ -0,0 +1,336 @@
+# travel-companion-backend/utils/itinerary_editor.py
+
+import copy
+import asyncio
+from utils.geo import haversine_km, has_coordinates
+from utils.route_optimizer import estimate_travel_minutes
+from utils.itinerary_scheduler import build_schedule, continue_schedule
+from utils.itinerary_planner import PLANNER_LLM_TIMEOUT, day_summary, trip_source
+from utils.gemini_travel_planner import get_gemini_itinerary_details_async
+from utils.deadline import with_deadline
+from utils.log import get_logger
+from utils.metrics import RETRIES
+
+logger = get_logger("itinerary_editor")
+
+PLAN_OPERATIONS = ("add", "remove", "reorder")
+# Item types written by the scheduler that aren't visits to a place.
+_NON_VISIT_TYPES = ("travel", "meal")
+
+
+class PlanEditError(ValueError):
+    """
+    Raised when an edit operation doesn't fit the plan (unknown place,
+    duplicate title, wrong day, ...).
+    """
+
+
+def _key(title: str) -> str:
+    return " ".join((title or "").casefold().split())
+
+
+def _find_visit(items: list, title: str):
+    # The scheduler writes "Visit <title>"; Gemini's wording varies, so any
+    # visit mentioning the title is accepted when there's no exact match.
+    key = _key(title)
+    visits = [item for item in items if item.get("type") not in _NON_VISIT_TYPES]
+    for item in visits:
+        if _key(item.get("activity")) == f"visit {key}":
+            return item
+    for item in visits:
+        if key and key in _key(item.get("activity")):
+            return item
+    return None
+
+
+def new_plan_state(plan: dict, routes: list, start_location: str, mode: str, budgets: list) -> dict:
+    """
+    Builds the stored, editable form of a freshly planned itinerary: per day
+    its ordered places, route legs and scheduled items, plus the visit
+    details Gemini wrote (kept when the day is rescheduled after an edit).
+    """
+    days = []
+    # Single-day plans have no day summaries; the plan itself has the source.
+    summaries = plan.get("days") or [plan]
+    for day, (route, budget, summary) in enumerate(zip(routes, budgets, summaries), 1):
+        items = [item for item in plan["travelOptions"] if item.get("day", 1) == day]
+        details = {}
+        if summary.get("source") in ("llm", "hybrid"):
+            for place in route["places"]:
+                item = _find_visit(items, place.get("title"))
+                if item and item.get("details"):
+                    details[_key(place.get("title"))] = item["details"]
+        days.append({
+            "day": day,
+            "budgetMin": budget,
+            "start": route["start"],
+            "places": route["places"],
+            "legs": route["legs"],
+            "items": items,
+            "details": details,
+            "source": summary.get("source", "local"),
+            "fallbackReason": summary.get("fallbackReason"),
+        })
+    return {"startLocation": start_location, "mode": mode, "multiDay": len(routes) > 1, "days": days}
+
+
+def plan_response(state: dict) -> dict:
+    """
+    The stored plan in the shape /api/get-travel-details answers with.
+    """
+    summaries = []
+    travel_options = []
+    for day in state["days"]:
+        travel_options.extend(day["items"])
+        route = {"places": day["places"], "total_duration_min": sum(leg["duration_min"] for leg in day["legs"])}
+        plan = {"source": day["source"], "fallbackReason": day.get("fallbackReason")}
+        summaries.append(day_summary(day["day"], day["budgetMin"], route, plan))
+    if not state["multiDay"]:
+        response = {"travelOptions": travel_options, "source": summaries[0]["source"]}
+        if summaries[0].get("fallbackReason"):
+            response["fallbackReason"] = summaries[0]["fallbackReason"]
+        return response
+    return {"travelOptions": travel_options, "days": summaries, "source": trip_source(summaries)}
+
+
+def needs_llm(state: dict, operations: list) -> bool:
+    """
+    True if applying `operations` will ask Gemini for the details of new stops.
+    """
+    return state["mode"] != "fast" and any(op["op"] == "add" for op in operations)
+
+
+def _coords(point: dict):
+    # A route start carries {"lat", "lng"}; places carry latitude/longitude.
+    if point is None:
+        return None
+    if "coords" in point:
+        coords = point["coords"]
+        return (coords["lat"], coords["lng"]) if coords else None
+    return (point["latitude"], point["longitude"]) if has_coordinates(point) else None
+
+
+def _leg(origin: dict, origin_label: str, place: dict) -> dict:
+    a, b = _coords(origin), _coords(place)
+    distance_km = round(haversine_km(*a, *b), 2) if a and b else None
+    return {
+        "from": origin_label,
+        "to": place.get("title"),
+        "distance_km": distance_km,
+        "duration_min": estimate_travel_minutes(distance_km),
+    }
+
+
+def _insertion_cost(day: dict, position: int, place: dict) -> int:
+    # Extra travel minutes from visiting `place` at `position`.
+    places = day["places"]
+    prev = places[position - 1] if position > 0 else day["start"]
+    cost = _leg(prev, "", place)["duration_min"]
+    if position < len(places):
+        nxt = places[position]
+        cost += _leg(place, "", nxt)["duration_min"] - _leg(prev, "", nxt)["duration_min"]
+    return cost
+
+
+def _day(state: dict, number: int) -> dict:
+    if not 1 <= number <= len(state["days"]):
+        raise PlanEditError(f"day must be between 1 and {len(state['days'])}")
+    return state["days"][number - 1]
+
+
+def _index(day: dict, title: str) -> int:
+    key = _key(title)
+    for i, place in enumerate(day["places"]):
+        if _key(place.get("title")) == key:
+            return i
+    raise PlanEditError(f"{title!r} is not in day {day['day']}")
+
+
+def _apply(state: dict, op: dict, added: dict) -> int:
+    # Applies one operation and returns the number of the day it changed.
+    day = _day(state, op.get("day", 1))
+    kind = op["op"]
+    if kind == "add":
+        place = op.get("place")
+        if not place or not place.get("title"):
+            raise PlanEditError("add needs a place with a title")
+        key = _key(place["title"])
+        if any(_key(p.get("title")) == key for d in state["days"] for p in d["places"]):
+            raise PlanEditError(f"{place['title']!r} is already in the plan")
+        position = op.get("position")
+        if position is None:
+            # Cheapest insertion keeps the rest of the day's order as it is.
+            position = min(range(len(day["places"]) + 1), key=lambda i: _insertion_cost(day, i, place))
+        day["places"].insert(min(position, len(day["places"])), place)
+        added.setdefault(day["day"], set()).add(key)
+    elif kind == "remove":
+        place = day["places"].pop(_index(day, op.get("title")))
+        key = _key(place.get("title"))
+        day["details"].pop(key, None)
+        added.get(day["day"], set()).discard(key)
+    elif kind == "reorder":
+        titles = op.get("titles") or []
+        if sorted(_key(t) for t in titles) != sorted(_key(p.get("title")) for p in day["places"]):
+            raise PlanEditError(f"reorder must list every place of day {day['day']} exactly once")
+        day["places"] = [day["places"][_index(day, title)] for title in titles]
+    else:
+        raise PlanEditError(f"unknown operation {kind!r}; expected one of {', '.join(PLAN_OPERATIONS)}")
+    return day["day"]
+
+
+def _relink(day: dict) -> int:
+    """
+    Rebuilds a day's legs for its current place order. Legs between the
+    same two stops as before are kept; only the new pairs are computed.
+    Returns how many legs were computed.
+    """
+    known = {(leg["from"], leg["to"]): leg for leg in day["legs"]}
+    legs, computed = [], 0
+    prev, prev_label = day["start"], day["start"]["label"]
+    for place in day["places"]:
+        leg = known.get((prev_label, place.get("title")))
+        if leg is None:
+            leg = _leg(prev, prev_label, place)
+            computed += 1
+        legs.append(leg)
+        prev, prev_label = place, place.get("title")
+    day["legs"] = legs
+    return computed
+
+
+def _visit_positions(items: list, keys: list):
+    # Index of each stop's visit item in `items`, or None if they can't all
+    # be found in stop order.
+    positions = []
+    for key in keys:
+        visit = _find_visit(items, key)
+        index = next((i for i, item in enumerate(items) if item is visit), None)
+        if index is None or (positions and index <= positions[-1]):
+            return None
+        positions.append(index)
+    return positions
+
+
+def _reschedule(day: dict, old_keys: list, multi_day: bool):
+    """
+    Re-times a day after an edit. Items before the first changed stop are
+    kept as they are; from there each stop reuses its previous visit item,
+    and the travel leading to it when it has the same predecessor as before,
+    so Gemini's wording survives and only the time slots move.
+    """
+    keys = [_key(place.get("title")) for place in day["places"]]
+    positions = _visit_positions(day["items"], old_keys)
+    if positions is None:
+        _rebuild(day, multi_day)
+        return
+
+    first = next((i for i, (old, new) in enumerate(zip(old_keys, keys)) if old != new), min(len(old_keys), len(keys)))
+    items = day["items"]
+    old_index = {key: i for i, key in enumerate(old_keys)}
+    blocks = []
+    for i, key in enumerate(keys[first:], first):
+        j = old_index.get(key)
+        if j is None:
+            blocks.append((None, None))
+            continue
+        same_leg = (old_keys[j - 1] if j else None) == (keys[i - 1] if i else None)
+        lead = items[positions[j - 1] + 1 if j else 0:positions[j]] if same_leg else None
+        blocks.append((lead, items[positions[j]]))
+    kept = items[:positions[first - 1] + 1] if first else []
+    tail = items[positions[-1] + 1:] if positions else items
+    meal = next((item for item in items[len(kept):] if item.get("type") == "meal"), None)
+
+    plan = continue_schedule({"places": day["places"], "legs": day["legs"]}, day["start"]["label"],
+                             kept, blocks, tail, meal)
+    for place, (lead, visit) in zip(day["places"][first:], blocks):
+        text = day["details"].get(_key(place.get("title")))
+        item = _find_visit(plan["travelOptions"], place.get("title")) if visit is None and text else None
+        if item is not None:
+            item["details"] = text
+    if multi_day:
+        for item in plan["travelOptions"]:
+            item.setdefault("day", day["day"])
+    day["items"] = plan["travelOptions"]
+    if day["source"] == "llm" and any(lead is None or visit is None for lead, visit in blocks):
+        day["source"] = "hybrid"
+
+
+def _rebuild(day: dict, multi_day: bool):
+    # Without the previous visits to anchor on, the day's items are rebuilt
+    # locally; Gemini-written visit details are carried over by place.
+    plan = build_schedule({"places": day["places"], "legs": day["legs"]}, day["start"]["label"])
+    for place in day["places"]:
+        text = day["details"].get(_key(place.get("title")))
+        item = _find_visit(plan["travelOptions"], place.get("title")) if text else None
+        if item is not None:
+            item["details"] = text
+    if multi_day:
+        for item in plan["travelOptions"]:
+            item["day"] = day["day"]
+    day["items"] = plan["travelOptions"]
+    day["source"] = "hybrid" if day["details"] else "local"
+    day["fallbackReason"] = None
+
+
+async def _describe_new_stops(day: dict, keys: set) -> int:
+    # One Gemini call per day for just the visits to the new stops.
+    places = [p for p in day["places"] if _key(p.get("title")) in keys]
+    visits = [_find_visit(day["items"], p.get("title")) for p in places]
+    pairs = [(p, v) for p, v in zip(places, visits) if v is not None]
+    if not pairs:
+        return 0
+    try:
+        details = await with_deadline(
+            get_gemini_itinerary_details_async([v for _, v in pairs], [p for p, _ in pairs], day["start"]["label"]),
+            PLANNER_LLM_TIMEOUT,
+        )
+    except asyncio.TimeoutError:
+        logger.warning("Gemini details for new stops timed out; keeping local details", day=day["day"])
+        RETRIES.inc(component="itinerary_editor", reason="details_timeout")
+        details = None
+    if not details:
+        return 0
+    for (place, visit), text in zip(pairs, details):
+        visit["details"] = text
+        day["details"][_key(place.get("title"))] = text
+    day["source"] = "hybrid"
+    return len(pairs)
+
+
+async def edit_plan(state: dict, operations: list) -> tuple:
+    """
+    Applies add/remove/reorder operations to a stored plan state.
+
+    Only the days the operations touch are rescheduled, from their first
+    changed stop onwards, and within them only legs between stops that
+    weren't adjacent before are computed (locally, from coordinates). Other days keep their items untouched. Gemini is
+    only asked for the descriptive text of added stops, and only for plans
+    made in "llm" or "hybrid" mode.
+
+    Raises:
+        PlanEditError: If an operation doesn't fit the plan; nothing is changed.
+
+    Returns:
+        tuple: (new state, {"daysRescheduled", "legsComputed", "describedStops"})
+    """
+    state = copy.deepcopy(state)
+    before = {day["day"]: [_key(place.get("title")) for place in day["places"]] for day in state["days"]}
+    added = {}
+    touched = []
+    for op in operations:
+        number = _apply(state, op, added)
+        if number not in touched:
+            touched.append(number)
+
+    legs_computed = 0
+    for number in touched:
+        day = state["days"][number - 1]
+        legs_computed += _relink(day)
+        _reschedule(day, before[number], state["multiDay"])
+
+    described = 0
+    if state["mode"] != "fast":
+        counts = await asyncio.gather(*(_describe_new_stops(state["days"][number - 1], keys)
+                                        for number, keys in added.items() if keys))
+        described = sum(counts)
+    return state, {"daysRescheduled": sorted(touched), "legsComputed": legs_computed, "describedStops": described}
@@ -0,0 +1,268 @@
+# travel-companion-backend/utils/itinerary_planner.py
+
+import os
+import asyncio
+from utils.settings import load_env
+from utils.route_optimizer import optimize_route, plan_route_async
+from utils.itinerary_scheduler import ITINERARY_VISIT_MIN, build_schedule
+from utils.geocode_utils import get_coordinates_from_address_async
+from utils.trip_clustering import TRIP_DAY_BUDGET_MIN, cluster_days
+from utils.gemini_travel_planner import (
+    get_gemini_travel_details_async,
+    get_gemini_itinerary_details_async,
+    stream_gemini_travel_details,
+)
+from utils.deadline import with_deadline
+from utils.log import get_logger
+from utils.metrics import RETRIES, STAGE_SECONDS
+
+load_env()
+
+# "fast": local schedule only. "llm": Gemini writes the whole plan (falls back
+# to the local schedule on failure). "hybrid": local schedule, Gemini only
+# writes the `details` text.
+PLANNER_MODES = ("fast", "llm", "hybrid")
+PLANNER_LLM_TIMEOUT = float(os.getenv("PLANNER_LLM_TIMEOUT", "25"))
+TRIP_MAX_DAYS = int(os.getenv("TRIP_MAX_DAYS", "14"))
+
+logger = get_logger("itinerary_planner")
+
+
+def _local_plan(route: dict, start_location: str, source: str = "local", fallback_reason: str | None = None) -> dict:
+    with STAGE_SECONDS.time(stage="schedule"):
+        plan = build_schedule(route, start_location)
+    plan["source"] = source
+    if fallback_reason:
+        RETRIES.inc(component="itinerary_planner", reason="local_fallback")
+        plan["fallbackReason"] = fallback_reason
+    return plan
+
+
+async def plan_itinerary(selected_places: list, start_location: str, mode: str = "llm", days: int = 1,
+                         daily_minutes: list | None = None) -> dict:
+    """
+    Plans a day for the selected places in the requested mode, or a trip of
+    `days` days (see plan_trip).
+
+    Returns:
+        dict: The travel plan with a `travelOptions` list and a `source` field
+              ("local", "llm" or "hybrid") telling which path produced it.
+    """
+    plan, _ = await plan_itinerary_with_routes(selected_places, start_location, mode, days, daily_minutes)
+    return plan
+
+
+async def plan_itinerary_with_routes(selected_places: list, start_location: str, mode: str = "llm", days: int = 1,
+                                     daily_minutes: list | None = None) -> tuple:
+    """
+    Same as plan_itinerary, but also returns the optimized route of every
+    day (in day order), which stored plans are edited from.
+
+    Returns:
+        tuple: (plan, routes)
+    """
+    if mode not in PLANNER_MODES:
+        raise ValueError(f"Unknown planner mode: {mode}")
+    if days > 1:
+        return await _plan_trip(selected_places, start_location, days, daily_minutes, mode)
+
+    # Order the places locally from their coordinates; Gemini only has to
+    # write the schedule for the given order and leg estimates.
+    with STAGE_SECONDS.time(stage="route"):
+        route = await plan_route_async(selected_places, start_location)
+    return await _plan_day(route, start_location, mode), [route]
+
+
+async def _plan_day(route: dict, start_location: str, mode: str) -> dict:
+    if mode == "fast":
+        return _local_plan(route, start_location)
+
+    if mode == "hybrid":
+        plan = _local_plan(route, start_location)
+        try:
+            details = await with_deadline(
+                get_gemini_itinerary_details_async(plan["travelOptions"], route["places"], start_location),
+                PLANNER_LLM_TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Gemini itinerary details timed out; keeping local details", timeout=PLANNER_LLM_TIMEOUT)
+            RETRIES.inc(component="itinerary_planner", reason="details_timeout")
+            details = None
+        if details:
+            for item, text in zip(plan["travelOptions"], details):
+                item["details"] = text
+            plan["source"] = "hybrid"
+        return plan
+
+    try:
+        travel_plan = await with_deadline(
+            get_gemini_travel_details_async(route["places"], start_location, route=route),
+            PLANNER_LLM_TIMEOUT,
+        )
+    except asyncio.TimeoutError:
+        travel_plan = {"error": "Gemini did not answer in time"}
+
+    if not isinstance(travel_plan, dict) or "error" in travel_plan or not isinstance(travel_plan.get("travelOptions"), list):
+        reason = travel_plan.get("error", "Invalid travel plan") if isinstance(travel_plan, dict) else "Invalid travel plan"
+        logger.warning("Falling back to local itinerary", reason=reason)
+        return _local_plan(route, start_location, fallback_reason=reason)
+
+    travel_plan["source"] = "llm"
+    return travel_plan
+
+
+def day_budgets(days: int, daily_minutes: list | None = None) -> list:
+    """
+    Time budget in minutes for each of `days` days. A single value applies
+    to every day; missing days get the last given value (or the default).
+    """
+    if not 1 <= days <= TRIP_MAX_DAYS:
+        raise ValueError(f"days must be between 1 and {TRIP_MAX_DAYS}")
+    given = [int(m) for m in daily_minutes or ()][:days] or [TRIP_DAY_BUDGET_MIN]
+    return given + [given[-1]] * (days - len(given))
+
+
+async def _trip_routes(selected_places: list, start_location: str, budgets: list) -> list:
+    # Geocode the start once; every day starts there.
+    with STAGE_SECONDS.time(stage="route"):
+        start_coords = await get_coordinates_from_address_async(start_location) if start_location else None
+    with STAGE_SECONDS.time(stage="cluster"):
+        groups = cluster_days(selected_places, budgets, start_coords)
+    with STAGE_SECONDS.time(stage="route"):
+        return [optimize_route(group, start_coords, start_location or "Starting Location") for group in groups]
+
+
+def day_summary(day: int, budget: int, route: dict, plan: dict) -> dict:
+    planned = route["total_duration_min"] + sum(int(p.get("visit_duration_min") or ITINERARY_VISIT_MIN)
+                                                 for p in route["places"])
+    summary = {
+        "day": day,
+        "budgetMin": budget,
+        "plannedMin": planned,
+        "overBudget": planned > budget,
+        "places": [p.get("title") for p in route["places"]],
+        "source": plan["source"],
+    }
+    if plan.get("fallbackReason"):
+        summary["fallbackReason"] = plan["fallbackReason"]
+    return summary
+
+
+async def _plan_trip_day(day: int, route: dict, start_location: str, mode: str) -> tuple:
+    if not route["places"]:
+        return day, {"travelOptions": [], "source": "local"}
+    plan = await _plan_day(route, start_location, mode)
+    for item in plan["travelOptions"]:
+        item["day"] = day
+    return day, plan
+
+
+def trip_source(summaries: list) -> str:
+    sources = {s["source"] for s in summaries if s["places"]}
+    return sources.pop() if len(sources) == 1 else ("mixed" if sources else "local")
+
+
+async def plan_trip(selected_places: list, start_location: str, days: int, daily_minutes: list | None = None,
+                    mode: str = "llm") -> dict:
+    """
+    Plans a multi-day trip: the places are clustered geographically into
+    `days` groups balanced by visit time against each day's budget
+    (`daily_minutes`), and every day is planned in parallel in `mode`, so
+    the trip takes about as long as its slowest day.
+
+    Returns:
+        dict: `travelOptions` for the whole trip (every item tagged with its
+              `day`), one summary per day in `days` and the overall `source`
+              ("mixed" when days came from different paths).
+    """
+    plan, _ = await _plan_trip(selected_places, start_location, days, daily_minutes, mode)
+    return plan
+
+
+async def _plan_trip(selected_places: list, start_location: str, days: int, daily_minutes: list | None,
+                     mode: str) -> tuple:
+    budgets = day_budgets(days, daily_minutes)
+    routes = await _trip_routes(selected_places, start_location, budgets)
+    results = await asyncio.gather(*(_plan_trip_day(day, route, start_location, mode)
+                                     for day, route in enumerate(routes, 1)))
+
+    travel_options, summaries = [], []
+    for (day, plan), budget, route in zip(results, budgets, routes):
+        travel_options.extend(plan["travelOptions"])
+        summaries.append(day_summary(day, budget, route, plan))
+    return {"travelOptions": travel_options, "days": summaries, "source": trip_source(summaries)}, routes
+
+
+async def _stream_trip(selected_places: list, start_location: str, days: int, daily_minutes: list | None,
+                       mode: str):
+    # Days are planned in parallel and each day's items are streamed as soon
+    # as that day is done, so they can arrive out of day order.
+    budgets = day_budgets(days, daily_minutes)
+    routes = await _trip_routes(selected_places, start_location, budgets)
+    tasks = [asyncio.create_task(_plan_trip_day(day, route, start_location, mode))
+             for day, route in enumerate(routes, 1)]
+    summaries = {}
+    count = 0
+    try:
+        for finished in asyncio.as_completed(tasks):
+            day, plan = await finished
+            for item in plan["travelOptions"]:
+                count += 1
+                yield "item", {"item": item}
+            summaries[day] = day_summary(day, budgets[day - 1], routes[day - 1], plan)
+            yield "day", summaries[day]
+    finally:
+        for task in tasks:
+            task.cancel()
+    ordered = [summaries[day] for day in sorted(summaries)]
+    yield "done", {"count": count, "source": trip_source(ordered), "days": ordered}
+
+
+async def stream_itinerary(selected_places: list, start_location: str, mode: str = "llm", days: int = 1,
+                           daily_minutes: list | None = None):
+    """
+    Streams a travel plan as ("item", {"item": ...}) events followed by one
+    ("done", {...}) event carrying the item count, `source` and, when the
+    Gemini stream broke off after some items, `partial`.
+
+    Only "llm" mode streams from Gemini; the local modes are fast enough to be
+    emitted in one go. If Gemini fails before producing any item, the local
+    schedule is streamed instead.
+
+    Multi-day trips stream each day's items once that day is planned, followed
+    by a ("day", summary) event; "done" then also carries the `days` summaries.
+    """
+    if days > 1:
+        async for event in _stream_trip(selected_places, start_location, days, daily_minutes, mode):
+            yield event
+        return
+
+    if mode != "llm":
+        plan = await plan_itinerary(selected_places, start_location, mode)
+        for item in plan["travelOptions"]:
+            yield "item", {"item": item}
+        yield "done", {"count": len(plan["travelOptions"]), "source": plan["source"]}
+        return
+
+    with STAGE_SECONDS.time(stage="route"):
+        route = await plan_route_async(selected_places, start_location)
+    count = 0
+    try:
+        async for item in stream_gemini_travel_details(selected_places, start_location, route=route,
+                                                       timeout=PLANNER_LLM_TIMEOUT):
+            count += 1
+            yield "item", {"item": item}
+    except Exception as e:
+        reason = str(e) or type(e).__name__
+        if count:
+            logger.warning("Gemini travel plan stream broke off", items=count, reason=reason)
+            yield "done", {"count": count, "source": "llm", "partial": True}
+            return
+        logger.warning("Falling back to local itinerary", reason=reason)
+        plan = _local_plan(route, start_location, fallback_reason=reason)
+        for item in plan["travelOptions"]:
+            yield "item", {"item": item}
+        yield "done", {"count": len(plan["travelOptions"]), "source": plan["source"], "fallbackReason": reason}
+        return
+
+    yield "done", {"count": count, "source": "llm"}
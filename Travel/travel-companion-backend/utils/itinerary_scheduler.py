@@ -0,0 +1,322 @@
+# travel-companion-backend/utils/itinerary_scheduler.py
+
+import os
+import re
+from utils.settings import load_env
+
+load_env()
+
+MINUTES_PER_DAY = 24 * 60
+
+# Default dwell time at an attraction when the place doesn't carry its own
+# 'visit_duration_min'.
+ITINERARY_VISIT_MIN = int(os.getenv("ITINERARY_VISIT_MIN", "90"))
+# Visits cut short by closing time are still scheduled for at least this long.
+ITINERARY_MIN_VISIT_MIN = int(os.getenv("ITINERARY_MIN_VISIT_MIN", "30"))
+ITINERARY_DAY_START = os.getenv("ITINERARY_DAY_START", "9:00 AM")
+# The lunch break is taken at the first free moment after ITINERARY_LUNCH_AFTER.
+ITINERARY_LUNCH_AFTER = os.getenv("ITINERARY_LUNCH_AFTER", "12:00 PM")
+ITINERARY_LUNCH_MIN = int(os.getenv("ITINERARY_LUNCH_MIN", "60"))
+# Time slots are rounded up to this many minutes so the plan reads naturally.
+ITINERARY_SLOT_ROUNDING_MIN = int(os.getenv("ITINERARY_SLOT_ROUNDING_MIN", "5"))
+
+_TIME = r"(\d{1,2})(?:[:.](\d{2}))?\s*([ap])?\.?\s*(?:m\b\.?)?"
+_TIME_RE = re.compile(r"^\s*" + _TIME + r"\s*$", re.IGNORECASE)
+_RANGE_RE = re.compile(_TIME + r"\s*(?:-|–|—|to|until|till)\s*" + _TIME, re.IGNORECASE)
+_ALWAYS_OPEN_RE = re.compile(r"24\s*(?:hours|hrs|x\s*7|/\s*7)|round the clock|always open", re.IGNORECASE)
+_SUNRISE_RE = re.compile(r"sunrise\s*(?:-|–|to|till|until)\s*sunset", re.IGNORECASE)
+
+
+def _to_minutes(hour: str, minute: str | None, meridiem: str | None) -> int | None:
+    h, m = int(hour), int(minute or 0)
+    if m > 59:
+        return None
+    if meridiem:
+        if not 1 <= h <= 12:
+            return None
+        h = h % 12 + (12 if meridiem.lower() == "p" else 0)
+    elif h > 24:
+        return None
+    return h * 60 + m
+
+
+def parse_clock(text: str) -> int:
+    """
+    Parses a clock time like "9:00 AM" or "14:30" into minutes after midnight.
+    """
+    match = _TIME_RE.match(text or "")
+    if not match:
+        raise ValueError(f"Unrecognized time: {text!r}")
+    minutes = _to_minutes(*match.groups())
+    if minutes is None:
+        raise ValueError(f"Unrecognized time: {text!r}")
+    return minutes
+
+
+def format_clock(minutes: int) -> str:
+    """
+    Formats minutes after midnight the way itinerary time slots are written ("9:05 AM").
+    """
+    minutes = int(minutes) % MINUTES_PER_DAY
+    h, m = divmod(minutes, 60)
+    return f"{h % 12 or 12}:{m:02d} {'AM' if h < 12 else 'PM'}"
+
+
+def _range_minutes(h1, m1, ap1, h2, m2, ap2):
+    ap1, ap2 = ap1 or None, ap2 or None
+    # "9 - 5 PM" style: the second meridiem applies to the first time,
+    # unless that would make the range end before it starts.
+    if ap2 and not ap1:
+        start = _to_minutes(h1, m1, ap2)
+        end = _to_minutes(h2, m2, ap2)
+        if start is not None and end is not None and start >= end:
+            start = _to_minutes(h1, m1, "a")
+        return start, end
+    return _to_minutes(h1, m1, ap1), _to_minutes(h2, m2, ap2 or (ap1 if ap1 and not ap2 else None))
+
+
+def parse_time_slot(text: str):
+    """
+    Parses an itinerary time slot like "9:00 AM - 10:30 AM".
+
+    Returns:
+        tuple | None: (start, end) in minutes after midnight, or None if the
+                      slot can't be read.
+    """
+    match = _RANGE_RE.search(text or "")
+    if not match:
+        return None
+    start, end = _range_minutes(*match.groups())
+    if start is None or end is None or end < start:
+        return None
+    return start, end
+
+
+def parse_visiting_hours(text: str):
+    """
+    Parses a free-text visiting hours string into opening windows.
+
+    Returns:
+        list | None: Sorted (open, close) pairs in minutes after midnight, or
+                     None if no hours could be recognized (treated as always open).
+    """
+    if not text:
+        return None
+    if _ALWAYS_OPEN_RE.search(text):
+        return [(0, MINUTES_PER_DAY)]
+    if _SUNRISE_RE.search(text):
+        return [(6 * 60, 18 * 60 + 30)]
+
+    windows = []
+    for groups in _RANGE_RE.findall(text):
+        open_min, close_min = _range_minutes(*groups)
+        if open_min is None or close_min is None:
+            continue
+        if close_min <= open_min:
+            # Overnight opening ("6 PM - 2 AM"): good until midnight for a day plan.
+            close_min = MINUTES_PER_DAY
+        windows.append((open_min, close_min))
+    return sorted(windows) or None
+
+
+def _fit_visit(arrival: int, windows):
+    """
+    Returns (start, close, note) for a visit that can begin at `arrival`.
+    """
+    if windows is None:
+        return arrival, None, None
+    for open_min, close_min in windows:
+        if close_min > arrival:
+            if open_min > arrival:
+                return open_min, close_min, f"Opens at {format_clock(open_min)}."
+            return arrival, close_min, None
+    return arrival, None, "It may be closed at this time; please check the visiting hours."
+
+
+def _round_up(minutes: int) -> int:
+    step = max(1, ITINERARY_SLOT_ROUNDING_MIN)
+    return -(-minutes // step) * step
+
+
+def _first_sentence(text: str) -> str:
+    if not text or text == "N/A":
+        return ""
+    match = re.match(r"(.+?[.!?])(\s|$)", text.strip())
+    return match.group(1) if match else text.strip()
+
+
+def _travel_item(start: int, end: int, leg: dict, from_label: str, to_label: str) -> dict:
+    details = f"Estimated travel time: {leg['duration_min']} minutes by taxi/ride-share"
+    if leg.get("distance_km") is not None:
+        details += f" (about {leg['distance_km']} km)"
+    return {
+        "time_slot": f"{format_clock(start)} - {format_clock(end)}",
+        "activity": f"Travel from {from_label} to {to_label}",
+        "location": f"{from_label} to {to_label}",
+        "details": details + ".",
+        "type": "travel",
+    }
+
+
+def _meal_item(start: int, near: str) -> dict:
+    return {
+        "time_slot": f"{format_clock(start)} - {format_clock(start + ITINERARY_LUNCH_MIN)}",
+        "activity": "Lunch Break",
+        "location": f"Restaurant near {near}",
+        "details": "Take a break for lunch at a nearby restaurant and try the local cuisine.",
+        "type": "meal",
+    }
+
+
+def _visit_item(start: int, end: int, place: dict, title: str, note: str | None) -> dict:
+    parts = [_first_sentence(place.get("summary", ""))]
+    if note:
+        parts.append(note)
+    hours = place.get("visiting_hours")
+    if hours and hours != "N/A":
+        parts.append(f"Visiting hours: {hours}")
+    address = place.get("address")
+    return {
+        "time_slot": f"{format_clock(start)} - {format_clock(end)}",
+        "activity": f"Visit {title}",
+        "location": address if address and address != "N/A" else title,
+        "details": " ".join(p for p in parts if p) or f"Explore {title}.",
+        "type": "attraction",
+    }
+
+
+def build_schedule(route: dict, start_location: str, day_start: str = ITINERARY_DAY_START) -> dict:
+    """
+    Builds a single-day itinerary from an optimized route without calling an LLM.
+
+    Args:
+        route (dict): Output of route_optimizer.optimize_route.
+        start_location (str): The user's starting address for the day.
+        day_start (str): Clock time the day starts at.
+
+    Returns:
+        dict: {"travelOptions": [...]} with the same item shape Gemini produces
+              (`time_slot`, `activity`, `location`, `details`, `type`).
+    """
+    lunch_after = parse_clock(ITINERARY_LUNCH_AFTER)
+    t = _round_up(parse_clock(day_start))
+    lunch_taken = False
+    items = []
+    prev_label = start_location
+
+    for position, (place, leg) in enumerate(zip(route["places"], route["legs"])):
+        title = place.get("title", f"Place {position + 1}")
+        if not lunch_taken and t >= lunch_after:
+            items.append(_meal_item(t, prev_label))
+            t += ITINERARY_LUNCH_MIN
+            lunch_taken = True
+
+        arrival = _round_up(t + leg["duration_min"])
+        items.append(_travel_item(t, arrival, leg, prev_label, title))
+        t = arrival
+
+        visit_start, close_min, note = _fit_visit(t, parse_visiting_hours(place.get("visiting_hours")))
+        dwell = int(place.get("visit_duration_min") or ITINERARY_VISIT_MIN)
+        visit_end = _round_up(visit_start + dwell)
+        if close_min is not None and visit_end > close_min:
+            visit_end = max(close_min, visit_start + ITINERARY_MIN_VISIT_MIN)
+        items.append(_visit_item(visit_start, visit_end, place, title, note))
+        t = visit_end
+        prev_label = title
+
+    # A day that runs past lunchtime still gets its lunch break at the end.
+    if not lunch_taken and t > lunch_after and items:
+        items.append(_meal_item(t, prev_label))
+
+    return {"travelOptions": items}
+
+
+def _retime(item: dict, start: int) -> tuple:
+    # Moves an item to `start`, keeping its duration and text.
+    slot = parse_time_slot(item.get("time_slot"))
+    end = start + (slot[1] - slot[0] if slot else 0)
+    return dict(item, time_slot=f"{format_clock(start)} - {format_clock(end)}"), end
+
+
+def continue_schedule(route: dict, start_location: str, kept: list, blocks: list, tail: list,
+                      meal: dict = None, day_start: str = ITINERARY_DAY_START) -> dict:
+    """
+    Re-times a day after an edit from its first changed stop onwards. The
+    items before that stop stay exactly as they are.
+
+    Args:
+        route (dict): The day's places and legs after the edit.
+        start_location (str): The user's starting address for the day.
+        kept (list): Items up to the visit of the last unchanged stop.
+        blocks (list): One (lead, visit) pair per stop after those. `lead` is
+                       the previous items leading to the stop (its travel leg,
+                       a meal, ...) when they still apply, `visit` its previous
+                       visit item; either is None to schedule it afresh.
+                       Reused items keep their text and duration.
+        tail (list): Items that followed the last visit, moved after the new last one.
+        meal (dict): The day's previous lunch item, reused wherever lunch now falls.
+
+    Returns:
+        dict: {"travelOptions": [...]} like build_schedule.
+    """
+    lunch_after = parse_clock(ITINERARY_LUNCH_AFTER)
+    items = list(kept)
+    slot = parse_time_slot(kept[-1].get("time_slot")) if kept else None
+    t = slot[1] if slot else _round_up(parse_clock(day_start))
+    lunch_taken = any(item.get("type") == "meal" for item in kept)
+    first = len(route["places"]) - len(blocks)
+    prev_label = route["places"][first - 1].get("title", f"Place {first}") if first else start_location
+
+    def _lunch(start: int, near: str) -> tuple:
+        if meal is None:
+            return _meal_item(start, near), start + ITINERARY_LUNCH_MIN
+        return _retime(meal, start)
+
+    stops = zip(route["places"][first:], route["legs"][first:], blocks)
+    for position, (place, leg, (lead, visit)) in enumerate(stops, first):
+        title = place.get("title", f"Place {position + 1}")
+        if not lunch_taken and t >= lunch_after:
+            item, t = _lunch(t, prev_label)
+            items.append(item)
+            lunch_taken = True
+
+        if lead is None:
+            arrival = _round_up(t + leg["duration_min"])
+            items.append(_travel_item(t, arrival, leg, prev_label, title))
+            t = arrival
+        else:
+            for item in lead:
+                if item.get("type") == "meal":
+                    if lunch_taken:
+                        continue
+                    lunch_taken = True
+                item, t = _retime(item, t)
+                items.append(item)
+
+        visit_start, close_min, note = _fit_visit(t, parse_visiting_hours(place.get("visiting_hours")))
+        old_slot = parse_time_slot(visit.get("time_slot")) if visit else None
+        if old_slot and old_slot[1] > old_slot[0]:
+            dwell = old_slot[1] - old_slot[0]
+        else:
+            dwell = int(place.get("visit_duration_min") or ITINERARY_VISIT_MIN)
+        visit_end = _round_up(visit_start + dwell)
+        if close_min is not None and visit_end > close_min:
+            visit_end = max(close_min, visit_start + ITINERARY_MIN_VISIT_MIN)
+        if visit is None:
+            items.append(_visit_item(visit_start, visit_end, place, title, note))
+        else:
+            items.append(dict(visit, time_slot=f"{format_clock(visit_start)} - {format_clock(visit_end)}"))
+        t = visit_end
+        prev_label = title
+
+    for item in tail:
+        if item.get("type") == "meal":
+            if lunch_taken:
+                continue
+            lunch_taken = True
+        item, t = _retime(item, t)
+        items.append(item)
+
+    if not lunch_taken and t > lunch_after and items:
+        items.append(_lunch(t, prev_label)[0])
+    return {"travelOptions": items}
@@ -0,0 +1,163 @@
+# travel-companion-backend/utils/json_stream.py
+
+import json
+
+
+class JsonArrayItemParser:
+    """
+    Incremental parser that pulls complete objects out of a JSON array while
+    the text is still arriving.
+
+    Feed it chunks of model output; every object in the target array is
+    returned as soon as its closing brace arrives. Text before the JSON (code
+    fences, chatter, even bracketed asides) and after it is ignored, and every
+    object that closed before a truncated tail is still recovered. A top-level
+    array only starts at a "["; a keyed one at the first "{" that turns out
+    to hold the key.
+
+    Args:
+        array_key (str | None): None targets a top-level array. Otherwise the
+                                items of the first array stored under this key
+                                (e.g. "travelOptions") are returned.
+    """
+
+    def __init__(self, array_key: str | None = None):
+        self.array_key = array_key
+        self.items_parsed = 0
+        self.items_failed = 0
+        self._buf = ""
+        self._i = 0
+        # One entry per open container: [kind, last_key, expect_key, is_target]
+        self._stack = []
+        self._started = False
+        self._done = False
+        self._target_found = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._item_start = None
+        self._item_depth = None
+
+    @property
+    def done(self) -> bool:
+        """True once the root JSON value has been closed."""
+        return self._done
+
+    def _open(self, kind: str):
+        parent = self._stack[-1] if self._stack else None
+        is_target = False
+        if kind == "[" and not self._target_found:
+            if self.array_key is None:
+                is_target = parent is None
+            else:
+                is_target = parent is not None and parent[0] == "{" and parent[1] == self.array_key
+            self._target_found = is_target
+        elif kind == "{" and parent is not None and parent[3] and self._item_start is None:
+            self._item_start = self._i
+            self._item_depth = len(self._stack) + 1
+        self._stack.append([kind, None, kind == "{", is_target])
+
+    def _close(self, items: list):
+        if not self._stack:
+            return
+        self._stack.pop()
+        if self._item_start is not None and len(self._stack) == self._item_depth - 1:
+            raw = self._buf[self._item_start:self._i + 1]
+            self._item_start = None
+            self._item_depth = None
+            try:
+                items.append(json.loads(raw))
+                self.items_parsed += 1
+            except json.JSONDecodeError:
+                self.items_failed += 1
+        if not self._stack:
+            # A braced aside ("see {below}") closes without the target array;
+            # the JSON is still ahead, so scanning starts over.
+            if self._target_found:
+                self._done = True
+            else:
+                self._started = False
+
+    def feed(self, chunk: str) -> list:
+        """
+        Consumes the next chunk of text and returns the items completed by it.
+        """
+        items = []
+        if self._done or not chunk:
+            return items
+        self._buf += chunk
+        buf = self._buf
+
+        while self._i < len(buf) and not self._done:
+            c = buf[self._i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    top = self._stack[-1] if self._stack else None
+                    if top is not None and top[0] == "{" and top[2]:
+                        try:
+                            top[1] = json.loads(buf[self._string_start:self._i + 1])
+                        except json.JSONDecodeError:
+                            top[1] = None
+                    self._string_start = None
+            elif not self._started:
+                if c == "[":
+                    # Chatter can contain brackets ("[see below]"); only an
+                    # array that starts with an object, or is empty, is the JSON.
+                    j = self._i + 1
+                    while j < len(buf) and buf[j].isspace():
+                        j += 1
+                    if j == len(buf):
+                        break   # decided by the next chunk
+                    if buf[j] in "{]":
+                        self._started = True
+                        self._open(c)
+                elif c == "{" and self.array_key is not None:
+                    self._started = True
+                    self._open(c)
+            elif c == '"':
+                self._in_string = True
+                self._string_start = self._i
+            elif c in "[{":
+                self._open(c)
+            elif c in "]}":
+                self._close(items)
+            elif c == ":" and self._stack and self._stack[-1][0] == "{":
+                self._stack[-1][2] = False
+            elif c == "," and self._stack and self._stack[-1][0] == "{":
+                self._stack[-1][2] = True
+            self._i += 1
+
+        # Drop text that no pending item or key can refer back to.
+        keep_from = min(i for i in (self._item_start, self._string_start, self._i) if i is not None)
+        if keep_from > 0:
+            self._buf = self._buf[keep_from:]
+            self._i -= keep_from
+            if self._item_start is not None:
+                self._item_start -= keep_from
+            if self._string_start is not None:
+                self._string_start -= keep_from
+        return items
+
+
+def chunk_text(chunk) -> str:
+    """
+    Returns the text of one streamed Gemini response chunk. Chunks can carry
+    non-text parts (or none at all); those contribute nothing.
+    """
+    try:
+        return "".join(part.text for part in chunk.parts if part.text)
+    except (AttributeError, ValueError):
+        return ""
+
+
+def parse_array_items(text: str, array_key: str | None = None) -> list:
+    """
+    Parses a complete (or truncated) response in one go and returns every
+    complete item of the target array.
+    """
+    return JsonArrayItemParser(array_key).feed(text)
@@ -0,0 +1,150 @@
+# travel-companion-backend/utils/llm_json.py
+
+import json
+import re
+from dataclasses import dataclass, field
+from utils.json_stream import JsonArrayItemParser
+
+try:
+    import orjson
+except ImportError:  # optional; the standard library decoder is used instead
+    orjson = None
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers can
+# catch the standard exception whichever decoder is in use.
+JSONDecodeError = json.JSONDecodeError
+
+_FENCE_RE = re.compile(r"^\s*```[a-zA-Z]*\s*\n?|\n?\s*```\s*$")
+_TRAILING_COMMA_RE = re.compile(r",(\s*[}\]])")
+
+_TYPE_CHECKS = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+}
+
+
+def loads(text: str | bytes):
+    """
+    Decodes JSON with orjson when it is installed, json otherwise.
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def strip_code_fences(text: str) -> str:
+    """
+    Removes a Markdown code fence (```json ... ```) around model output, if any.
+    """
+    return _FENCE_RE.sub("", text.strip())
+
+
+def validate(value, schema: dict, path: str = "$") -> list:
+    """
+    Checks a decoded value against a response schema (the subset Gemini
+    accepts: type, properties, required, items, enum). Returns a list of
+    error messages, empty when the value is valid.
+    """
+    expected = schema.get("type", "").lower()
+    check = _TYPE_CHECKS.get(expected)
+    if check is not None and not check(value):
+        return [f"{path}: expected {expected}, got {type(value).__name__}"]
+    if "enum" in schema and value not in schema["enum"]:
+        return [f"{path}: {value!r} is not one of {schema['enum']}"]
+
+    errors = []
+    if expected == "object":
+        for key in schema.get("required", ()):
+            if key not in value:
+                errors.append(f"{path}: missing {key!r}")
+        for key, subschema in schema.get("properties", {}).items():
+            if key in value:
+                errors.extend(validate(value[key], subschema, f"{path}.{key}"))
+    elif expected == "array" and "items" in schema:
+        for i, item in enumerate(value):
+            errors.extend(validate(item, schema["items"], f"{path}[{i}]"))
+    return errors
+
+
+@dataclass
+class ParsedItems:
+    """
+    Result of parse_items: the valid items in order, and (index, raw item,
+    error) for every item that failed. `repaired` is set when the text was
+    not valid JSON as a whole and items were salvaged from it.
+    """
+    items: list = field(default_factory=list)
+    failed: list = field(default_factory=list)
+    repaired: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+
+def _container_items(data, array_key: str | None):
+    if array_key is not None:
+        data = data.get(array_key) if isinstance(data, dict) else None
+    return data if isinstance(data, list) else None
+
+
+def check_item(item, schema: dict, defaults: dict | None = None, repair=None):
+    """
+    Validates one decoded item. Keys missing from it (or null) are filled in
+    from `defaults` first, and `repair(item)`, if given, gets one chance to
+    fix an invalid item. Returns (item, None) when valid, (item, error) otherwise.
+    """
+    if defaults and isinstance(item, dict):
+        item = {**defaults, **{k: v for k, v in item.items() if v is not None}}
+    errors = validate(item, schema)
+    if errors and repair is not None:
+        item = repair(item)
+        errors = validate(item, schema)
+    return item, (errors[0] if errors else None)
+
+
+def parse_items(text: str, item_schema: dict, array_key: str | None = None, defaults: dict | None = None,
+                repair=None) -> ParsedItems:
+    """
+    Parses the array of items in a model response (top-level, or under
+    `array_key`) and checks each item against `item_schema` (see check_item).
+
+    Malformed output is repaired where possible: code fences and trailing
+    commas are dropped and, failing that, every complete item is salvaged
+    from the text (e.g. when the response was cut off).
+    """
+    result = ParsedItems()
+    cleaned = strip_code_fences(text)
+    raw_items = None
+    for attempt, candidate in enumerate((cleaned, _TRAILING_COMMA_RE.sub(r"\1", cleaned))):
+        try:
+            data = loads(candidate)
+        except JSONDecodeError:
+            continue
+        result.repaired = attempt > 0
+        raw_items = _container_items(data, array_key)
+        if raw_items is None:
+            result.failed.append((None, data, f"no {array_key or 'top-level'} array in the response"))
+            return result
+        break
+
+    if raw_items is None:
+        parser = JsonArrayItemParser(array_key)
+        raw_items = parser.feed(cleaned)
+        result.repaired = True
+        for _ in range(parser.items_failed):
+            result.failed.append((None, None, "malformed JSON item"))
+        if not parser.done:
+            result.failed.append((None, None, "response ended before the JSON was complete"))
+
+    for i, item in enumerate(raw_items):
+        item, error = check_item(item, item_schema, defaults, repair)
+        if error:
+            result.failed.append((i, item, error))
+        else:
+            result.items.append(item)
+    return result
@@ -0,0 +1,131 @@
+# travel-companion-backend/utils/log.py
+
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import logging
+import contextvars
+from utils.settings import load_env
+
+load_env()
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# "json" writes one JSON object per line; "text" is easier to read locally.
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+# Fraction of high-volume (sampled) records that are written. Warnings and
+# errors are never sampled away.
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))
+# Per-request trace IDs, taken from an incoming X-Request-ID header or generated.
+TRACE_IDS_ENABLED = os.getenv("TRACE_IDS", "1").lower() not in ("0", "false", "no")
+TRACE_ID_HEADER = "X-Request-ID"
+
+_trace_id = contextvars.ContextVar("trace_id", default=None)
+_configured = False
+
+
+def get_trace_id() -> str | None:
+    return _trace_id.get()
+
+
+def set_trace_id(trace_id: str | None):
+    """
+    Sets the trace ID for the current request context and returns a token
+    for reset_trace_id. Tasks created afterwards inherit it.
+    """
+    return _trace_id.set(trace_id)
+
+
+def reset_trace_id(token):
+    _trace_id.reset(token)
+
+
+def new_trace_id(incoming: str | None = None) -> str | None:
+    if not TRACE_IDS_ENABLED:
+        return None
+    # Accept a caller-provided ID only if it's short and printable.
+    if incoming and len(incoming) <= 64 and incoming.isprintable():
+        return incoming
+    return uuid.uuid4().hex
+
+
+class _SamplingFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "sampled", False) and record.levelno < logging.WARNING:
+            return random.random() < LOG_SAMPLE_RATE
+        return True
+
+
+class _StructuredFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        trace_id = getattr(record, "trace_id", None)
+        if trace_id:
+            entry["trace_id"] = trace_id
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        if LOG_FORMAT == "json":
+            return json.dumps(entry, default=str, ensure_ascii=False)
+        extras = " ".join(f"{k}={v}" for k, v in entry.items() if k not in ("ts", "level", "logger", "msg"))
+        stamp = time.strftime("%H:%M:%S", time.localtime(record.created))
+        return f"{stamp} {entry['level'].upper():7} {record.name}: {entry['msg']}" + (f" [{extras}]" if extras else "")
+
+
+def _configure():
+    global _configured
+    if _configured:
+        return
+    _configured = True
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(_StructuredFormatter())
+    handler.addFilter(_SamplingFilter())
+    root = logging.getLogger("travel")
+    root.addHandler(handler)
+    root.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+    root.propagate = False
+
+
+class StructuredLogger:
+    """
+    Thin wrapper over a stdlib logger: keyword arguments become structured
+    fields, the current trace ID is attached, and `sample=True` marks
+    high-volume records that are only written at LOG_SAMPLE_RATE.
+    """
+
+    def __init__(self, logger: logging.Logger):
+        self._logger = logger
+
+    def _log(self, level: int, msg: str, sample: bool = False, exc_info=None, **fields):
+        if not self._logger.isEnabledFor(level):
+            return
+        self._logger.log(level, msg, exc_info=exc_info,
+                         extra={"fields": fields, "sampled": sample, "trace_id": _trace_id.get()})
+
+    def debug(self, msg: str, **fields):
+        self._log(logging.DEBUG, msg, **fields)
+
+    def info(self, msg: str, **fields):
+        self._log(logging.INFO, msg, **fields)
+
+    def warning(self, msg: str, **fields):
+        self._log(logging.WARNING, msg, **fields)
+
+    def error(self, msg: str, **fields):
+        self._log(logging.ERROR, msg, **fields)
+
+
+def get_logger(name: str) -> StructuredLogger:
+    """
+    Returns a structured logger under the "travel" hierarchy, configuring
+    output on first use.
+    """
+    _configure()
+    return StructuredLogger(logging.getLogger(f"travel.{name}"))
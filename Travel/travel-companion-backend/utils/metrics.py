@@ -0,0 +1,248 @@
+# travel-companion-backend/utils/metrics.py
+
+import os
+import time
+import asyncio
+import bisect
+import threading
+from contextlib import contextmanager
+from utils.settings import load_env
+
+load_env()
+
+METRICS_PREFIX = "travel_"
+# Latency buckets in seconds: upstream calls range from cached lookups
+# (milliseconds) to full Gemini plans (tens of seconds).
+LATENCY_BUCKETS = tuple(
+    float(b) for b in os.getenv(
+        "METRICS_LATENCY_BUCKETS", "0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10,20,40"
+    ).split(",")
+)
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = METRICS_PREFIX + name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key: tuple, value) -> list:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. errors or cache hits."""
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, e.g. requests in flight."""
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (latencies) over fixed buckets."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _render_sample(self, key: tuple, value) -> list:
+        counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        inf_labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+        lines.append(f"{self.name}_bucket{inf_labels} {count}")
+        base = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{base} {_format_value(total)}")
+        lines.append(f"{self.name}_count{base} {count}")
+        return lines
+
+
+class Registry:
+    """
+    Holds the process's metrics plus collector callbacks. Collectors export
+    values that modules already count themselves (cache and rate limiter
+    stats) at scrape time instead of double-counting them on the hot path.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        """
+        `collector()` returns (name, kind, documentation, [(labels_dict, value), ...]) tuples.
+        """
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        # Several collectors may report into the same family (e.g. one
+        # cache_requests_total across all caches); merge them by name.
+        families = {}
+        for collector in self._collectors:
+            try:
+                collected = collector()
+            except Exception as e:
+                # A broken collector must not take the whole endpoint down.
+                lines.append(f"# collector {getattr(collector, '__name__', collector)} failed: {_escape(e)}")
+                continue
+            for name, kind, documentation, samples in collected:
+                families.setdefault(name, (kind, documentation, []))[2].extend(samples)
+        for name, (kind, documentation, samples) in families.items():
+            name = METRICS_PREFIX + name
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_names = tuple(labels)
+                label_text = _format_labels(label_names, tuple(labels[n] for n in label_names))
+                lines.append(f"{name}{label_text} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Latency of HTTP requests by route.", ("method", "route", "status")))
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled.", ("route",)))
+UPSTREAM_SECONDS = REGISTRY.register(Histogram(
+    "upstream_request_duration_seconds", "Latency of upstream provider calls.", ("provider", "operation")))
+UPSTREAM_ERRORS = REGISTRY.register(Counter(
+    "upstream_errors_total", "Failed upstream provider calls.", ("provider", "operation", "reason")))
+UPSTREAM_IN_FLIGHT = REGISTRY.register(Gauge(
+    "upstream_requests_in_flight", "Upstream provider calls currently running.", ("provider",)))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "stage_duration_seconds", "Latency of pipeline stages.", ("stage",)))
+RETRIES = REGISTRY.register(Counter(
+    "retries_total", "Retries, hedged requests and fallbacks.", ("component", "reason")))
+REQUESTS_ABANDONED = REGISTRY.register(Counter(
+    "requests_abandoned_total", "Requests whose work was cancelled before completing.", ("reason",)))
+ADMISSION_REJECTED = REGISTRY.register(Counter(
+    "admission_rejected_total", "Requests turned away by an admission gate.", ("gate", "reason")))
+
+
+@contextmanager
+def track_upstream(provider: str, operation: str):
+    """
+    Times one upstream call and counts it as an error if it raises. Callers
+    that swallow errors themselves report them with UPSTREAM_ERRORS.
+    """
+    started = time.perf_counter()
+    UPSTREAM_IN_FLIGHT.inc(provider=provider)
+    try:
+        yield
+    except asyncio.CancelledError:
+        # Cancelled calls (lost hedges, client disconnects) aren't provider errors.
+        raise
+    except Exception as e:
+        UPSTREAM_ERRORS.inc(provider=provider, operation=operation, reason=type(e).__name__)
+        raise
+    finally:
+        UPSTREAM_IN_FLIGHT.dec(provider=provider)
+        UPSTREAM_SECONDS.observe(time.perf_counter() - started, provider=provider, operation=operation)
+
+
+def cache_family(cache: str, hits: int, misses: int, **other_results) -> list:
+    """
+    Builds the shared cache_requests_total family for a cache's collector.
+    """
+    samples = [({"cache": cache, "result": "hit"}, hits), ({"cache": cache, "result": "miss"}, misses)]
+    samples += [({"cache": cache, "result": result}, count) for result, count in other_results.items()]
+    return [("cache_requests_total", "counter", "Cache lookups by cache and result.", samples)]
+
+
+def render_metrics() -> str:
+    """
+    Returns all metrics in the Prometheus text exposition format.
+    """
+    return REGISTRY.render()
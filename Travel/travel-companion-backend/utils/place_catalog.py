@@ -0,0 +1,240 @@
+# travel-companion-backend/utils/place_catalog.py
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from utils.settings import load_env
+from utils.geo import geohash_cells_in_radius, geohash_encode, haversine_km, has_coordinates
+from utils.geocode_cache import BACKEND_DIR
+from utils.geocode_utils import get_coordinates_from_address_async
+from utils.wikipedia_nearby import similar_titles
+from utils.log import get_logger
+from utils.metrics import REGISTRY, cache_family
+
+load_env()
+
+PLACE_CATALOG_PATH = os.getenv("PLACE_CATALOG_PATH", os.path.join(BACKEND_DIR, "cache", "places.sqlite3"))
+# Places are bucketed by geohash cell; length 5 cells are roughly 5 km wide.
+CATALOG_GEOHASH_PRECISION = int(os.getenv("CATALOG_GEOHASH_PRECISION", "5"))
+# A location counts as well covered once this many known places lie within
+# CATALOG_RADIUS_KM of it; /api/suggest then answers from the catalog.
+CATALOG_RADIUS_KM = float(os.getenv("CATALOG_RADIUS_KM", "15"))
+CATALOG_MIN_PLACES = int(os.getenv("CATALOG_MIN_PLACES", "10"))
+CATALOG_RESULT_LIMIT = int(os.getenv("CATALOG_RESULT_LIMIT", "6"))
+# Ranking: how often Gemini suggested a place, discounted by distance. A place
+# this far away counts half as much as one at the searched point.
+CATALOG_RANK_DISTANCE_KM = float(os.getenv("CATALOG_RANK_DISTANCE_KM", "5"))
+# A new place with a similar title within this distance of a known one is
+# merged into it. Titles alone are not enough: geocoders sometimes return
+# the same city-centre point for different places.
+CATALOG_DEDUP_DISTANCE_KM = float(os.getenv("CATALOG_DEDUP_DISTANCE_KM", "2"))
+
+# Placeholder images mark places whose image lookup failed; they rank lower
+# and never overwrite a real image.
+PLACEHOLDER_IMAGE_PREFIX = "https://placehold.co/"
+# Keys kept per place; everything else (tool-call leftovers, internal
+# markers) is dropped before storing.
+PLACE_FIELDS = ("title", "summary", "main_attraction", "best_time_to_visit", "visiting_hours",
+                "address", "image", "latitude", "longitude", "wiki")
+
+logger = get_logger("place_catalog")
+
+
+def _has_real_image(place: dict) -> bool:
+    image = place.get("image")
+    return isinstance(image, str) and image.startswith("http") and not image.startswith(PLACEHOLDER_IMAGE_PREFIX)
+
+
+class PlaceCatalog:
+    """
+    Persistent catalog of every geocoded place Gemini has suggested, indexed
+    by geohash cell so places near a point can be found without scanning
+    the whole catalog.
+
+    The whole catalog is kept in memory; SQLite only persists it. Each row
+    stores the place as compact JSON next to its coordinates, so startup is
+    a single SELECT.
+    """
+
+    def __init__(self, db_path: str = PLACE_CATALOG_PATH, precision: int = CATALOG_GEOHASH_PRECISION):
+        self.db_path = db_path
+        self.precision = precision
+        self._places = {}    # id -> {"place", "lat", "lng", "hits"}
+        self._buckets = {}   # geohash cell -> set of ids
+        self._next_id = 1
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._conn = None
+        self.stats = {"lookups": 0, "covered": 0, "added": 0, "merged": 0}
+
+    def _connection(self):
+        if self._conn is None:
+            if self.db_path != ":memory:":
+                os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS places ("
+                "id INTEGER PRIMARY KEY, lat REAL NOT NULL, lng REAL NOT NULL, hits INTEGER NOT NULL, "
+                "updated_at REAL NOT NULL, data TEXT NOT NULL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _index(self, place_id: int, place: dict, hits: int):
+        lat, lng = place["latitude"], place["longitude"]
+        self._places[place_id] = {"place": place, "lat": lat, "lng": lng, "hits": hits}
+        self._buckets.setdefault(geohash_encode(lat, lng, self.precision), set()).add(place_id)
+        self._next_id = max(self._next_id, place_id + 1)
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        started = time.perf_counter()
+        try:
+            rows = self._connection().execute("SELECT id, hits, data FROM places").fetchall()
+        except sqlite3.Error as e:
+            logger.error("Place catalog load error", error=str(e))
+            return
+        for place_id, hits, data in rows:
+            try:
+                self._index(place_id, json.loads(data), hits)
+            except (ValueError, KeyError):
+                continue
+        logger.info("Loaded place catalog", places=len(self._places),
+                    ms=round((time.perf_counter() - started) * 1000, 1))
+
+    def load(self):
+        """
+        Loads the catalog from disk. Called at startup; lookups load lazily otherwise.
+        """
+        with self._lock:
+            self._ensure_loaded()
+
+    def _ids_near(self, lat: float, lng: float, radius_km: float):
+        for cell in geohash_cells_in_radius(lat, lng, radius_km, self.precision):
+            for place_id in self._buckets.get(cell, ()):
+                entry = self._places[place_id]
+                distance = haversine_km(lat, lng, entry["lat"], entry["lng"])
+                if distance <= radius_km:
+                    yield place_id, distance
+
+    def _find_duplicate(self, place: dict):
+        for place_id, _ in self._ids_near(place["latitude"], place["longitude"], CATALOG_DEDUP_DISTANCE_KM):
+            if similar_titles(place.get("title", ""), self._places[place_id]["place"].get("title", "")):
+                return place_id
+        return None
+
+    def _score(self, entry: dict, distance_km: float) -> float:
+        score = entry["hits"] / (1 + distance_km / CATALOG_RANK_DISTANCE_KM)
+        return score if _has_real_image(entry["place"]) else score / 2
+
+    def nearby(self, lat: float, lng: float, radius_km: float = CATALOG_RADIUS_KM,
+               min_places: int = CATALOG_MIN_PLACES, limit: int = CATALOG_RESULT_LIMIT):
+        """
+        Returns the top-ranked known places within `radius_km` of a point, or
+        None if fewer than `min_places` are known there.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            self.stats["lookups"] += 1
+            found = list(self._ids_near(lat, lng, radius_km))
+            if len(found) < max(min_places, 1):
+                return None
+            found.sort(key=lambda item: self._score(self._places[item[0]], item[1]), reverse=True)
+            self.stats["covered"] += 1
+            return [dict(self._places[place_id]["place"]) for place_id, _ in found[:limit]]
+
+    async def lookup_location_async(self, location: str):
+        """
+        Geocodes a searched location and returns catalog places near it, or
+        None when the location is unknown or the area is not covered well enough.
+        """
+        coords = await get_coordinates_from_address_async(location)
+        if not coords:
+            return None
+        return self.nearby(coords["lat"], coords["lng"])
+
+    def add_places(self, places: list) -> int:
+        """
+        Adds Gemini-suggested places to the catalog. Places without usable
+        coordinates, and places that came from other sources, are skipped;
+        duplicates are merged into the known place. Returns how many were new.
+        """
+        added = 0
+        now = time.time()
+        with self._lock:
+            self._ensure_loaded()
+            rows = []
+            for place in places:
+                if not has_coordinates(place) or place.get("source"):
+                    continue
+                place = {key: place[key] for key in PLACE_FIELDS if key in place}
+                place_id = self._find_duplicate(place)
+                if place_id is None:
+                    place_id, hits = self._next_id, 1
+                    added += 1
+                    self.stats["added"] += 1
+                else:
+                    previous = self._places[place_id]
+                    self._buckets[geohash_encode(previous["lat"], previous["lng"], self.precision)].discard(place_id)
+                    if _has_real_image(previous["place"]) and not _has_real_image(place):
+                        place["image"] = previous["place"]["image"]
+                    hits = previous["hits"] + 1
+                    self.stats["merged"] += 1
+                self._index(place_id, place, hits)
+                rows.append((place_id, place["latitude"], place["longitude"], hits, now,
+                             json.dumps(place, separators=(",", ":"), ensure_ascii=False)))
+            if rows:
+                try:
+                    conn = self._connection()
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO places (id, lat, lng, hits, updated_at, data) VALUES (?, ?, ?, ?, ?, ?)",
+                        rows,
+                    )
+                    conn.commit()
+                except sqlite3.Error as e:
+                    logger.error("Place catalog write error", error=str(e))
+        return added
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["places"] = len(self._places)
+            stats["cells"] = sum(1 for ids in self._buckets.values() if ids)
+        stats["coverage_rate"] = stats["covered"] / stats["lookups"] if stats["lookups"] else 0.0
+        return stats
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_place_catalog = None
+
+
+def get_place_catalog() -> PlaceCatalog:
+    """
+    Returns the process-wide place catalog, creating it on first use.
+    """
+    global _place_catalog
+    if _place_catalog is None:
+        _place_catalog = PlaceCatalog()
+    return _place_catalog
+
+
+def _collect_metrics() -> list:
+    if _place_catalog is None:
+        return []
+    stats = _place_catalog.get_stats()
+    # A "hit" is a lookup the catalog could answer without Gemini.
+    return cache_family("place_catalog", stats["covered"], stats["lookups"] - stats["covered"]) + [
+        ("place_catalog_places", "gauge", "Places in the place catalog.", [({}, stats["places"])]),
+    ]
+
+
+REGISTRY.register_collector(_collect_metrics)
@@ -0,0 +1,133 @@
+# travel-companion-backend/utils/plan_store.py
+
+import os
+import json
+import time
+import secrets
+import sqlite3
+import threading
+from utils.settings import load_env
+from utils.geocode_cache import BACKEND_DIR
+from utils.llm_json import loads
+from utils.log import get_logger
+from utils.metrics import REGISTRY
+
+load_env()
+
+PLAN_STORE_PATH = os.getenv("PLAN_STORE_PATH", os.path.join(BACKEND_DIR, "cache", "plans.sqlite3"))
+# Plans untouched for this long are deleted; every edit extends the lifetime.
+PLAN_TTL_S = float(os.getenv("PLAN_TTL_S", str(7 * 24 * 3600)))
+
+logger = get_logger("plan_store")
+
+
+class PlanStore:
+    """
+    Keeps travel plans under random IDs in SQLite, so every worker on the
+    host can edit them. Each plan has a version that goes up with every
+    update; updates are compare-and-set on it, so two concurrent edits of
+    the same plan can't silently overwrite each other.
+    """
+
+    def __init__(self, db_path: str = PLAN_STORE_PATH, ttl: float = PLAN_TTL_S):
+        self.db_path = db_path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = None
+        self.stats = {"created": 0, "updated": 0, "conflicts": 0}
+
+    def _connection(self):
+        if self._conn is None:
+            if self.db_path != ":memory:":
+                os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS plans ("
+                "id TEXT PRIMARY KEY, version INTEGER NOT NULL, data TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS plans_expires_at ON plans (expires_at)")
+            self._conn.commit()
+        return self._conn
+
+    def create(self, plan: dict) -> tuple:
+        """
+        Stores a new plan and returns (plan_id, version).
+        """
+        plan_id = secrets.token_urlsafe(12)
+        now = time.time()
+        data = json.dumps(plan, separators=(",", ":"), ensure_ascii=False)
+        with self._lock:
+            conn = self._connection()
+            # Expired plans are cleared as new ones come in.
+            conn.execute("DELETE FROM plans WHERE expires_at <= ?", (now,))
+            conn.execute("INSERT INTO plans (id, version, data, expires_at) VALUES (?, 1, ?, ?)",
+                         (plan_id, data, now + self.ttl))
+            conn.commit()
+            self.stats["created"] += 1
+        return plan_id, 1
+
+    def get(self, plan_id: str):
+        """
+        Returns (version, plan), or None for an unknown or expired ID.
+        """
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT version, data FROM plans WHERE id = ? AND expires_at > ?", (plan_id, time.time())
+            ).fetchone()
+        return (row[0], loads(row[1])) if row else None
+
+    def update(self, plan_id: str, version: int, plan: dict) -> int | None:
+        """
+        Replaces the plan if it is still at `version`. Returns the new version,
+        or None if the plan changed (or expired) in the meantime.
+        """
+        data = json.dumps(plan, separators=(",", ":"), ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            cursor = conn.execute(
+                "UPDATE plans SET version = version + 1, data = ?, expires_at = ? "
+                "WHERE id = ? AND version = ? AND expires_at > ?",
+                (data, now + self.ttl, plan_id, version, now),
+            )
+            conn.commit()
+            if cursor.rowcount != 1:
+                self.stats["conflicts"] += 1
+                logger.warning("Plan update conflict", plan_id=plan_id, version=version)
+                return None
+            self.stats["updated"] += 1
+        return version + 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return dict(self.stats)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_plan_store = None
+
+
+def get_plan_store() -> PlanStore:
+    """
+    Returns the process-wide plan store, creating it on first use.
+    """
+    global _plan_store
+    if _plan_store is None:
+        _plan_store = PlanStore()
+    return _plan_store
+
+
+def _collect_metrics() -> list:
+    if _plan_store is None:
+        return []
+    stats = _plan_store.get_stats()
+    return [("plan_store_operations_total", "counter", "Stored plan writes by outcome.",
+             [({"result": result}, count) for result, count in stats.items()])]
+
+
+REGISTRY.register_collector(_collect_metrics)
@@ -0,0 +1,151 @@
+# travel-companion-backend/utils/prompt_builder.py
+
+import os
+import math
+import re
+from utils.settings import load_env
+from utils.geo import has_coordinates
+from utils.log import get_logger
+from utils.metrics import REGISTRY
+
+load_env()
+
+# Token budget for the places section of a prompt. When the selected places
+# don't fit at full detail, descriptive fields are trimmed harder and then
+# dropped, level by level, until they do (see TRAVEL_PLACE_LEVELS).
+PROMPT_PLACES_TOKEN_BUDGET = int(os.getenv("PROMPT_PLACES_TOKEN_BUDGET", "1200"))
+# Rough characters-per-token ratio used when Gemini doesn't report usage.
+CHARS_PER_TOKEN = 4
+
+# (place key, label) in the order fields are written.
+FIELD_LABELS = (
+    ("address", "addr"),
+    ("visiting_hours", "hours"),
+    ("best_time_to_visit", "best"),
+    ("summary", "about"),
+    ("main_attraction", "known for"),
+)
+TITLE_MAX_CHARS = 80
+
+# Character caps per field, from full detail down to the bare minimum. The
+# travel plan needs opening hours and location far more than the prose.
+TRAVEL_PLACE_LEVELS = (
+    {"address": 80, "visiting_hours": 60, "best_time_to_visit": 60, "summary": 160, "main_attraction": 160},
+    {"address": 60, "visiting_hours": 50, "best_time_to_visit": 40, "summary": 80, "main_attraction": 80},
+    {"address": 50, "visiting_hours": 40, "best_time_to_visit": 30, "summary": 60},
+    {"address": 40, "visiting_hours": 40},
+    {"visiting_hours": 30},
+)
+# The details prompt only needs enough about each place to write tips.
+DETAIL_PLACE_LEVELS = (
+    {"summary": 160, "main_attraction": 160},
+    {"summary": 80, "main_attraction": 80},
+    {"summary": 60},
+    {},
+)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_MISSING_VALUES = {"", "n/a", "na", "none", "null", "unknown", "no summary available."}
+
+logger = get_logger("prompt_builder")
+
+# Per-call token counters: call name -> {calls, input_tokens, output_tokens, estimated_calls}
+token_stats = {}
+prompt_stats = {"prompts": 0, "degraded": 0}
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+
+def trim_text(value, max_chars: int) -> str:
+    """
+    Collapses whitespace and cuts text to `max_chars`, at a word boundary
+    where possible. Placeholder values such as "N/A" become "".
+    """
+    text = _WHITESPACE_RE.sub(" ", str(value or "")).strip()
+    if text.casefold() in _MISSING_VALUES:
+        return ""
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars - 1]
+    if " " in cut[max_chars // 2:]:
+        cut = cut[:cut.rindex(" ")]
+    return cut.rstrip(" ,.;:-") + "…"
+
+
+def encode_place(index: int, place: dict, caps: dict, with_coordinates: bool = False) -> str:
+    """
+    One compact line per place: "1. Title @lat,lng | addr: ... | hours: ...".
+    Only fields listed in `caps` are written, each trimmed to its cap.
+    """
+    parts = [f"{index}. {trim_text(place.get('title'), TITLE_MAX_CHARS) or f'Place {index}'}"]
+    if with_coordinates and has_coordinates(place):
+        parts[0] += f" @{place['latitude']:.4f},{place['longitude']:.4f}"
+    for key, label in FIELD_LABELS:
+        if key in caps:
+            value = trim_text(place.get(key), caps[key])
+            if value:
+                parts.append(f"{label}: {value}")
+    return " | ".join(parts)
+
+
+def encode_places(places: list, levels=TRAVEL_PLACE_LEVELS, budget_tokens: int = PROMPT_PLACES_TOKEN_BUDGET,
+                  with_coordinates: bool = False) -> str:
+    """
+    Encodes places at the most detailed level that fits the token budget.
+    The last level is used regardless, so every place is always listed.
+    """
+    prompt_stats["prompts"] += 1
+    for level, caps in enumerate(levels):
+        text = "\n".join(encode_place(i + 1, place, caps, with_coordinates) for i, place in enumerate(places))
+        if estimate_tokens(text) <= budget_tokens:
+            break
+    if level > 0:
+        prompt_stats["degraded"] += 1
+        logger.info("Prompt places trimmed to fit the token budget", places=len(places), level=level,
+                    budget_tokens=budget_tokens)
+    return text
+
+
+def record_usage(call: str, prompt: str, response=None, output_text: str = "") -> dict:
+    """
+    Records input and output tokens for one Gemini call. Uses the response's
+    usage_metadata when present (for streams, pass the last chunk) and falls
+    back to an estimate from the prompt and output text.
+    """
+    usage = getattr(response, "usage_metadata", None)
+    input_tokens = getattr(usage, "prompt_token_count", 0) or 0
+    output_tokens = getattr(usage, "candidates_token_count", 0) or 0
+    estimated = not input_tokens
+    if estimated:
+        input_tokens = estimate_tokens(prompt)
+        output_tokens = output_tokens or estimate_tokens(output_text)
+
+    entry = token_stats.setdefault(call, {"calls": 0, "input_tokens": 0, "output_tokens": 0, "estimated_calls": 0})
+    entry["calls"] += 1
+    entry["input_tokens"] += input_tokens
+    entry["output_tokens"] += output_tokens
+    entry["estimated_calls"] += 1 if estimated else 0
+    logger.info("Gemini token usage", call=call, input_tokens=input_tokens, output_tokens=output_tokens,
+                estimated=estimated, sample=True)
+    return {"input_tokens": input_tokens, "output_tokens": output_tokens, "estimated": estimated}
+
+
+def get_token_stats() -> dict:
+    return {"calls": {call: dict(entry) for call, entry in token_stats.items()}, **prompt_stats}
+
+
+def _collect_metrics() -> list:
+    samples = []
+    for call, entry in token_stats.items():
+        samples.append(({"call": call, "direction": "input"}, entry["input_tokens"]))
+        samples.append(({"call": call, "direction": "output"}, entry["output_tokens"]))
+    return [
+        ("gemini_tokens_total", "counter", "Gemini tokens by call and direction.", samples),
+        ("prompts_degraded_total", "counter", "Prompts whose places were trimmed to fit the token budget.",
+         [({}, prompt_stats["degraded"])]),
+    ]
+
+
+REGISTRY.register_collector(_collect_metrics)
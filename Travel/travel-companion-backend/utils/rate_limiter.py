@@ -0,0 +1,110 @@
+# travel-companion-backend/utils/rate_limiter.py
+
+import os
+import time
+import asyncio
+from utils.settings import load_env
+from utils.deadline import DeadlineExceeded, remaining
+from utils.metrics import REGISTRY
+
+load_env()
+
+
+def _limit_from_env(provider: str, per_minute: float, burst: int):
+    prefix = f"RATE_LIMIT_{provider.upper()}"
+    return (float(os.getenv(f"{prefix}_PER_MIN", str(per_minute))),
+            int(os.getenv(f"{prefix}_BURST", str(burst))))
+
+
+# Requests per minute and burst size for each upstream provider, overridable
+# with RATE_LIMIT_<PROVIDER>_PER_MIN / _BURST. A rate of 0 disables limiting.
+# Defaults follow the providers' free-tier quotas (Unsplash demo apps get 50
+# requests per hour) so bursts queue up here instead of ending in 429s.
+PROVIDER_RATE_LIMITS = {
+    "gemini": _limit_from_env("gemini", 60, 10),
+    "opencage": _limit_from_env("opencage", 900, 15),
+    "pixabay": _limit_from_env("pixabay", 100, 20),
+    "unsplash": _limit_from_env("unsplash", 50 / 60, 10),
+    "wikipedia": _limit_from_env("wikipedia", 300, 20),
+}
+
+
+class TokenBucket:
+    """
+    Async token-bucket rate limiter. Tokens refill continuously at `rate`
+    per second up to `capacity`; `acquire()` waits until one is available.
+    Waiters are served in arrival order. A caller whose request deadline
+    passes before its token would be ready gets DeadlineExceeded at once.
+    """
+
+    def __init__(self, name: str, per_minute: float, burst: int):
+        self.name = name
+        self.rate = per_minute / 60.0
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.stats = {"acquired": 0, "delayed": 0, "wait_seconds": 0.0}
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        if self.rate <= 0:
+            self.stats["acquired"] += 1
+            return
+        # Holding the lock while sleeping keeps waiters in FIFO order.
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                wait = (1 - self._tokens) / self.rate
+                left = remaining()
+                if left is not None and wait >= left:
+                    raise DeadlineExceeded(f"{self.name} rate limit wait exceeds the request deadline")
+                self.stats["delayed"] += 1
+                self.stats["wait_seconds"] += wait
+                await asyncio.sleep(wait)
+                self._refill()
+            self._tokens -= 1
+            self.stats["acquired"] += 1
+
+    def get_stats(self) -> dict:
+        self._refill()
+        stats = dict(self.stats)
+        stats["per_minute"] = self.rate * 60
+        stats["tokens"] = round(self._tokens, 2)
+        return stats
+
+
+_rate_limiters = {}
+
+
+def get_rate_limiter(provider: str) -> TokenBucket:
+    """
+    Returns the process-wide rate limiter for an upstream provider, creating
+    it on first use. Unknown providers are not limited.
+    """
+    limiter = _rate_limiters.get(provider)
+    if limiter is None:
+        per_minute, burst = PROVIDER_RATE_LIMITS.get(provider, (0, 1))
+        limiter = _rate_limiters[provider] = TokenBucket(provider, per_minute, burst)
+    return limiter
+
+
+def get_rate_limiter_stats() -> dict:
+    return {name: limiter.get_stats() for name, limiter in _rate_limiters.items()}
+
+
+def _collect_metrics() -> list:
+    stats = get_rate_limiter_stats()
+    return [
+        ("rate_limit_delayed_total", "counter", "Upstream calls that waited for a rate limit token.",
+         [({"provider": name}, s["delayed"]) for name, s in stats.items()]),
+        ("rate_limit_wait_seconds_total", "counter", "Total time spent waiting for rate limit tokens.",
+         [({"provider": name}, round(s["wait_seconds"], 3)) for name, s in stats.items()]),
+    ]
+
+
+REGISTRY.register_collector(_collect_metrics)
@@ -0,0 +1,68 @@
+# travel-companion-backend/utils/request_metrics.py
+
+import time
+from starlette.routing import Match
+from utils.log import TRACE_ID_HEADER, new_trace_id, reset_trace_id, set_trace_id
+from utils.metrics import HTTP_REQUEST_SECONDS, HTTP_REQUESTS_IN_FLIGHT
+
+_TRACE_HEADER_KEY = TRACE_ID_HEADER.lower().encode("latin-1")
+
+
+def _match_path(routes, scope):
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match != Match.FULL:
+            continue
+        path = getattr(route, "path", None)
+        if path is not None:
+            return path
+        # Included routers are kept as a single entry by newer FastAPI versions.
+        router = getattr(route, "original_router", route)
+        return _match_path(getattr(router, "routes", ()), scope)
+    return None
+
+
+def _route_label(scope) -> str:
+    # Label by route template, not raw path, so metrics stay low-cardinality.
+    return _match_path(getattr(scope.get("app"), "routes", ()), scope) or "unmatched"
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware that tracks in-flight requests and request latency per
+    route and sets the request's trace ID, echoed back in X-Request-ID.
+
+    Latency is measured until the last body chunk is sent, so streaming
+    endpoints are timed over the whole stream rather than to the first byte.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = _route_label(scope)
+        incoming = dict(scope.get("headers") or ()).get(_TRACE_HEADER_KEY, b"").decode("latin-1")
+        trace_id = new_trace_id(incoming or None)
+        token = set_trace_id(trace_id)
+        status = 500
+        started = time.perf_counter()
+
+        async def _send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if trace_id:
+                    message["headers"] = list(message.get("headers") or []) + [(_TRACE_HEADER_KEY, trace_id.encode("latin-1"))]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc(route=route)
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec(route=route)
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, method=scope["method"], route=route, status=status)
+            reset_trace_id(token)
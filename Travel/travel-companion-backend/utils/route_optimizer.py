@@ -0,0 +1,202 @@
+# travel-companion-backend/utils/route_optimizer.py
+
+import os
+from utils.settings import load_env
+from utils.geo import haversine_matrix, has_coordinates
+from utils.geocode_utils import get_coordinates_from_address_async
+
+load_env()
+
+# Straight-line distances are scaled by ROUTE_ROAD_FACTOR to approximate road
+# distance, then converted to time at ROUTE_AVG_SPEED_KMH plus a fixed
+# per-leg overhead (parking, waiting for a cab, ...).
+ROUTE_ROAD_FACTOR = float(os.getenv("ROUTE_ROAD_FACTOR", "1.3"))
+ROUTE_AVG_SPEED_KMH = float(os.getenv("ROUTE_AVG_SPEED_KMH", "25"))
+ROUTE_LEG_OVERHEAD_MIN = float(os.getenv("ROUTE_LEG_OVERHEAD_MIN", "5"))
+# Used for legs where one end has no coordinates.
+ROUTE_DEFAULT_LEG_MIN = int(os.getenv("ROUTE_DEFAULT_LEG_MIN", "30"))
+
+_EPSILON = 1e-9
+
+
+def estimate_travel_minutes(distance_km) -> int:
+    """
+    Rough door-to-door travel time in minutes for a straight-line distance.
+    """
+    if distance_km is None:
+        return ROUTE_DEFAULT_LEG_MIN
+    minutes = distance_km * ROUTE_ROAD_FACTOR / ROUTE_AVG_SPEED_KMH * 60 + ROUTE_LEG_OVERHEAD_MIN
+    return max(1, round(minutes))
+
+
+def path_length(path: list, dist) -> float:
+    return sum(dist[a][b] for a, b in zip(path, path[1:]))
+
+
+def nearest_neighbour(dist, start: int, nodes) -> list:
+    """
+    Greedy open path starting at `start` that always moves to the closest
+    unvisited node.
+    """
+    path = [start]
+    remaining = set(nodes) - {start}
+    while remaining:
+        last = dist[path[-1]]
+        nxt = min(remaining, key=lambda n: last[n])
+        path.append(nxt)
+        remaining.remove(nxt)
+    return path
+
+
+def two_opt(path: list, dist, fixed_start: bool = True) -> list:
+    """
+    Improves an open path by reversing segments while that shortens it.
+    """
+    path = list(path)
+    n = len(path)
+    first = 1 if fixed_start else 0
+    improved = True
+    while improved:
+        improved = False
+        for i in range(first, n - 1):
+            for j in range(i + 1, n):
+                a, b = path[i], path[j]
+                before = after = 0.0
+                if i > 0:
+                    before += dist[path[i - 1]][a]
+                    after += dist[path[i - 1]][b]
+                if j < n - 1:
+                    before += dist[b][path[j + 1]]
+                    after += dist[a][path[j + 1]]
+                if after < before - _EPSILON:
+                    path[i:j + 1] = reversed(path[i:j + 1])
+                    improved = True
+    return path
+
+
+def or_opt(path: list, dist, fixed_start: bool = True, max_segment: int = 3) -> list:
+    """
+    Improves an open path by moving short segments (optionally reversed) to a
+    better position.
+    """
+    path = list(path)
+    first = 1 if fixed_start else 0
+
+    def edge(a, b):
+        return dist[a][b] if a is not None and b is not None else 0.0
+
+    improved = True
+    while improved:
+        improved = False
+        for seg_len in range(1, max_segment + 1):
+            for i in range(first, len(path) - seg_len + 1):
+                segment = path[i:i + seg_len]
+                prev = path[i - 1] if i > 0 else None
+                nxt = path[i + seg_len] if i + seg_len < len(path) else None
+                removal_gain = edge(prev, segment[0]) + edge(segment[-1], nxt) - edge(prev, nxt)
+                rest = path[:i] + path[i + seg_len:]
+
+                best = None
+                for k in range(first, len(rest) + 1):
+                    left = rest[k - 1] if k > 0 else None
+                    right = rest[k] if k < len(rest) else None
+                    for candidate in (segment, segment[::-1]):
+                        cost = edge(left, candidate[0]) + edge(candidate[-1], right) - edge(left, right)
+                        if cost < removal_gain - _EPSILON and (best is None or cost < best[0]):
+                            best = (cost, k, candidate)
+
+                if best is not None:
+                    _, k, candidate = best
+                    path = rest[:k] + list(candidate) + rest[k:]
+                    improved = True
+                    break
+            if improved:
+                break
+    return path
+
+
+def solve_order(dist, has_start: bool) -> list:
+    """
+    Returns a visiting order over all indices of `dist`. With `has_start`,
+    index 0 is the fixed starting point; otherwise the best start is chosen.
+    """
+    n = len(dist)
+    if n <= 2:
+        return list(range(n))
+    nodes = range(n)
+    if has_start:
+        path = nearest_neighbour(dist, 0, nodes)
+    else:
+        path = min((nearest_neighbour(dist, s, nodes) for s in nodes), key=lambda p: path_length(p, dist))
+
+    # Alternate both local searches until neither finds an improvement.
+    while True:
+        length = path_length(path, dist)
+        path = or_opt(two_opt(path, dist, has_start), dist, has_start)
+        if path_length(path, dist) >= length - _EPSILON:
+            return path
+
+
+def optimize_route(places: list, start_coords=None, start_label: str = "Starting Location") -> dict:
+    """
+    Orders places to minimise total travel distance from the start.
+
+    Args:
+        places (list): Place dicts with 'title', 'latitude' and 'longitude'.
+        start_coords (dict | None): {"lat", "lng"} of the starting point, if known.
+        start_label (str): Name used for the starting point in the legs.
+
+    Returns:
+        dict: 'places' in visiting order (places without coordinates last, in
+              their original order), one entry in 'legs' per place with
+              'distance_km' and 'duration_min', and route totals.
+    """
+    located = [p for p in places if has_coordinates(p)]
+    unlocated = [p for p in places if not has_coordinates(p)]
+    has_start = bool(start_coords)
+
+    points = [(p["latitude"], p["longitude"]) for p in located]
+    if has_start:
+        points.insert(0, (start_coords["lat"], start_coords["lng"]))
+
+    dist = haversine_matrix(points).tolist() if points else []
+    order = solve_order(dist, has_start)
+    if has_start:
+        order = [i - 1 for i in order[1:]]
+    ordered = [located[i] for i in order] + unlocated
+
+    legs = []
+    prev_label, prev_index = start_label, (-1 if has_start else None)
+    offset = 1 if has_start else 0
+    for position, place in enumerate(ordered):
+        index = order[position] if position < len(order) else None
+        if index is not None and prev_index is not None:
+            distance_km = round(dist[prev_index + offset][index + offset], 2)
+        else:
+            distance_km = None
+        title = place.get("title", f"Place {position + 1}")
+        legs.append({
+            "from": prev_label,
+            "to": title,
+            "distance_km": distance_km,
+            "duration_min": estimate_travel_minutes(distance_km),
+        })
+        prev_label, prev_index = title, index
+
+    known = [leg["distance_km"] for leg in legs if leg["distance_km"] is not None]
+    return {
+        "start": {"label": start_label, "coords": start_coords},
+        "places": ordered,
+        "legs": legs,
+        "total_distance_km": round(sum(known), 2),
+        "total_duration_min": sum(leg["duration_min"] for leg in legs),
+    }
+
+
+async def plan_route_async(places: list, start_location: str) -> dict:
+    """
+    Geocodes the start location (through the geocode cache) and optimizes the
+    visiting order of `places` from there.
+    """
+    start_coords = await get_coordinates_from_address_async(start_location) if start_location else None
+    return optimize_route(places, start_coords, start_location or "Starting Location")
@@ -0,0 +1,75 @@
+# travel-companion-backend/utils/settings.py
+
+import os
+from dataclasses import dataclass
+from dotenv import load_dotenv
+
+_env_loaded = False
+
+
+def load_env():
+    """
+    Loads the .env file into the environment, once per process. Modules call
+    this before reading their settings so import order doesn't matter.
+    """
+    global _env_loaded
+    if not _env_loaded:
+        load_dotenv()
+        _env_loaded = True
+
+
+load_env()
+
+# Browser origins allowed to call the API, comma-separated.
+DEFAULT_CORS_ORIGINS = "http://localhost:3000,http://43.204.171.199:3000"
+# Providers the service can't do its job without; /readyz fails while any of
+# them has no API key. The others degrade gracefully (placeholder images,
+# no coordinates).
+DEFAULT_REQUIRED_PROVIDERS = "gemini"
+
+# Provider name -> environment variable holding its API key.
+PROVIDER_KEYS = {
+    "gemini": "GEMINI_API_KEY",
+    "opencage": "OPENCAGE_API_KEY",
+    "pixabay": "PIXABAY_API_KEY",
+    "unsplash": "UNSPLASH_ACCESS_KEY",
+}
+
+
+def _split(value: str) -> tuple:
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+
+@dataclass(frozen=True)
+class Settings:
+    cors_origins: tuple
+    required_providers: tuple
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        load_env()
+        return cls(
+            cors_origins=_split(os.getenv("CORS_ORIGINS", DEFAULT_CORS_ORIGINS)),
+            required_providers=_split(os.getenv("REQUIRED_PROVIDERS", DEFAULT_REQUIRED_PROVIDERS)),
+        )
+
+    def configured_providers(self) -> dict:
+        # Keys are read on every call so a rotated key is picked up without a restart.
+        return {name: bool(os.getenv(env_name)) for name, env_name in PROVIDER_KEYS.items()}
+
+    def missing_providers(self) -> list:
+        configured = self.configured_providers()
+        return [name for name in self.required_providers if not configured.get(name)]
+
+
+_settings = None
+
+
+def get_settings() -> Settings:
+    """
+    Returns the process-wide settings, read from the environment on first use.
+    """
+    global _settings
+    if _settings is None:
+        _settings = Settings.from_env()
+    return _settings
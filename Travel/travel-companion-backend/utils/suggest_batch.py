@@ -0,0 +1,43 @@
+# travel-companion-backend/utils/suggest_batch.py
+
+import os
+import asyncio
+from utils.settings import load_env
+
+load_env()
+
+# How many addresses of one batch are worked on at once, and the largest
+# batch accepted. Upstream quotas are enforced separately by the
+# per-provider rate limiters, so this only bounds memory and open work.
+SUGGEST_BATCH_CONCURRENCY = int(os.getenv("SUGGEST_BATCH_CONCURRENCY", "4"))
+SUGGEST_BATCH_MAX_ADDRESSES = int(os.getenv("SUGGEST_BATCH_MAX_ADDRESSES", "500"))
+
+
+async def run_suggestion_batch(addresses: list, compute, concurrency: int = SUGGEST_BATCH_CONCURRENCY):
+    """
+    Runs `compute(address)` for every address with bounded concurrency and
+    yields (index, address, places, error) tuples in completion order.
+
+    Exactly one of `places` and `error` is set: an exception or an empty
+    result becomes a per-item error instead of failing the whole batch.
+    Leaving the generator early cancels the remaining work.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def _one(index: int, address: str):
+        async with semaphore:
+            try:
+                places = await compute(address)
+            except Exception as e:
+                return index, address, None, str(e) or type(e).__name__
+        if not places:
+            return index, address, None, "no places found"
+        return index, address, places, None
+
+    tasks = [asyncio.create_task(_one(index, address)) for index, address in enumerate(addresses)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,250 @@
+# travel-companion-backend/utils/suggestion_cache.py
+
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from utils.settings import load_env
+from utils.geocode_cache import normalize_address
+from utils.tiered_cache import SharedStore, get_shared_store
+from utils.metrics import REGISTRY, cache_family
+
+load_env()
+
+# A cached place list is served as-is for SUGGESTION_CACHE_TTL seconds. For the
+# following SUGGESTION_CACHE_STALE_TTL seconds it is still served instantly, but
+# a background refresh is started. After that it is recomputed on the request path.
+SUGGESTION_CACHE_TTL = float(os.getenv("SUGGESTION_CACHE_TTL", str(6 * 3600)))
+SUGGESTION_CACHE_STALE_TTL = float(os.getenv("SUGGESTION_CACHE_STALE_TTL", str(24 * 3600)))
+# Per-worker memory tier; other workers' results are read from the shared tier.
+SUGGESTION_CACHE_MAX_ENTRIES = int(os.getenv("SUGGESTION_CACHE_MAX_ENTRIES", "256"))
+
+SHARED_NAMESPACE = "suggestions"
+
+
+def _copy_places(places: list) -> list:
+    # Callers get their own dicts so they can't mutate the cached entry.
+    return [dict(place) for place in places]
+
+
+class SuggestionCache:
+    """
+    Caches finished place lists per normalized location, with LRU eviction,
+    single-flight coalescing of concurrent misses and stale-while-revalidate.
+
+    Computed lists are also written to the host-wide shared store
+    (utils.tiered_cache), so a location one worker asked Gemini about is
+    served by every other worker without another call.
+    """
+
+    def __init__(self, ttl: float = SUGGESTION_CACHE_TTL, stale_ttl: float = SUGGESTION_CACHE_STALE_TTL,
+                 max_entries: int = SUGGESTION_CACHE_MAX_ENTRIES, store: SharedStore | None = None):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.store = store if store is not None else get_shared_store()
+        self._entries = OrderedDict()   # key -> (places, stored_at)
+        self._inflight = {}             # key -> asyncio.Task
+        self._snapshot = None
+        self.stats = {"hits": 0, "shared_hits": 0, "snapshot_hits": 0, "stale_hits": 0, "misses": 0,
+                      "coalesced": 0, "refreshes": 0, "errors": 0, "snapshot_loads": 0, "shared_loads": 0}
+
+    def _store(self, key: str, places: list, stored_at: float | None = None):
+        self._entries[key] = (places, time.monotonic() if stored_at is None else stored_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _share(self, key: str, places: list):
+        if self.store is not None:
+            now = time.time()
+            self.store.set(SHARED_NAMESPACE, key, [now, places], now + self.ttl + self.stale_ttl)
+
+    def _load_shared(self, key: str):
+        # Returns (places, stored_at) from the shared store, or None. Entries
+        # keep the age they have there, so the usual TTLs apply.
+        found = self.store.get(SHARED_NAMESPACE, key) if self.store is not None else None
+        if not found or not found[0][1]:
+            return None
+        computed_at, places = found[0]
+        return places, time.monotonic() - max(0.0, time.time() - computed_at)
+
+    def _entry(self, key: str):
+        """
+        Returns ((places, stored_at), tier) with tier "memory", "shared" or
+        "snapshot", or (None, None). Entries found outside memory are copied
+        into it.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            if time.monotonic() - entry[1] < self.ttl:
+                return entry, "memory"
+            # Another worker may have refreshed it already.
+            shared = self._load_shared(key)
+            if shared is not None and shared[1] > entry[1]:
+                self.stats["shared_loads"] += 1
+                self._store(key, *shared)
+                return self._entries[key], "shared"
+            return entry, "memory"
+        shared = self._load_shared(key)
+        if shared is not None:
+            self.stats["shared_loads"] += 1
+            self._store(key, *shared)
+            return self._entries[key], "shared"
+        # Falls back to the warm-up snapshot, decoding its places on first use.
+        if self._snapshot is not None:
+            found = self._snapshot.places(key)
+            if found and found[0]:
+                places, age = found
+                self.stats["snapshot_loads"] += 1
+                self._store(key, places, time.monotonic() - age)
+                return self._entries[key], "snapshot"
+        return None, None
+
+    def attach_snapshot(self, snapshot) -> int:
+        """
+        Serves places from a warm-up snapshot (utils.cache_snapshot) for
+        locations that aren't cached yet. Returns how many it holds.
+        """
+        self._snapshot = snapshot
+        return len(snapshot.locations())
+
+    def _start(self, key: str, location: str, compute) -> asyncio.Task:
+        async def _run():
+            try:
+                places = await compute(location)
+                # Empty lists are how the pipeline reports failure; don't pin them.
+                if places:
+                    self._store(key, _copy_places(places))
+                    self._share(key, places)
+                return places
+            except Exception:
+                self.stats["errors"] += 1
+                raise
+            finally:
+                self._inflight.pop(key, None)
+
+        task = asyncio.create_task(_run())
+        self._inflight[key] = task
+        return task
+
+    def _refresh_in_background(self, key: str, location: str, compute):
+        if key in self._inflight:
+            return
+        self.stats["refreshes"] += 1
+        task = self._start(key, location, compute)
+        # Retrieve the exception so a failed refresh isn't reported as unhandled.
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    def _cached(self, key: str, location: str, compute):
+        """
+        Returns the cached places for `key` while they may still be served:
+        fresh ones as they are, stale ones while a background refresh runs.
+        Expired entries are dropped and None is returned.
+        """
+        entry, tier = self._entry(key)
+        if entry is None:
+            return None
+        places, stored_at = entry
+        age = time.monotonic() - stored_at
+        if age < self.ttl:
+            self._entries.move_to_end(key)
+            self.stats[{"memory": "hits", "shared": "shared_hits", "snapshot": "snapshot_hits"}[tier]] += 1
+            return _copy_places(places)
+        if age < self.ttl + self.stale_ttl:
+            self._entries.move_to_end(key)
+            self.stats["stale_hits"] += 1
+            self._refresh_in_background(key, location, compute)
+            return _copy_places(places)
+        del self._entries[key]
+        return None
+
+    def peek(self, location: str, compute):
+        """
+        Returns the cached places for a location, or None, without computing
+        them on a miss. Stale places are returned and refreshed in the
+        background with `compute(location)`, like in get_or_compute.
+        """
+        return self._cached(normalize_address(location), location, compute)
+
+    def has(self, location: str) -> bool:
+        """
+        True if places that may still be served (fresh or stale) are cached
+        for a location.
+        """
+        # Looks through the tiers without copying anything into memory, so the
+        # lookup that follows still counts the hit for the right tier.
+        key = normalize_address(location)
+        entry = self._entries.get(key) or self._load_shared(key)
+        if entry is None and self._snapshot is not None:
+            found = self._snapshot.places(key)
+            if found and found[0]:
+                entry = (found[0], time.monotonic() - found[1])
+        return entry is not None and time.monotonic() - entry[1] < self.ttl + self.stale_ttl
+
+    def put(self, location: str, places: list):
+        """
+        Stores a precomputed place list for a location.
+        """
+        if places:
+            key = normalize_address(location)
+            self._store(key, _copy_places(places))
+            self._share(key, places)
+
+    async def get_or_compute(self, location: str, compute) -> list:
+        """
+        Returns the place list for `location`, calling `compute(location)` only
+        when there is no usable cached entry and no identical computation is
+        already running.
+        """
+        key = normalize_address(location)
+        cached = self._cached(key, location, compute)
+        if cached is not None:
+            return cached
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats["misses"] += 1
+            task = self._start(key, location, compute)
+        else:
+            self.stats["coalesced"] += 1
+
+        # Shield the shared task so one client disconnecting doesn't cancel
+        # the computation other waiters depend on.
+        places = await asyncio.shield(task)
+        return _copy_places(places)
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        stats["entries"] = len(self._entries)
+        stats["inflight"] = len(self._inflight)
+        lookups = sum(stats[name] for name in ("hits", "shared_hits", "snapshot_hits", "stale_hits", "misses"))
+        for tier, name in (("memory", "hits"), ("shared", "shared_hits"), ("snapshot", "snapshot_hits")):
+            stats[f"{tier}_hit_rate"] = stats[name] / lookups if lookups else 0.0
+        return stats
+
+
+_suggestion_cache = None
+
+
+def get_suggestion_cache() -> SuggestionCache:
+    """
+    Returns the process-wide suggestion cache, creating it on first use.
+    """
+    global _suggestion_cache
+    if _suggestion_cache is None:
+        _suggestion_cache = SuggestionCache()
+    return _suggestion_cache
+
+
+def _collect_metrics() -> list:
+    if _suggestion_cache is None:
+        return []
+    stats = _suggestion_cache.get_stats()
+    # Fresh hits by tier; stale hits are counted once whichever tier held them.
+    return cache_family("suggestion", stats["hits"], stats["misses"], shared_hit=stats["shared_hits"],
+                        snapshot_hit=stats["snapshot_hits"], stale_hit=stats["stale_hits"],
+                        coalesced=stats["coalesced"])
+
+
+REGISTRY.register_collector(_collect_metrics)
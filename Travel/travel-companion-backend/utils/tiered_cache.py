@@ -0,0 +1,244 @@
+# travel-companion-backend/utils/tiered_cache.py
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from utils.settings import load_env
+from utils.llm_json import loads
+from utils.log import get_logger
+from utils.metrics import REGISTRY
+
+try:
+    import orjson
+except ImportError:  # optional; the standard library encoder is used instead
+    orjson = None
+
+load_env()
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# One SQLite file in WAL mode shared by every worker process on the host:
+# readers never block each other or the writer, so a result computed by
+# one worker is a cheap local read for all the others.
+SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH", os.path.join(BACKEND_DIR, "cache", "shared.sqlite3"))
+SHARED_CACHE_ENABLED = os.getenv("SHARED_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+# How long a write waits for another worker's write to finish.
+SHARED_CACHE_BUSY_TIMEOUT_S = float(os.getenv("SHARED_CACHE_BUSY_TIMEOUT_S", "2"))
+# Values at least this large (as JSON) are zlib-compressed in the shared tier.
+SHARED_CACHE_COMPRESS_MIN_BYTES = int(os.getenv("SHARED_CACHE_COMPRESS_MIN_BYTES", "512"))
+# Expired rows are deleted once every this many writes of a process.
+SHARED_CACHE_PURGE_EVERY = int(os.getenv("SHARED_CACHE_PURGE_EVERY", "1000"))
+
+# First byte of every stored value: plain or zlib-compressed JSON.
+_PLAIN = b"j"
+_ZLIB = b"z"
+
+logger = get_logger("tiered_cache")
+
+
+def encode_value(value) -> bytes:
+    """
+    Serializes a JSON-compatible value compactly for the shared tier.
+    """
+    data = orjson.dumps(value) if orjson is not None else \
+        json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if len(data) >= SHARED_CACHE_COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(data, 6)
+        if len(compressed) < len(data):
+            return _ZLIB + compressed
+    return _PLAIN + data
+
+
+def decode_value(blob: bytes):
+    tag, data = blob[:1], blob[1:]
+    if tag == _ZLIB:
+        data = zlib.decompress(data)
+    elif tag != _PLAIN:
+        raise ValueError(f"unknown value encoding {tag!r}")
+    return loads(data)
+
+
+class SharedStore:
+    """
+    Namespaced key/value rows with an expiry time, in SQLite (WAL mode).
+    Errors are logged and treated as misses; the cache in front of it
+    keeps working from memory.
+    """
+
+    def __init__(self, db_path: str = SHARED_CACHE_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._writes = 0
+
+    def _connection(self):
+        if self._conn is None:
+            if self.db_path != ":memory:":
+                os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=SHARED_CACHE_BUSY_TIMEOUT_S, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # With WAL, NORMAL only risks the last writes on power loss, which
+            # a cache can afford, and skips an fsync per commit.
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, expires_at REAL NOT NULL, "
+                "PRIMARY KEY (namespace, key)) WITHOUT ROWID"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, namespace: str, key: str):
+        """
+        Returns (value, expires_at) for a live entry, or None.
+        """
+        try:
+            with self._lock:
+                row = self._connection().execute(
+                    "SELECT value, expires_at FROM entries WHERE namespace = ? AND key = ? AND expires_at > ?",
+                    (namespace, key, time.time()),
+                ).fetchone()
+            return (decode_value(row[0]), row[1]) if row else None
+        except (sqlite3.Error, ValueError, zlib.error) as e:
+            logger.error("Shared cache read error", namespace=namespace, error=str(e))
+            return None
+
+    def set(self, namespace: str, key: str, value, expires_at: float):
+        try:
+            blob = encode_value(value)
+            with self._lock:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                    (namespace, key, blob, expires_at),
+                )
+                self._writes += 1
+                if SHARED_CACHE_PURGE_EVERY > 0 and self._writes % SHARED_CACHE_PURGE_EVERY == 0:
+                    conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+                conn.commit()
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.error("Shared cache write error", namespace=namespace, error=str(e))
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_shared_store = None
+_tiered_caches = []
+
+
+def get_shared_store() -> SharedStore | None:
+    """
+    Returns the process-wide shared store, or None when SHARED_CACHE_ENABLED is off.
+    """
+    global _shared_store
+    if _shared_store is None and SHARED_CACHE_ENABLED:
+        _shared_store = SharedStore()
+    return _shared_store
+
+
+class TieredCache:
+    """
+    Two-tier cache for one namespace: a small in-process LRU in front of the
+    host-wide SharedStore. Memory misses that hit the shared tier are copied
+    into memory with their remaining lifetime, so workers only keep the hot
+    entries and the rest is held once per host, not once per worker.
+
+    Values must be JSON-compatible. Every entry expires `ttl` seconds after
+    it was set, unless a TTL is given for it.
+    """
+
+    def __init__(self, namespace: str, ttl: float, max_memory_entries: int, store: SharedStore | None = None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.store = store if store is not None else get_shared_store()
+        self._memory = OrderedDict()   # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "shared_hits": 0, "misses": 0, "stores": 0}
+        _tiered_caches.append(self)
+
+    def _remember(self, key: str, value, expires_at: float):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str):
+        """
+        Returns (hit, value); `value` can be None for a cached negative answer.
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[1] > time.time():
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return True, entry[0]
+                del self._memory[key]
+
+        found = self.store.get(self.namespace, key) if self.store is not None else None
+        with self._lock:
+            if found is not None:
+                value, expires_at = found
+                self._remember(key, value, expires_at)
+                self.stats["shared_hits"] += 1
+                return True, value
+            self.stats["misses"] += 1
+            return False, None
+
+    def set(self, key: str, value, ttl: float | None = None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._remember(key, value, expires_at)
+            self.stats["stores"] += 1
+        if self.store is not None:
+            self.store.set(self.namespace, key, value, expires_at)
+
+    def preload(self, key: str, value, expires_at: float):
+        """
+        Seeds the memory tier only (e.g. from a snapshot every worker loads anyway).
+        """
+        if expires_at > time.time():
+            with self._lock:
+                self._remember(key, value, expires_at)
+
+    def memory_items(self) -> list:
+        """
+        Returns (key, value, expires_at) for every live in-memory entry.
+        """
+        now = time.time()
+        with self._lock:
+            return [(key, value, expires_at) for key, (value, expires_at) in self._memory.items() if expires_at > now]
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["shared_hits"] + stats["misses"]
+        # Each tier's hit rate is over the lookups that reached it.
+        stats["memory_hit_rate"] = stats["memory_hits"] / lookups if lookups else 0.0
+        shared_lookups = stats["shared_hits"] + stats["misses"]
+        stats["shared_hit_rate"] = stats["shared_hits"] / shared_lookups if shared_lookups else 0.0
+        stats["hit_rate"] = (stats["memory_hits"] + stats["shared_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+def _collect_metrics() -> list:
+    # Hits and misses are reported by each cache's owner through cache_family.
+    return [("cache_memory_entries", "gauge", "Entries in the in-process tier of each cache.",
+             [({"cache": cache.namespace}, cache.get_stats()["memory_entries"]) for cache in _tiered_caches])]
+
+
+REGISTRY.register_collector(_collect_metrics)
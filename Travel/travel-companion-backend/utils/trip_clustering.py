@@ -0,0 +1,147 @@
+# travel-companion-backend/utils/trip_clustering.py
+
+import os
+from utils.settings import load_env
+from utils.geo import haversine_km, has_coordinates
+from utils.itinerary_scheduler import ITINERARY_VISIT_MIN
+
+load_env()
+
+# Time budget of one day (travel + visits) when the request doesn't give one.
+TRIP_DAY_BUDGET_MIN = int(os.getenv("TRIP_DAY_BUDGET_MIN", "480"))
+# Travel time charged to every stop when balancing days; the real legs are
+# only known once each day's route is optimized.
+TRIP_STOP_TRAVEL_MIN = int(os.getenv("TRIP_STOP_TRAVEL_MIN", "30"))
+TRIP_CLUSTER_ITERATIONS = int(os.getenv("TRIP_CLUSTER_ITERATIONS", "12"))
+# A place whose nearest day is full may still join it, up to this fraction
+# over the day's share, when every day with room is more than
+# TRIP_FAR_CLUSTER_KM farther away: a long day beats a Mumbai-Pune round trip.
+TRIP_CAPACITY_SLACK = float(os.getenv("TRIP_CAPACITY_SLACK", "0.5"))
+TRIP_FAR_CLUSTER_KM = float(os.getenv("TRIP_FAR_CLUSTER_KM", "50"))
+
+
+def place_cost_min(place: dict) -> int:
+    """
+    Minutes a place takes out of a day: its visit plus a share of travel.
+    """
+    return int(place.get("visit_duration_min") or ITINERARY_VISIT_MIN) + TRIP_STOP_TRAVEL_MIN
+
+
+def _centroid(points: list):
+    return (sum(lat for lat, _ in points) / len(points), sum(lng for _, lng in points) / len(points))
+
+
+def _initial_centres(points: list, k: int, start=None) -> list:
+    # Deterministic farthest-point seeding: the point farthest from the mean,
+    # then repeatedly the point farthest from every chosen centre.
+    mean = _centroid(points)
+    centres = [max(points, key=lambda p: haversine_km(*p, *mean))]
+    while len(centres) < k:
+        centres.append(max(points, key=lambda p: min(haversine_km(*p, *c) for c in centres)))
+    return _day_order(centres, start or mean)
+
+
+def _day_order(centres: list, start) -> list:
+    # Day order: the centre nearest the start first, then always the nearest
+    # remaining one. Clusters keep their index, so group i is day i.
+    centres = list(centres)
+    here = start
+    ordered = []
+    while centres:
+        nxt = min(centres, key=lambda c: haversine_km(*here, *c))
+        centres.remove(nxt)
+        ordered.append(nxt)
+        here = nxt
+    return ordered
+
+
+def _assign(points: list, costs: list, centres: list, capacities: list) -> list:
+    """
+    Assigns every point to a centre without exceeding its capacity. Points
+    with the most to lose from not getting their nearest centre go first.
+    The nearest centre may overfill by TRIP_CAPACITY_SLACK rather than send
+    a point to a far away cluster; past that, the centre with the most spare
+    time takes it.
+    """
+    dist = [[haversine_km(*p, *c) for c in centres] for p in points]
+
+    def regret(i):
+        ranked = sorted(dist[i])
+        return ranked[1] - ranked[0] if len(ranked) > 1 else 0.0
+
+    load = [0] * len(centres)
+    labels = [0] * len(points)
+    for i in sorted(range(len(points)), key=regret, reverse=True):
+        nearest = min(range(len(centres)), key=lambda d: dist[i][d])
+        fitting = [d for d in range(len(centres)) if load[d] + costs[i] <= capacities[d]]
+        day = min(fitting, key=lambda d: dist[i][d]) if fitting else None
+        if (day is None or dist[i][day] - dist[i][nearest] > TRIP_FAR_CLUSTER_KM) \
+                and load[nearest] + costs[i] <= capacities[nearest] * (1 + TRIP_CAPACITY_SLACK):
+            day = nearest
+        if day is None:
+            day = max(range(len(centres)), key=lambda d: capacities[d] - load[d])
+        labels[i] = day
+        load[day] += costs[i]
+    return labels
+
+
+def cluster_days(places: list, budgets: list, start_coords=None) -> list:
+    """
+    Splits places into len(budgets) groups of nearby places whose visit
+    time is balanced in proportion to each day's time budget (capacitated
+    k-means on the coordinates). Days are ordered from the start
+    ({"lat", "lng"}, if known) outwards by their final centroids. A day may
+    run over its share (TRIP_CAPACITY_SLACK) to keep far apart clusters on
+    separate days.
+
+    Places without coordinates fill the days with the most spare time.
+    Days can come back empty when there are fewer places than days.
+
+    Returns:
+        list: One list of places per day, in budget order.
+    """
+    days = len(budgets)
+    groups = [[] for _ in range(days)]
+    if not places:
+        return groups
+
+    located = [p for p in places if has_coordinates(p)]
+    unlocated = [p for p in places if not has_coordinates(p)]
+    total = sum(place_cost_min(p) for p in places)
+    # Each day gets its share of the work; an over-full trip overfills every
+    # day by the same proportion instead of piling the excess onto one.
+    scale = max(1.0, total / max(1, sum(budgets)))
+    capacities = [budget * scale for budget in budgets]
+    load = [0] * days
+
+    if located:
+        points = [(p["latitude"], p["longitude"]) for p in located]
+        costs = [place_cost_min(p) for p in located]
+        k = min(days, len(set(points)))
+        start = (start_coords["lat"], start_coords["lng"]) if start_coords else None
+        centres = _initial_centres(points, k, start)
+        # With fewer distinct locations than days, the first days are used.
+        labels = _assign(points, costs, centres, capacities[:k])
+        for _ in range(TRIP_CLUSTER_ITERATIONS):
+            members = [[points[i] for i in range(len(points)) if labels[i] == d] for d in range(k)]
+            centres = [_centroid(m) if m else centres[d] for d, m in enumerate(members)]
+            new_labels = _assign(points, costs, centres, capacities[:k])
+            if new_labels == labels:
+                break
+            labels = new_labels
+        # The clusters moved while iterating, so the days are put in order
+        # again from their final centroids (and balanced to those days' budgets).
+        members = [[points[i] for i in range(len(points)) if labels[i] == d] for d in range(k)]
+        centres = [_centroid(m) if m else centres[d] for d, m in enumerate(members)]
+        ordered = _day_order(centres, start or _centroid(points))
+        if ordered != centres:
+            labels = _assign(points, costs, ordered, capacities[:k])
+        for place, cost, day in zip(located, costs, labels):
+            groups[day].append(place)
+            load[day] += cost
+
+    for place in unlocated:
+        day = max(range(days), key=lambda d: capacities[d] - load[d])
+        groups[day].append(place)
+        load[day] += place_cost_min(place)
+    return groups
@@ -0,0 +1,242 @@
+# travel-companion-backend/utils/wikipedia_nearby.py
+
+import os
+import re
+import httpx
+from difflib import SequenceMatcher
+from utils.settings import load_env
+from utils.geo import geohash_decode, geohash_encode, geohash_precision_for_radius, haversine_km, has_coordinates
+from utils.http_client import get_async_client
+from utils.rate_limiter import get_rate_limiter
+from utils.deadline import DeadlineExceeded, upstream_timeout
+from utils.tiered_cache import TieredCache
+from utils.log import get_logger
+from utils.metrics import REGISTRY, cache_family, track_upstream
+
+load_env()
+
+WIKIPEDIA_API_URL = "https://en.wikipedia.org/w/api.php"
+# The geosearch API rejects radii above 10 km.
+WIKIPEDIA_MAX_RADIUS_M = 10000
+WIKIPEDIA_CACHE_TTL = float(os.getenv("WIKIPEDIA_CACHE_TTL", str(24 * 3600)))
+# Per-worker memory tier; everything else is served from the shared tier.
+WIKIPEDIA_CACHE_MAX_ENTRIES = int(os.getenv("WIKIPEDIA_CACHE_MAX_ENTRIES", "256"))
+# Wikipedia places closer than this to a Gemini place, or with a similar
+# title, are treated as the same place.
+WIKIPEDIA_DEDUP_DISTANCE_M = float(os.getenv("WIKIPEDIA_DEDUP_DISTANCE_M", "300"))
+WIKIPEDIA_DEDUP_TITLE_RATIO = float(os.getenv("WIKIPEDIA_DEDUP_TITLE_RATIO", "0.8"))
+# A title contained word for word in another ("Amber Fort" in "Amber Fort
+# Jaipur") only counts as the same place if it is at least this long, so
+# generic names like "Fort" or "Park" don't match every fort and park.
+WIKIPEDIA_DEDUP_MIN_CONTAINED_LEN = int(os.getenv("WIKIPEDIA_DEDUP_MIN_CONTAINED_LEN", "8"))
+
+# How many deduplicated Wikipedia places are appended to each suggestion
+# response (0 disables the complement), out of how many fetched around the
+# searched location.
+WIKIPEDIA_COMPLEMENT_LIMIT = int(os.getenv("WIKIPEDIA_COMPLEMENT_LIMIT", "4"))
+WIKIPEDIA_FETCH_LIMIT = int(os.getenv("WIKIPEDIA_FETCH_LIMIT", "12"))
+WIKIPEDIA_RADIUS_M = int(os.getenv("WIKIPEDIA_RADIUS_M", str(WIKIPEDIA_MAX_RADIUS_M)))
+
+WIKIPEDIA_HEADERS = {"User-Agent": "TravelCompanion/1.0 (nearby places lookup)"}
+
+logger = get_logger("wikipedia")
+
+_session = None
+_cache = TieredCache("wikipedia", WIKIPEDIA_CACHE_TTL, WIKIPEDIA_CACHE_MAX_ENTRIES)   # "cell:radius:limit" -> places
+stats = {"api_calls": 0, "errors": 0}
+
+
+def _get_session():
+    # requests is only needed by the synchronous lookup, so it's imported on first use.
+    global _session
+    if _session is None:
+        import requests
+        _session = requests.Session()
+        _session.headers.update(WIKIPEDIA_HEADERS)
+    return _session
+
+
+def _query_params(lat: float, lng: float, radius: int, limit: int) -> dict:
+    # One call: the geosearch generator lists the pages and the prop modules
+    # add coordinates, thumbnails and short descriptions for all of them.
+    return {
+        "action": "query",
+        "format": "json",
+        "formatversion": 2,
+        "generator": "geosearch",
+        "ggscoord": f"{lat}|{lng}",
+        "ggsradius": radius,
+        "ggslimit": limit,
+        "prop": "coordinates|pageimages|description",
+        "piprop": "thumbnail",
+        "pithumbsize": 400,
+        "pilimit": limit,
+        "colimit": limit,
+    }
+
+
+def _places_from_data(data: dict, lat: float, lng: float) -> list:
+    places = []
+    for page in data.get("query", {}).get("pages", []):
+        coords = (page.get("coordinates") or [{}])[0]
+        if "lat" not in coords or "lon" not in coords:
+            continue
+        pid = page["pageid"]
+        places.append({
+            "name": page.get("title", ""),
+            "address": "",
+            "latitude": coords["lat"],
+            "longitude": coords["lon"],
+            "image": page.get("thumbnail", {}).get("source", ""),
+            "wiki": f"https://en.wikipedia.org/?curid={pid}",
+            "description": page.get("description", ""),
+            "pageid": pid,
+        })
+    # The generator doesn't keep geosearch's distance order.
+    places.sort(key=lambda p: haversine_km(lat, lng, p["latitude"], p["longitude"]))
+    return places
+
+
+def _cell_query(lat: float, lng: float, radius: int, limit: int):
+    """
+    Snaps the search to the centre of a geohash cell, so nearby queries share
+    one cache entry. Returns (cache_key, lat, lng, radius).
+    """
+    radius = max(10, min(int(radius), WIKIPEDIA_MAX_RADIUS_M))
+    cell = geohash_encode(lat, lng, geohash_precision_for_radius(radius))
+    cell_lat, cell_lng = geohash_decode(cell)
+    return f"{cell}:{radius}:{limit}", cell_lat, cell_lng, radius
+
+
+def _cache_get(key: str):
+    hit, places = _cache.get(key)
+    return [dict(p) for p in places] if hit else None
+
+
+def _cache_put(key: str, places: list):
+    _cache.set(key, [dict(p) for p in places])
+
+
+def fetch_nearby_places(lat: float, lng: float, radius: int = WIKIPEDIA_MAX_RADIUS_M, limit: int = 8) -> list:
+    """
+    Returns Wikipedia pages near a point with coordinates and thumbnails,
+    using a single API call and the geohash-cell cache.
+    """
+    import requests
+
+    key, q_lat, q_lng, radius = _cell_query(lat, lng, radius, limit)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+    try:
+        stats["api_calls"] += 1
+        with track_upstream("wikipedia", "geosearch"):
+            resp = _get_session().get(WIKIPEDIA_API_URL, params=_query_params(q_lat, q_lng, radius, limit), timeout=10)
+        resp.raise_for_status()
+        places = _places_from_data(resp.json(), q_lat, q_lng)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        stats["errors"] += 1
+        logger.warning("Wikipedia geosearch failed", error=str(e))
+        return []
+    _cache_put(key, places)
+    return places
+
+
+async def fetch_nearby_places_async(lat: float, lng: float, radius: int = WIKIPEDIA_MAX_RADIUS_M, limit: int = 8) -> list:
+    """
+    Async variant of fetch_nearby_places using the shared pooled HTTP client.
+    """
+    key, q_lat, q_lng, radius = _cell_query(lat, lng, radius, limit)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+    try:
+        await get_rate_limiter("wikipedia").acquire()
+        stats["api_calls"] += 1
+        with track_upstream("wikipedia", "geosearch"):
+            resp = await get_async_client().get(WIKIPEDIA_API_URL, params=_query_params(q_lat, q_lng, radius, limit),
+                                                headers=WIKIPEDIA_HEADERS, timeout=upstream_timeout(10))
+        resp.raise_for_status()
+        places = _places_from_data(resp.json(), q_lat, q_lng)
+    except (httpx.HTTPError, ValueError, DeadlineExceeded) as e:
+        stats["errors"] += 1
+        logger.warning("Wikipedia geosearch failed", error=str(e))
+        return []
+    _cache_put(key, places)
+    return places
+
+
+_TITLE_NOISE_RE = re.compile(r"\([^)]*\)|[^\w\s]", re.UNICODE)
+
+
+def _title_key(title: str) -> str:
+    return " ".join(_TITLE_NOISE_RE.sub(" ", (title or "").casefold()).split())
+
+
+def similar_titles(a: str, b: str) -> bool:
+    """
+    True if two place names look like the same place, ignoring case,
+    punctuation and parenthesised qualifiers.
+    """
+    a, b = _title_key(a), _title_key(b)
+    if not a or not b:
+        return False
+    shorter, longer = sorted((a, b), key=len)
+    if len(shorter) >= WIKIPEDIA_DEDUP_MIN_CONTAINED_LEN and f" {shorter} " in f" {longer} ":
+        return True
+    return SequenceMatcher(None, a, b).ratio() >= WIKIPEDIA_DEDUP_TITLE_RATIO
+
+
+def is_duplicate(candidate: dict, places: list) -> bool:
+    """
+    True if a Wikipedia place matches one of `places` by proximity or title.
+    """
+    for place in places:
+        if has_coordinates(place) and haversine_km(candidate["latitude"], candidate["longitude"],
+                                                   place["latitude"], place["longitude"]) * 1000 <= WIKIPEDIA_DEDUP_DISTANCE_M:
+            return True
+        if similar_titles(candidate["name"], place.get("title", "")):
+            return True
+    return False
+
+
+def to_suggested_place(wiki_place: dict, placeholder_image: str) -> dict:
+    """
+    Converts a Wikipedia place into the place shape /api/suggest returns.
+    """
+    return {
+        "title": wiki_place["name"],
+        "summary": wiki_place.get("description") or "Nearby place listed on Wikipedia.",
+        "main_attraction": "N/A",
+        "best_time_to_visit": "N/A",
+        "visiting_hours": "N/A",
+        "address": wiki_place.get("address") or "N/A",
+        "image": wiki_place.get("image") or placeholder_image,
+        "latitude": wiki_place["latitude"],
+        "longitude": wiki_place["longitude"],
+        "wiki": wiki_place["wiki"],
+        "source": "wikipedia",
+    }
+
+
+def complement_places(places: list, wiki_places: list, limit: int, placeholder_image: str) -> list:
+    """
+    Returns up to `limit` Wikipedia places, in suggestion shape, that don't
+    duplicate any of `places` (or each other).
+    """
+    extras = []
+    for wiki_place in wiki_places:
+        if len(extras) >= limit:
+            break
+        if is_duplicate(wiki_place, places) or is_duplicate(wiki_place, extras):
+            continue
+        extras.append(to_suggested_place(wiki_place, placeholder_image))
+    return extras
+
+
+def _collect_metrics() -> list:
+    cache = _cache.get_stats()
+    return cache_family("wikipedia", cache["memory_hits"], cache["misses"], shared_hit=cache["shared_hits"])
+
+
+REGISTRY.register_collector(_collect_metrics)
@@ -0,0 +1,164 @@
+# travel-companion-backend/warm_cache.py
+"""
+Precomputes suggestions, geocodes and image lookups for the most requested
+destinations and writes them to the cache snapshot that every worker loads
+at startup (utils.cache_snapshot), so freshly deployed workers answer
+popular destinations from cache instead of queueing on Gemini.
+
+Run from the backend directory, e.g. before each deploy:
+    python -m warm_cache
+    python -m warm_cache --destinations "Mumbai,Goa,Jaipur" --concurrency 2
+    python -m warm_cache --destinations-file destinations.txt --output /srv/cache/snapshot.bin
+
+Destinations whose suggestions fail keep their entries from the previous
+snapshot (with their original age) unless --no-keep-previous is given.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from utils.settings import load_env
+from utils.cache_snapshot import (ALL, CACHE_SNAPSHOT_PATH, GEOCODES, IMAGES, SUGGESTIONS, CacheSnapshot,
+                                  SnapshotError, SnapshotWriter)
+from utils.gemini_client import suggest_tourist_places_async
+from utils.geocode_cache import get_geocode_cache, normalize_address
+from utils.geocode_utils import get_coordinates_from_address_async
+from utils.http_client import close_async_client
+from utils.image_resolver import get_image_resolver
+from utils.place_catalog import get_place_catalog
+
+load_env()
+
+# Destinations warmed when neither --destinations nor --destinations-file is given.
+WARM_DESTINATIONS = tuple(d.strip() for d in os.getenv(
+    "WARM_DESTINATIONS",
+    "Mumbai,Delhi,Bengaluru,Goa,Jaipur,Agra,Hyderabad,Chennai,Kolkata,Pune,"
+    "Udaipur,Varanasi,Rishikesh,Manali,Shimla,Darjeeling,Kochi,Mysuru,Amritsar,Leh",
+).split(",") if d.strip())
+# Destinations computed at once; each one makes a Gemini call plus its
+# image and geocode lookups, which the provider rate limiters still apply to.
+WARM_CONCURRENCY = int(os.getenv("WARM_CONCURRENCY", "4"))
+WARM_DESTINATION_TIMEOUT_S = float(os.getenv("WARM_DESTINATION_TIMEOUT_S", "90"))
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--destinations", default=None, help="comma-separated destinations")
+    parser.add_argument("--destinations-file", default=None, help="file with one destination per line")
+    parser.add_argument("--concurrency", type=int, default=WARM_CONCURRENCY)
+    parser.add_argument("--timeout", type=float, default=WARM_DESTINATION_TIMEOUT_S,
+                        help="seconds allowed per destination")
+    parser.add_argument("--output", default=CACHE_SNAPSHOT_PATH)
+    parser.add_argument("--no-keep-previous", dest="keep_previous", action="store_false",
+                        help="drop destinations that fail instead of keeping their previous entries")
+    return parser.parse_args(argv)
+
+
+def _destinations(args) -> list:
+    if args.destinations_file:
+        with open(args.destinations_file, encoding="utf-8") as f:
+            names = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    elif args.destinations:
+        names = [d.strip() for d in args.destinations.split(",") if d.strip()]
+    else:
+        names = list(WARM_DESTINATIONS)
+    # One entry per cache key, in the given order.
+    unique = {}
+    for name in names:
+        unique.setdefault(normalize_address(name), name)
+    return list(unique.values())
+
+
+async def _warm(destination: str, semaphore: asyncio.Semaphore, timeout: float):
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            # The destination itself is geocoded too: it is the usual start
+            # location of the travel plan that follows.
+            places, _ = await asyncio.wait_for(asyncio.gather(
+                suggest_tourist_places_async(destination, raise_errors=True),
+                get_coordinates_from_address_async(destination),
+            ), timeout)
+        except Exception as e:  # one failed destination doesn't stop the others
+            return destination, None, str(e) or type(e).__name__, time.perf_counter() - started
+        get_place_catalog().add_places(places)
+        return destination, places, None, time.perf_counter() - started
+
+
+async def _run(args, destinations: list) -> SnapshotWriter:
+    semaphore = asyncio.Semaphore(max(1, args.concurrency))
+    writer = SnapshotWriter()
+    failed = []
+    try:
+        for coro in asyncio.as_completed([_warm(d, semaphore, args.timeout) for d in destinations]):
+            destination, places, error, seconds = await coro
+            if places:
+                writer.add(SUGGESTIONS, normalize_address(destination), [time.time(), places])
+                print(f"  ok      {destination:<24} {len(places):>3} places  {seconds:6.1f}s")
+            else:
+                failed.append(destination)
+                print(f"  FAILED  {destination:<24} {error or 'no places'}")
+    finally:
+        await close_async_client()
+
+    now = time.time()
+    geocodes = {key: [key, coords["lat"] if coords else None, coords["lng"] if coords else None, expires_at]
+                for key, coords, expires_at in get_geocode_cache().memory_items()}
+    images = {key: [key, result.status, result.url, result.provider, now + seconds_left]
+              for key, result, seconds_left in get_image_resolver().cache_items()}
+
+    if failed and args.keep_previous:
+        _keep_previous(args.output, writer, failed, geocodes, images)
+    writer.add(GEOCODES, ALL, list(geocodes.values()))
+    writer.add(IMAGES, ALL, list(images.values()))
+    print(f"\n{len(geocodes)} geocodes, {len(images)} image lookups")
+    return writer
+
+
+def _keep_previous(path: str, writer: SnapshotWriter, failed: list, geocodes: dict, images: dict):
+    try:
+        previous = CacheSnapshot(path)
+    except SnapshotError:
+        return
+    try:
+        for destination in failed:
+            key = normalize_address(destination)
+            entry = previous.get(SUGGESTIONS, key)
+            if entry:
+                writer.add(SUGGESTIONS, key, entry)
+                print(f"  kept    {destination:<24} from the previous snapshot")
+        # Older lookups never replace the ones just made.
+        for row in previous.get(GEOCODES, ALL) or ():
+            geocodes.setdefault(row[0], row)
+        for row in previous.get(IMAGES, ALL) or ():
+            images.setdefault(row[0], row)
+    finally:
+        previous.close()
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    destinations = _destinations(args)
+    if not destinations:
+        print("No destinations to warm.")
+        return 1
+
+    print(f"Warming {len(destinations)} destinations, {args.concurrency} at a time")
+    started = time.perf_counter()
+    writer = asyncio.run(_run(args, destinations))
+    counts = writer.counts()
+    if not counts[SUGGESTIONS]:
+        print("Nothing was computed; the snapshot was not written.")
+        return 1
+
+    size = writer.write(args.output)
+    print(f"\nWrote {args.output} ({size / 1024:.1f} KiB) in {time.perf_counter() - started:.1f}s: "
+          f"{counts[SUGGESTIONS]} destinations")
+    return 0 if counts[SUGGESTIONS] == len(destinations) else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())